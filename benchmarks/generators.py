@@ -0,0 +1,128 @@
+'''Synthetic configuration generators used by the benchmark suite.
+
+All generators are deterministic so that results are comparable across
+runs.
+
+'''
+import json
+from os.path import join
+
+
+def generateConfig(size, depth, fanout):
+    '''Generate a configuration dictionary.
+
+    The configuration is a tree of JSON objects with `fanout` keys per
+    object, nested `depth` levels deep, and contains `size` leaf values
+    which cycle through strings, integers, floats, booleans and nulls.
+
+    :param size: The number of leaf values
+    :param depth: The number of levels of nested objects
+    :param fanout: The number of keys per object
+    :rtype: dictionary
+
+    '''
+    leaves = [0]
+
+    def build(level):
+        node = {}
+        for index in range(fanout):
+            if leaves[0] >= size:
+                break
+
+            key = "key%d" % index
+            if level + 1 >= depth:
+                node[key] = _leafValue(leaves[0])
+                leaves[0] += 1
+            else:
+                node[key] = build(level + 1)
+        return node
+
+    data = {}
+    index = 0
+    while leaves[0] < size:
+        data["section%d" % index] = build(1) if depth > 1 \
+            else _leafValue(leaves[0])
+        if depth <= 1:
+            leaves[0] += 1
+        index += 1
+
+    return data
+
+
+def leafKeys(data, delimiter='.'):
+    '''Get the delimited keys of every leaf value in the configuration.
+
+    :param data: The configuration dictionary
+    :param delimiter: The key delimiter
+    :rtype: list of strings
+
+    '''
+    keys = []
+    stack = [(None, data)]
+    while len(stack) > 0:
+        prefix, node = stack.pop()
+        for key, value in sorted(node.iteritems()):
+            path = key if prefix is None else prefix + delimiter + key
+            if type(value) == type(dict()) and len(value) > 0:
+                stack.append((path, value))
+            else:
+                keys.append(path)
+    return keys
+
+
+def generateOverrides(data, count):
+    '''Generate command line arguments which override leaf values of the
+    given configuration.
+
+    :param data: The configuration dictionary
+    :param count: The number of overrides
+    :rtype: list of strings, starting with the program name
+
+    '''
+    keys = leafKeys(data)
+    step = max(1, len(keys) // max(1, count))
+
+    args = ["/usr/bin/benchmark"]
+    for key in keys[::step][:count]:
+        args.append("%s=override" % key)
+    return args
+
+
+def writeConfig(data, filename):
+    '''Write the configuration dictionary as a JSON file.
+
+    :param data: The configuration dictionary
+    :param filename: The path to the file
+
+    '''
+    fd = open(filename, 'w')
+    try:
+        json.dump(data, fd)
+    finally:
+        fd.close()
+
+
+def writeFragments(data, directory):
+    '''Write each top level entry of the configuration as a separate JSON
+    fragment file within the given directory.
+
+    :param data: The configuration dictionary
+    :param directory: The directory in which fragments are written
+
+    '''
+    for key, value in data.iteritems():
+        writeConfig(value, join(directory, "%s.json" % key))
+
+
+def _leafValue(index):
+    '''Get a leaf value for the given leaf index.'''
+    kind = index % 5
+    if kind == 0:
+        return "value%d" % index
+    elif kind == 1:
+        return index
+    elif kind == 2:
+        return index / 7.0
+    elif kind == 3:
+        return index % 2 == 0
+    return None
@@ -0,0 +1,211 @@
+'''A small, self-contained benchmark harness.
+
+Benchmarks are registered with the :func:`benchmark` decorator. Each
+benchmark function receives the harness options and a temporary directory,
+performs its setup, and returns the zero-argument callable to be timed.
+
+'''
+import ctypes
+import gc
+import json
+import os
+import platform
+import sys
+from time import time
+
+
+# The list of registered (name, function) benchmarks
+_benchmarks = []
+
+# The posix_fadvise advice which evicts a file from the page cache
+_FadviseDontNeed = 4
+
+
+def benchmark(name):
+    '''Register a benchmark function under the given name.
+
+    :param name: The name of the benchmark
+
+    '''
+    def register(fn):
+        _benchmarks.append((name, fn))
+        return fn
+    return register
+
+
+def benchmarks():
+    '''Return the list of registered (name, function) benchmarks.'''
+    return list(_benchmarks)
+
+
+def measure(fn, repeat=5, minTime=0.1):
+    '''Time the given function.
+
+    The number of calls per repetition is calibrated so that each
+    repetition lasts at least `minTime` seconds. Garbage collection is
+    disabled while timing.
+
+    :param fn: The zero-argument function to time
+    :param repeat: The number of repetitions
+    :param minTime: The minimum duration of each repetition in seconds
+    :rtype: dictionary of per call timings in seconds
+
+    '''
+    number = 1
+    while True:
+        elapsed = _timeCalls(fn, number)
+        if elapsed >= minTime or number >= 1000000:
+            break
+        number *= 10 if elapsed < minTime / 10.0 else 2
+
+    timings = sorted(_timeCalls(fn, number) / number for _ in range(repeat))
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": timings[0],
+        "median": timings[len(timings) // 2],
+        "max": timings[-1],
+        }
+
+
+def metadata():
+    '''Describe the environment in which benchmarks are run.
+
+    :rtype: dictionary
+
+    '''
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        }
+
+
+def residentMemory():
+    '''Get the resident memory of this process. This is only available on
+    Linux.
+
+    :rtype: int number of bytes, or None if unavailable
+
+    '''
+    try:
+        fd = open("/proc/self/statm", 'r')
+    except IOError:
+        return None
+
+    try:
+        pages = int(fd.read().split()[1])
+    finally:
+        fd.close()
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def privateMemory():
+    '''Get the memory of this process which is not shared with any other
+    process, such as the pages a forked child has copied from its parent.
+    This is only available on Linux.
+
+    :rtype: int number of bytes, or None if unavailable
+
+    '''
+    try:
+        fd = open("/proc/self/smaps", 'r')
+    except IOError:
+        return None
+
+    total = 0
+    try:
+        for line in fd:
+            if line.startswith("Private_"):
+                total += int(line.split()[1])
+    finally:
+        fd.close()
+    return total * 1024
+
+
+def dropCache(filename):
+    '''Ask the operating system to evict a file from its page cache, so
+    the next read of the file is a cold read. This is only available on
+    Linux, and does nothing elsewhere.
+
+    :param filename: The path to the file
+
+    '''
+    try:
+        libc = ctypes.CDLL(None)
+        fadvise = libc.posix_fadvise
+    except (OSError, AttributeError):
+        return
+
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        fadvise(fd, 0, 0, _FadviseDontNeed)
+    finally:
+        os.close(fd)
+
+
+def save(results, filename):
+    '''Write the benchmark results to a JSON file.
+
+    :param results: The dictionary of results
+    :param filename: The path to the file
+
+    '''
+    fd = open(filename, 'w')
+    try:
+        json.dump(results, fd, indent=4, sort_keys=True)
+    finally:
+        fd.close()
+
+
+def load(filename):
+    '''Read benchmark results from a JSON file.
+
+    :param filename: The path to the file
+    :rtype: dictionary of results
+
+    '''
+    fd = open(filename, 'r')
+    try:
+        return json.load(fd)
+    finally:
+        fd.close()
+
+
+def compare(results, baseline, threshold):
+    '''Compare benchmark results against a baseline.
+
+    :param results: The dictionary of current results
+    :param baseline: The dictionary of baseline results
+    :param threshold: The allowed relative slowdown (e.g., 0.1 is 10%)
+    :rtype: list of (name, baseline, current, ratio) regressions
+
+    '''
+    regressions = []
+
+    current = results["benchmarks"]
+    for name, previous in sorted(baseline["benchmarks"].iteritems()):
+        if name not in current or "min" not in current[name]:
+            continue
+
+        ratio = current[name]["min"] / max(previous["min"], 1e-12)
+        if ratio > 1.0 + threshold:
+            regressions.append((name, previous["min"], current[name]["min"],
+                                ratio))
+
+    return regressions
+
+
+def _timeCalls(fn, number):
+    '''Time the given number of calls to the function.'''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time()
+        for _ in xrange(number):
+            fn()
+        return time() - start
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,74 @@
+'''Run the jsonconf benchmark suite.
+
+Usage::
+
+    $ python benchmarks/run.py --output results.json
+    $ python benchmarks/run.py --baseline baseline.json --threshold 0.1
+    $ python benchmarks/run.py --quick --filter ConfigFile.get
+
+Results are written as JSON. When a baseline is given, the run fails if
+any benchmark is slower than the baseline by more than the threshold.
+
+'''
+import sys
+from argparse import ArgumentParser
+from os.path import abspath, dirname
+from shutil import rmtree
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import harness
+import suite  # Registers the benchmarks
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Run the jsonconf benchmarks")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline",
+                        help="Compare results against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Allowed relative slowdown (default: 0.1)")
+    parser.add_argument("--filter", default=None,
+                        help="Only run benchmarks containing this string")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of repetitions (default: 5)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Use smaller problem sizes")
+    options = parser.parse_args(argv)
+
+    results = {"metadata": harness.metadata(), "benchmarks": {}}
+
+    directory = mkdtemp()
+    try:
+        for name, fn in harness.benchmarks():
+            if options.filter is not None and options.filter not in name:
+                continue
+
+            result = fn(options, directory)
+            if callable(result):
+                result = harness.measure(result, repeat=options.repeat)
+                print "%-50s %12.3f us" % (name, result["min"] * 1e6)
+            else:
+                print "%-50s %s" % (name, result)
+            results["benchmarks"][name] = result
+    finally:
+        rmtree(directory)
+
+    if options.output is not None:
+        harness.save(results, options.output)
+
+    if options.baseline is not None:
+        baseline = harness.load(options.baseline)
+        regressions = harness.compare(results, baseline, options.threshold)
+        for name, previous, current, ratio in regressions:
+            print "REGRESSION %s: %.3f us -> %.3f us (%.2fx)" % \
+                (name, previous * 1e6, current * 1e6, ratio)
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
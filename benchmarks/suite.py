@@ -0,0 +1,875 @@
+'''The jsonconf benchmarks.
+
+Each benchmark receives the harness options and a temporary directory, and
+returns the zero-argument callable to be timed.
+
+'''
+import gc
+import gzip
+import json
+import os
+from os import mkdir
+from os.path import join
+from time import sleep
+
+from harness import benchmark, dropCache, privateMemory, \
+    residentMemory
+from generators import generateConfig, generateOverrides, leafKeys, \
+    writeConfig, writeFragments
+
+from jsonconf import binaryFormats, compression
+from jsonconf import CommandLineParser, ConfigDecoder, ConfigFile, \
+    ConfigRegistry, DataSource, JsonConfig, KeyIndex, SchemaValidator, \
+    Subscriptions
+
+
+def _size(options, quick, full):
+    '''Select the problem size for the current mode.'''
+    return quick if options.quick else full
+
+
+def _configFile(options, directory, size, depth=4, fanout=10):
+    '''Write a synthetic configuration file and return its path and data.'''
+    data = generateConfig(size, depth, fanout)
+    filename = join(directory, "config-%d-%d-%d.json" % (size, depth, fanout))
+    writeConfig(data, filename)
+    return filename, data
+
+
+@benchmark("ConfigFile.parse[1k]")
+def configFileParseSmall(options, directory):
+    filename, data = _configFile(options, directory, 1000)
+
+    def run():
+        ConfigFile().parse(filename)
+    return run
+
+
+@benchmark("ConfigFile.parse[100k]")
+def configFileParseLarge(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+
+    def run():
+        ConfigFile().parse(filename)
+    return run
+
+
+@benchmark("ConfigFile.parse[deep]")
+def configFileParseDeep(options, directory):
+    filename, data = _configFile(options, directory, 10000, depth=12,
+                                 fanout=2)
+
+    def run():
+        ConfigFile().parse(filename)
+    return run
+
+
+@benchmark("ConfigFile.get[depth4]")
+def configFileGet(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+    key = leafKeys(data)[-1]
+
+    def run():
+        config.get(key)
+    return run
+
+
+@benchmark("ConfigFile.get[missing]")
+def configFileGetMissing(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+
+    def run():
+        config.get("section0.key0.missing.key", 5)
+    return run
+
+
+@benchmark("ConfigFile.hasKey[depth4]")
+def configFileHasKey(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+    key = leafKeys(data)[-1]
+
+    def run():
+        config.hasKey(key)
+    return run
+
+
+@benchmark("ConfigFile.updateData[100]")
+def configFileUpdateData(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+
+    overrides = dict(arg.split("=")
+                     for arg in generateOverrides(data, 100)[1:])
+
+    def run():
+        config.updateData(overrides)
+    return run
+
+
+@benchmark("CommandLineParser.parse[100]")
+def commandLineParse(options, directory):
+    args = generateOverrides(generateConfig(10000, 4, 10), 100)
+    args.extend(["--verbose", "extra"])
+
+    def run():
+        parser = CommandLineParser()
+        parser.renameKeys("verbose", ["-v", "--verbose"])
+        parser.parse(args)
+    return run
+
+
+@benchmark("JsonConfig.parse[10k,100 overrides]")
+def jsonConfigParse(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    args = generateOverrides(data, 100)
+
+    # Require keys with non-null values
+    keys = []
+    for key in leafKeys(data):
+        value = data
+        for part in key.split('.'):
+            value = value[part]
+        if value is not None:
+            keys.append(key)
+    keys = keys[:50]
+
+    def run():
+        config = JsonConfig()
+        for key in keys:
+            config.requireKey(key)
+        config.parse(filename, args)
+    return run
+
+
+@benchmark("JsonConfig.parse[10k,100 overrides,shared]")
+def jsonConfigParseShared(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    args = generateOverrides(data, 100)
+
+    def run():
+        config = JsonConfig(shared=True)
+        config.parse(filename, args)
+        config.get("section0")
+    return run
+
+
+@benchmark("ConfigFile.get[overridden]")
+def configFileGetOverridden(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+    overrides = dict(arg.split("=")
+                     for arg in generateOverrides(data, 100)[1:])
+    config.updateData(overrides)
+    key = sorted(overrides)[0]
+
+    def run():
+        config.get(key)
+    return run
+
+
+def _fragments(options, directory, workers):
+    '''Parse a directory of fragments with the given number of workers.'''
+    fragments = join(directory, "fragments")
+    try:
+        mkdir(fragments)
+        count = _size(options, 64, 256)
+        data = {}
+        for index in range(count):
+            data["service%d" % index] = generateConfig(500, 3, 10)
+        writeFragments(data, fragments)
+    except OSError:
+        pass  # The fragments already exist
+
+    def run():
+        ConfigFile().parse(fragments, workers=workers)
+    return run
+
+
+@benchmark("ConfigFile.parse[fragments,1 worker]")
+def fragmentsOneWorker(options, directory):
+    return _fragments(options, directory, 1)
+
+
+@benchmark("ConfigFile.parse[fragments,4 workers]")
+def fragmentsFourWorkers(options, directory):
+    return _fragments(options, directory, 4)
+
+
+@benchmark("ConfigFile.parse[fragments,16 workers]")
+def fragmentsSixteenWorkers(options, directory):
+    return _fragments(options, directory, 16)
+
+
+@benchmark("verify[decoder hook]")
+def verifyDecoderHook(options, directory):
+    text = json.dumps(generateConfig(_size(options, 10000, 100000), 6, 6))
+
+    def run():
+        ConfigDecoder().loads(text)
+    return run
+
+
+@benchmark("verify[post-pass walk]")
+def verifyPostPass(options, directory):
+    text = json.dumps(generateConfig(_size(options, 10000, 100000), 6, 6))
+
+    def walk(data):
+        stack = [data]
+        while len(stack) > 0:
+            node = stack.pop()
+            for key, value in node.iteritems():
+                if '.' in key:
+                    raise Exception("Invalid key: %s" % key)
+                if type(value) == type(dict()):
+                    stack.append(value)
+
+    def run():
+        walk(json.loads(text))
+    return run
+
+
+def _includes(options, directory, include):
+    '''Parse a configuration containing 1,000 copies of a fragment.'''
+    fragment = generateConfig(_size(options, 100, 1000), 3, 10)
+    writeConfig(fragment, join(directory, "common.json"))
+
+    data = {}
+    for index in range(1000):
+        data["service%d" % index] = {"$include": "common.json"} \
+            if include else fragment
+
+    filename = join(directory, "include-%s.json" % include)
+    writeConfig(data, filename)
+
+    def run():
+        ConfigFile().parse(filename)
+    return run
+
+
+@benchmark("ConfigFile.parse[fragment included 1000x]")
+def includeFragment(options, directory):
+    return _includes(options, directory, True)
+
+
+@benchmark("ConfigFile.parse[fragment inlined 1000x]")
+def inlineFragment(options, directory):
+    return _includes(options, directory, False)
+
+
+def _dump(options, canonical):
+    '''Dump a configuration with one million leaves.'''
+    config = ConfigFile()
+    config.updateData(generateConfig(_size(options, 100000, 1000000), 4, 32))
+
+    def run():
+        config.dump(_NullWriter(), canonical=canonical)
+    return run
+
+
+class _NullWriter:
+    '''A file like object which discards everything written to it.'''
+
+    def write(self, chunk):
+        pass
+
+
+@benchmark("ConfigFile.dump[1M leaves]")
+def dumpLarge(options, directory):
+    return _dump(options, False)
+
+
+@benchmark("ConfigFile.dump[1M leaves,canonical]")
+def dumpLargeCanonical(options, directory):
+    return _dump(options, True)
+
+
+@benchmark("ConfigFile.fingerprint[cached]")
+def fingerprintCached(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+    config.fingerprint()
+
+    def run():
+        config.fingerprint("section5")
+    return run
+
+
+@benchmark("ConfigFile.fingerprint[100k,cold]")
+def fingerprintCold(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+
+    def run():
+        config = ConfigFile()
+        config.updateData(data)
+        config.fingerprint()
+    return run
+
+
+@benchmark("ConfigFile.getInt[cached]")
+def typedGetInt(options, directory):
+    config = ConfigFile()
+    config.updateData({"services.payments.db.port": "5432"})
+
+    def run():
+        config.getInt("services.payments.db.port")
+    return run
+
+
+@benchmark("int(ConfigFile.get)[manual]")
+def manualGetInt(options, directory):
+    config = ConfigFile()
+    config.updateData({"services.payments.db.port": "5432"})
+
+    def run():
+        int(config.get("services.payments.db.port"))
+    return run
+
+
+@benchmark("ConfigFile.getDuration[cached]")
+def typedGetDuration(options, directory):
+    config = ConfigFile()
+    config.updateData({"services.payments.timeout": "1h30m"})
+
+    def run():
+        config.getDuration("services.payments.timeout")
+    return run
+
+
+@benchmark("ConfigProxy[depth4]")
+def proxyAccess(options, directory):
+    config = ConfigFile()
+    config.updateData({"services.payments.db.host": "localhost"})
+    proxy = config.proxy()
+
+    def run():
+        proxy.services.payments.db.host
+    return run
+
+
+@benchmark("dict[depth4]")
+def dictAccess(options, directory):
+    data = {"services": {"payments": {"db": {"host": "localhost"}}}}
+
+    def run():
+        data["services"]["payments"]["db"]["host"]
+    return run
+
+
+def _query(options, directory, cached):
+    '''Query one key of every section of a configuration.'''
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+
+    def run():
+        if not cached:
+            config.updateData({"unrelated": 1})
+        for key, value in config.query("*.key0.key0.key0"):
+            pass
+    return run
+
+
+@benchmark("ConfigFile.query[wildcard]")
+def queryWildcard(options, directory):
+    return _query(options, directory, False)
+
+
+@benchmark("ConfigFile.query[wildcard,cached]")
+def queryWildcardCached(options, directory):
+    return _query(options, directory, True)
+
+
+@benchmark("ConfigFile.query[glob]")
+def queryGlob(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+
+    def run():
+        config.updateData({"unrelated": 1})
+        for key, value in config.query("**.key0"):
+            pass
+    return run
+
+
+@benchmark("ConfigFile.iterItems[100k]")
+def iterItemsLarge(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    config = ConfigFile()
+    config.parse(filename)
+
+    def run():
+        for key, value in config.iterItems():
+            pass
+    return run
+
+
+@benchmark("ConfigFile.iterItems[100k,sorted]")
+def iterItemsLargeSorted(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    config = ConfigFile()
+    config.parse(filename)
+
+    def run():
+        for key, value in config.iterItems(sort=True):
+            pass
+    return run
+
+
+def _tenantOverrides(data, tenant, count=30):
+    '''Generate the overrides of a tenant.'''
+    args = generateOverrides(data, count)[1:]
+    return dict((arg.split("=")[0], "tenant%d" % tenant) for arg in args)
+
+
+def _memoryPerTenant(create, count):
+    '''Measure the resident memory used by each of a number of tenants.'''
+    gc.collect()
+    before = residentMemory()
+    tenants = [create(tenant) for tenant in xrange(count)]
+    gc.collect()
+    after = residentMemory()
+    if before is None or after is None:
+        return None
+    return (after - before) // max(1, len(tenants))
+
+
+@benchmark("ConfigRegistry[memory per tenant]")
+def registryMemory(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    tenants = _size(options, 1000, 10000)
+    copies = _size(options, 50, 200)
+
+    base = ConfigFile()
+    base.parse(filename)
+    registry = ConfigRegistry(base)
+
+    def addTenant(tenant):
+        registry.setTenant(tenant, _tenantOverrides(data, tenant))
+
+    def copyTenant(tenant):
+        config = ConfigFile()
+        config.parse(filename)
+        config.updateData(_tenantOverrides(data, tenant))
+        config.get("section0.key0")
+        return config
+
+    return {
+        "tenants": tenants,
+        "registryBytesPerTenant": _memoryPerTenant(addTenant, tenants),
+        "copyBytesPerTenant": _memoryPerTenant(copyTenant, copies),
+        }
+
+
+@benchmark("ConfigRegistry.get[overridden]")
+def registryGetOverridden(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    base = ConfigFile()
+    base.parse(filename)
+    registry = ConfigRegistry(base)
+    for tenant in xrange(100):
+        registry.setTenant(tenant, _tenantOverrides(data, tenant))
+    key = sorted(_tenantOverrides(data, 0))[0]
+
+    def run():
+        registry.get(50, key)
+    return run
+
+
+@benchmark("ConfigRegistry.get[base]")
+def registryGetBase(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    base = ConfigFile()
+    base.parse(filename)
+    registry = ConfigRegistry(base)
+    for tenant in xrange(100):
+        registry.setTenant(tenant, {"extra.key": tenant})
+    key = leafKeys(data)[-1]
+
+    def run():
+        registry.get(50, key)
+    return run
+
+
+class _SlowSource(DataSource):
+    '''A source which takes 20 milliseconds to load, like a remote one.'''
+
+    def load(self, delimiter='.'):
+        sleep(0.02)
+        return DataSource.load(self, delimiter)
+
+
+@benchmark("ConfigFile.parse[4 sources,20ms each]")
+def parseSlowSources(options, directory):
+    sources = [_SlowSource(generateConfig(1000, 3, 10)) for _ in range(4)]
+
+    def run():
+        ConfigFile().parse(sources)
+    return run
+
+
+def _compressedFile(options, directory, extension):
+    '''Write a synthetic configuration file, compressed according to the
+    given extension, and time parsing it with a cold page cache.'''
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    fd = open(filename, 'rb')
+    text = fd.read()
+    fd.close()
+
+    if extension == ".gz":
+        compressed = filename + extension
+        fd = gzip.open(compressed, 'wb')
+        fd.write(text)
+        fd.close()
+    elif extension == ".xz":
+        if compression.lzma is None:
+            return {"skipped": "lzma is not installed"}
+        compressed = filename + extension
+        fd = open(compressed, 'wb')
+        fd.write(compression.lzma.compress(text))
+        fd.close()
+    elif extension == ".zst":
+        if compression.zstandard is None:
+            return {"skipped": "zstandard is not installed"}
+        compressed = filename + extension
+        fd = open(compressed, 'wb')
+        fd.write(compression.zstandard.ZstdCompressor().compress(text))
+        fd.close()
+    else:
+        compressed = filename
+
+    def run():
+        dropCache(compressed)
+        ConfigFile().parse(compressed)
+    return run
+
+
+@benchmark("ConfigFile.parse[100k,cold,plain]")
+def parseColdPlain(options, directory):
+    return _compressedFile(options, directory, "")
+
+
+@benchmark("ConfigFile.parse[100k,cold,gzip,whole-file]")
+def parseColdGzip(options, directory):
+    return _compressedFile(options, directory, ".gz")
+
+
+@benchmark("ConfigFile.parse[100k,cold,xz,whole-file]")
+def parseColdXz(options, directory):
+    return _compressedFile(options, directory, ".xz")
+
+
+@benchmark("ConfigFile.parse[100k,cold,zstd,whole-file]")
+def parseColdZstd(options, directory):
+    return _compressedFile(options, directory, ".zst")
+
+
+def _binaryFile(options, directory, format):
+    '''Write a synthetic configuration file in the given format, and time
+    parsing it.'''
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    if format == "msgpack":
+        encoded = binaryFormats.encodeMsgPack(data)
+    elif format == "cbor":
+        encoded = binaryFormats.encodeCbor(data)
+    else:
+        return lambda: ConfigFile().parse(filename)
+
+    filename = filename.replace(".json", "." + format)
+    fd = open(filename, 'wb')
+    fd.write(encoded)
+    fd.close()
+
+    def run():
+        ConfigFile().parse(filename)
+    return run
+
+
+@benchmark("ConfigFile.parse[100k,json]")
+def parseJson(options, directory):
+    return _binaryFile(options, directory, "json")
+
+
+@benchmark("ConfigFile.parse[100k,msgpack]")
+def parseMsgPack(options, directory):
+    return _binaryFile(options, directory, "msgpack")
+
+
+@benchmark("ConfigFile.parse[100k,cbor]")
+def parseCbor(options, directory):
+    return _binaryFile(options, directory, "cbor")
+
+
+# Constrains every value of the synthetic configurations
+_LeafSchema = {
+    "$ref": "#/definitions/node",
+    "definitions": {
+        "node": {
+            "type": ["object", "string", "integer", "number", "boolean",
+                     "null"],
+            "additionalProperties": {"$ref": "#/definitions/node"},
+            "maxLength": 100,
+            "minimum": -1000000,
+            },
+        },
+    }
+
+
+def _reload(options, directory, schema):
+    '''Time reloading a configuration, validating it when a schema is
+    given.'''
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    config = JsonConfig()
+    config.parse(filename, ["program"])
+    if schema is not None:
+        config.validateSchema(schema)
+
+    def run():
+        config.reload()
+    return run
+
+
+@benchmark("JsonConfig.reload[100k]")
+def jsonConfigReload(options, directory):
+    return _reload(options, directory, None)
+
+
+@benchmark("JsonConfig.reload[100k,schema]")
+def jsonConfigReloadSchema(options, directory):
+    return _reload(options, directory, _LeafSchema)
+
+
+@benchmark("SchemaValidator.validate[100k]")
+def schemaValidate(options, directory):
+    data = generateConfig(_size(options, 10000, 100000), 4, 10)
+    validator = SchemaValidator(_LeafSchema)
+
+    def run():
+        validator.validate(data)
+    return run
+
+
+def _ruleConfig(options, directory):
+    '''Parse a configuration with a required key, and a key conversion,
+    registered for every leaf.'''
+    size = _size(options, 5000, 50000)
+    filename, data = _configFile(options, directory, size)
+    keys = leafKeys(data)
+
+    config = JsonConfig()
+    for key in keys:
+        config.requireKey(key, lambda value: value)
+    config.parse(filename, ["program"])
+    return config, keys
+
+
+@benchmark("JsonConfig.updateData[50k rules,10 keys]")
+def jsonConfigUpdate(options, directory):
+    config, keys = _ruleConfig(options, directory)
+    update = dict((key, 1) for key in keys[::len(keys) // 10][:10])
+
+    def run():
+        config.updateData(update)
+    return run
+
+
+@benchmark("ConfigFile.requireKeys+convertKeys[50k rules]")
+def configFileRules(options, directory):
+    config, keys = _ruleConfig(options, directory)
+    configFile = ConfigFile()
+    configFile.updateData(dict((key, 1) for key in keys))
+    converters = dict((key, lambda value: value) for key in keys)
+
+    def run():
+        configFile.requireKeys(keys)
+        configFile.convertKeys(converters)
+    return run
+
+
+def _subscribers(options):
+    '''Subscribe to every leaf of a synthetic configuration.'''
+    data = generateConfig(_size(options, 10000, 100000), 4, 10)
+    keys = leafKeys(data)
+    subscriptions = Subscriptions()
+    for key in keys:
+        subscriptions.subscribe(key, lambda changed: None)
+    return subscriptions, data, keys
+
+
+@benchmark("Subscriptions.notify[100k subscribers,1 key]")
+def subscriptionsNotify(options, directory):
+    subscriptions, _, keys = _subscribers(options)
+    changed = [keys[len(keys) // 2]]
+
+    def run():
+        subscriptions.notify(changed)
+    return run
+
+
+@benchmark("Subscriptions.notify[100k subscribers,1 section]")
+def subscriptionsNotifySection(options, directory):
+    subscriptions, _, keys = _subscribers(options)
+    changed = [keys[len(keys) // 2].split(".")[0]]
+
+    def run():
+        subscriptions.notify(changed)
+    return run
+
+
+@benchmark("linear scan[100k subscribers,1 key]")
+def subscriptionsScan(options, directory):
+    _, _, keys = _subscribers(options)
+    subscribers = [(key, lambda changed: None) for key in keys]
+    key = keys[len(keys) // 2]
+
+    def run():
+        for prefix, callback in subscribers:
+            if prefix == key or prefix.startswith(key + ".") or \
+                    key.startswith(prefix + "."):
+                callback([key])
+    return run
+
+
+@benchmark("JsonConfig.updateData[100k subscribers,1 key]")
+def jsonConfigUpdateSubscribed(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    keys = leafKeys(data)
+    config = JsonConfig()
+    config.parse(filename, ["program"])
+    for key in keys:
+        config.subscribe(key, lambda changed: None)
+    key = keys[len(keys) // 2]
+    values = [{key: 1}, {key: 2}]
+
+    def run():
+        config.updateData(values[0])
+        config.updateData(values[1])
+    return run
+
+
+def _childPrivateMemory(config, keys):
+    '''Measure the memory a forked child copies from its parent while it
+    looks up every one of the keys.'''
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+
+        # Copy the keys first, so that only the pages of the configuration
+        # are counted
+        keys = [key[:1] + key[1:] for key in keys]
+        before = privateMemory()
+        for key in keys:
+            config.get(key)
+        after = privateMemory()
+        result = -1 if before is None else after - before
+        os.write(write, str(result))
+        os._exit(0)
+
+    os.close(write)
+    result = int(os.read(read, 64))
+    os.close(read)
+    os.waitpid(pid, 0)
+    return result if result >= 0 else None
+
+
+@benchmark("JsonConfig.freeze[100k,fork,memory]")
+def freezeMemory(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    keys = leafKeys(data)
+    results = {"lookups": len(keys)}
+    for name, freeze, packed in [("plain", False, False),
+                                 ("frozen", True, False),
+                                 ("packed", True, True)]:
+        config = JsonConfig()
+        config.parse(filename, ["program"])
+        if freeze:
+            config.freeze(packed)
+        results[name + "ChildBytes"] = _childPrivateMemory(config, keys)
+        del config
+    return results
+
+
+@benchmark("JsonConfig.get[packed]")
+def jsonConfigGetPacked(options, directory):
+    filename, data = _configFile(options, directory,
+                                 _size(options, 10000, 100000))
+    keys = leafKeys(data)
+    config = JsonConfig()
+    config.parse(filename, ["program"])
+    config.freeze(packed=True)
+    key = keys[len(keys) // 2]
+
+    def run():
+        config.get(key)
+    return run
+
+
+@benchmark("KeyIndex[1M paths]")
+def keyIndexBuild(options, directory):
+    data = generateConfig(_size(options, 100000, 1000000), 4, 10)
+
+    def run():
+        KeyIndex(data)
+    return run
+
+
+@benchmark("KeyIndex.suggest[1M paths]")
+def keyIndexSuggest(options, directory):
+    data = generateConfig(_size(options, 100000, 1000000), 4, 10)
+    keyIndex = KeyIndex(data)
+    key = leafKeys(data)[-1]
+    index = key.rindex("key")
+    key = key[:index] + "kye" + key[index + 3:]
+
+    def run():
+        keyIndex.suggest(key)
+    return run
+
+
+@benchmark("ConfigFile.get[strict]")
+def configFileGetStrict(options, directory):
+    filename, data = _configFile(options, directory, 10000)
+    config = ConfigFile()
+    config.parse(filename)
+    config.enableStrictMode()
+    key = leafKeys(data)[-1]
+
+    def run():
+        config.get(key)
+    return run
+
+
+@benchmark("ConfigFile.updateData[4k references]")
+def updateDataReferences(options, directory):
+    count = _size(options, 1000, 4000)
+    config = ConfigFile()
+    config.updateData(dict(("refs.key%d" % index, "${values.key%d}" % index)
+                           for index in xrange(count)))
+    config.updateData(dict(("values.key%d" % index, index)
+                           for index in xrange(count)))
+    config.enableInterpolation()
+    values = [{"values.key0": 1}, {"values.key0": 2}]
+
+    def run():
+        config.updateData(values[0])
+        config.updateData(values[1])
+    return run
@@ -1,3 +1,17 @@
+from configDecoder import ConfigDecoder
 from configFile import ConfigFile
+from configProxy import ConfigProxy
+from configRegistry import ConfigRegistry
+from configSource import ConfigSource, DataSource, FileSource, HttpSource
+from fragmentCache import FragmentCache
+from instrumentation import Instrumentation
+from interpolation import Interpolator
+from keyAudit import KeyAudit
+from keyIndex import KeyIndex
+from packedData import PackedData
+from pathQuery import PathQuery
+from schemaValidator import SchemaValidator
+from subscriptions import Subscriptions
 from commandLine import CommandLineParser
 from jsonConfig import JsonConfig
+from units import parseBool, parseDuration, parseFloat, parseInt, parseSize
@@ -0,0 +1,480 @@
+'''Decoders and encoders for the binary MessagePack and CBOR formats, which
+may be used instead of JSON for machine generated configuration files.
+
+Maps are decoded into lists of (key, value) pairs which are passed to an
+object pairs hook, just as the JSON decoder does, so keys are verified in
+the same way regardless of the format. The `msgpack` package is used when
+it is installed, and a pure Python decoder is used otherwise. CBOR is
+always decoded in pure Python, since `cbor2` builds dictionaries before
+they can be verified, but `cbor2` is used for encoding when installed.
+
+'''
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+# Map file name extensions to formats
+Formats = {
+    ".json": "json",
+    ".msgpack": "msgpack",
+    ".mpk": "msgpack",
+    ".cbor": "cbor",
+    }
+
+# The tag which marks CBOR data, which may precede the data
+_CborMagic = "\xd9\xd9\xf7"
+
+
+def detectFormat(data):
+    '''Determine the format of configuration data from its first bytes. A
+    configuration is a map, which starts with a byte that never starts a
+    JSON document in both MessagePack and CBOR.
+
+    :param data: The configuration data
+    :rtype: string, one of: json, msgpack, or cbor
+
+    '''
+    if len(data) == 0 or isinstance(data, unicode):
+        return "json"
+
+    first = ord(data[0])
+    if 0x80 <= first <= 0x8f or first in (0xde, 0xdf):
+        return "msgpack"
+    elif 0xa0 <= first <= 0xbb or first == 0xbf or \
+            data.startswith(_CborMagic):
+        return "cbor"
+    return "json"
+
+
+def decodeMsgPack(data, objectPairsHook=dict):
+    '''Decode MessagePack data.
+
+    :param data: The MessagePack encoded string
+    :param objectPairsHook: The function which creates a dictionary from a
+                            list of (key, value) pairs
+
+    :returns: The decoded value
+
+    :raises ValueError: If the data is not valid MessagePack
+
+    '''
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(data, object_pairs_hook=objectPairsHook,
+                                   raw=False, strict_map_key=False)
+        except TypeError:
+            # Versions which predate the strict_map_key option
+            return msgpack.unpackb(data, object_pairs_hook=objectPairsHook,
+                                   raw=False)
+    return _MsgPackDecoder(data, objectPairsHook).decode()
+
+
+def decodeCbor(data, objectPairsHook=dict):
+    '''Decode CBOR data.
+
+    :param data: The CBOR encoded string
+    :param objectPairsHook: The function which creates a dictionary from a
+                            list of (key, value) pairs
+
+    :returns: The decoded value
+
+    :raises ValueError: If the data is not valid CBOR
+
+    '''
+    return _CborDecoder(data, objectPairsHook).decode()
+
+
+def encodeMsgPack(value):
+    '''Encode a value as MessagePack.
+
+    :param value: The JSON compatible value
+    :rtype: string
+
+    '''
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+
+    chunks = []
+    _encodeMsgPack(value, chunks)
+    return "".join(chunks)
+
+
+def encodeCbor(value):
+    '''Encode a value as CBOR.
+
+    :param value: The JSON compatible value
+    :rtype: string
+
+    '''
+    if cbor2 is not None:
+        return cbor2.dumps(value)
+
+    chunks = []
+    _encodeCbor(value, chunks)
+    return "".join(chunks)
+
+
+class _MsgPackDecoder:
+    '''A pure Python MessagePack decoder.'''
+
+    def __init__(self, data, objectPairsHook):
+        self.__data = data
+        self.__hook = objectPairsHook
+        self.__position = 0
+
+    def decode(self):
+        '''Decode the data, which must contain a single value.'''
+        try:
+            value = self.__value()
+        except (IndexError, struct.error):
+            raise ValueError("Truncated MessagePack data")
+
+        if self.__position != len(self.__data):
+            raise ValueError("Extra data after MessagePack value at offset "
+                             "%d" % self.__position)
+        return value
+
+    ##### Private functions
+
+    def __read(self, size):
+        '''Read the given number of bytes.'''
+        start = self.__position
+        end = start + size
+        if end > len(self.__data):
+            raise ValueError("Truncated MessagePack data")
+        self.__position = end
+        return self.__data[start:end]
+
+    def __unpack(self, format, size):
+        '''Read a number with the given struct format.'''
+        return struct.unpack(format, self.__read(size))[0]
+
+    def __value(self):
+        '''Decode the value at the current position.'''
+        byte = ord(self.__data[self.__position])
+        self.__position += 1
+
+        if byte <= 0x7f:
+            return byte
+        elif byte <= 0x8f:
+            return self.__map(byte & 0x0f)
+        elif byte <= 0x9f:
+            return self.__array(byte & 0x0f)
+        elif byte <= 0xbf:
+            return self.__read(byte & 0x1f).decode("utf-8")
+        elif byte >= 0xe0:
+            return byte - 0x100
+        elif byte == 0xc0:
+            return None
+        elif byte == 0xc2:
+            return False
+        elif byte == 0xc3:
+            return True
+        elif byte == 0xc4:
+            return self.__read(self.__unpack(">B", 1))
+        elif byte == 0xc5:
+            return self.__read(self.__unpack(">H", 2))
+        elif byte == 0xc6:
+            return self.__read(self.__unpack(">I", 4))
+        elif byte == 0xca:
+            return self.__unpack(">f", 4)
+        elif byte == 0xcb:
+            return self.__unpack(">d", 8)
+        elif byte == 0xcc:
+            return self.__unpack(">B", 1)
+        elif byte == 0xcd:
+            return self.__unpack(">H", 2)
+        elif byte == 0xce:
+            return self.__unpack(">I", 4)
+        elif byte == 0xcf:
+            return self.__unpack(">Q", 8)
+        elif byte == 0xd0:
+            return self.__unpack(">b", 1)
+        elif byte == 0xd1:
+            return self.__unpack(">h", 2)
+        elif byte == 0xd2:
+            return self.__unpack(">i", 4)
+        elif byte == 0xd3:
+            return self.__unpack(">q", 8)
+        elif byte == 0xd9:
+            return self.__read(self.__unpack(">B", 1)).decode("utf-8")
+        elif byte == 0xda:
+            return self.__read(self.__unpack(">H", 2)).decode("utf-8")
+        elif byte == 0xdb:
+            return self.__read(self.__unpack(">I", 4)).decode("utf-8")
+        elif byte == 0xdc:
+            return self.__array(self.__unpack(">H", 2))
+        elif byte == 0xdd:
+            return self.__array(self.__unpack(">I", 4))
+        elif byte == 0xde:
+            return self.__map(self.__unpack(">H", 2))
+        elif byte == 0xdf:
+            return self.__map(self.__unpack(">I", 4))
+
+        raise ValueError("Unsupported MessagePack type 0x%02x at offset %d" %
+                         (byte, self.__position - 1))
+
+    def __array(self, length):
+        '''Decode an array of the given length.'''
+        return [self.__value() for _ in xrange(length)]
+
+    def __map(self, length):
+        '''Decode a map of the given length.'''
+        pairs = []
+        for _ in xrange(length):
+            key = self.__value()
+            pairs.append((key, self.__value()))
+        return self.__hook(pairs)
+
+
+class _CborDecoder:
+    '''A pure Python CBOR decoder. Tags are ignored, and their tagged values
+    are decoded as is.
+
+    '''
+    # Marks the end of an indefinite length item
+    __Break = object()
+
+    def __init__(self, data, objectPairsHook):
+        self.__data = data
+        self.__hook = objectPairsHook
+        self.__position = 0
+
+    def decode(self):
+        '''Decode the data, which must contain a single value.'''
+        try:
+            value = self.__value()
+        except (IndexError, struct.error):
+            raise ValueError("Truncated CBOR data")
+
+        if value is self.__Break:
+            raise ValueError("Unexpected CBOR break")
+        if self.__position != len(self.__data):
+            raise ValueError("Extra data after CBOR value at offset %d" %
+                             self.__position)
+        return value
+
+    ##### Private functions
+
+    def __read(self, size):
+        '''Read the given number of bytes.'''
+        start = self.__position
+        end = start + size
+        if end > len(self.__data):
+            raise ValueError("Truncated CBOR data")
+        self.__position = end
+        return self.__data[start:end]
+
+    def __argument(self, info):
+        '''Read the argument of an item, or None for indefinite lengths.'''
+        if info < 24:
+            return info
+        elif info == 24:
+            return ord(self.__read(1))
+        elif info == 25:
+            return struct.unpack(">H", self.__read(2))[0]
+        elif info == 26:
+            return struct.unpack(">I", self.__read(4))[0]
+        elif info == 27:
+            return struct.unpack(">Q", self.__read(8))[0]
+        elif info == 31:
+            return None
+        raise ValueError("Invalid CBOR argument at offset %d" %
+                         self.__position)
+
+    def __value(self):
+        '''Decode the item at the current position.'''
+        byte = ord(self.__data[self.__position])
+        self.__position += 1
+        major, info = byte >> 5, byte & 0x1f
+
+        if major == 7:
+            return self.__simple(info)
+
+        argument = self.__argument(info)
+        if major == 0:
+            return argument
+        elif major == 1:
+            return -1 - argument
+        elif major == 2 or major == 3:
+            if argument is None:
+                chunks = []
+                chunk = self.__value()
+                while chunk is not self.__Break:
+                    chunks.append(chunk)
+                    chunk = self.__value()
+                value = "".join(chunks) if major == 2 else u"".join(chunks)
+                return value
+            value = self.__read(argument)
+            return value if major == 2 else value.decode("utf-8")
+        elif major == 4:
+            items = []
+            if argument is None:
+                item = self.__value()
+                while item is not self.__Break:
+                    items.append(item)
+                    item = self.__value()
+            else:
+                for _ in xrange(argument):
+                    items.append(self.__value())
+            return items
+        elif major == 5:
+            pairs = []
+            if argument is None:
+                key = self.__value()
+                while key is not self.__Break:
+                    pairs.append((key, self.__value()))
+                    key = self.__value()
+            else:
+                for _ in xrange(argument):
+                    key = self.__value()
+                    pairs.append((key, self.__value()))
+            return self.__hook(pairs)
+        elif argument is None:
+            raise ValueError("Invalid CBOR tag at offset %d" %
+                             self.__position)
+
+        # Tags (major type 6) describe the value which follows
+        return self.__value()
+
+    def __simple(self, info):
+        '''Decode a simple value, or floating point number.'''
+        if info == 20:
+            return False
+        elif info == 21:
+            return True
+        elif info == 22 or info == 23:
+            return None
+        elif info == 25:
+            return _halfFloat(struct.unpack(">H", self.__read(2))[0])
+        elif info == 26:
+            return struct.unpack(">f", self.__read(4))[0]
+        elif info == 27:
+            return struct.unpack(">d", self.__read(8))[0]
+        elif info == 31:
+            return self.__Break
+        raise ValueError("Unsupported CBOR simple value %d at offset %d" %
+                         (info, self.__position))
+
+
+def _halfFloat(bits):
+    '''Convert the bits of an IEEE 754 half precision number to a float.'''
+    sign = -1.0 if bits & 0x8000 else 1.0
+    exponent = (bits >> 10) & 0x1f
+    fraction = bits & 0x3ff
+    if exponent == 0:
+        return sign * fraction * 2.0 ** -24
+    elif exponent == 0x1f:
+        return sign * float("inf") if fraction == 0 else float("nan")
+    return sign * (1 + fraction / 1024.0) * 2.0 ** (exponent - 15)
+
+
+def _encodeMsgPack(value, chunks):
+    '''Append the MessagePack encoding of a value to the list of chunks.'''
+    if value is None:
+        chunks.append("\xc0")
+    elif value is True:
+        chunks.append("\xc3")
+    elif value is False:
+        chunks.append("\xc2")
+    elif isinstance(value, (int, long)):
+        if 0 <= value <= 0x7f:
+            chunks.append(chr(value))
+        elif -32 <= value < 0:
+            chunks.append(chr(value + 0x100))
+        elif 0 <= value <= 0xffffffff:
+            chunks.append(struct.pack(">BI", 0xce, value))
+        elif 0 <= value:
+            chunks.append(struct.pack(">BQ", 0xcf, value))
+        else:
+            chunks.append(struct.pack(">Bq", 0xd3, value))
+    elif isinstance(value, float):
+        chunks.append(struct.pack(">Bd", 0xcb, value))
+    elif isinstance(value, unicode):
+        _encodeMsgPackString(value.encode("utf-8"), chunks)
+    elif isinstance(value, str):
+        _encodeMsgPackString(value, chunks)
+    elif isinstance(value, (list, tuple)):
+        if len(value) <= 0x0f:
+            chunks.append(chr(0x90 | len(value)))
+        else:
+            chunks.append(struct.pack(">BI", 0xdd, len(value)))
+        for item in value:
+            _encodeMsgPack(item, chunks)
+    elif isinstance(value, dict):
+        if len(value) <= 0x0f:
+            chunks.append(chr(0x80 | len(value)))
+        else:
+            chunks.append(struct.pack(">BI", 0xdf, len(value)))
+        for key, item in value.iteritems():
+            _encodeMsgPack(key, chunks)
+            _encodeMsgPack(item, chunks)
+    else:
+        raise TypeError("Cannot encode value as MessagePack: %r" % value)
+
+
+def _encodeMsgPackString(data, chunks):
+    '''Append the MessagePack encoding of a UTF-8 string.'''
+    if len(data) <= 0x1f:
+        chunks.append(chr(0xa0 | len(data)))
+    else:
+        chunks.append(struct.pack(">BI", 0xdb, len(data)))
+    chunks.append(data)
+
+
+def _encodeCbor(value, chunks):
+    '''Append the CBOR encoding of a value to the list of chunks.'''
+    if value is None:
+        chunks.append("\xf6")
+    elif value is True:
+        chunks.append("\xf5")
+    elif value is False:
+        chunks.append("\xf4")
+    elif isinstance(value, (int, long)):
+        if value >= 0:
+            _encodeCborHead(0, value, chunks)
+        else:
+            _encodeCborHead(1, -1 - value, chunks)
+    elif isinstance(value, float):
+        chunks.append(struct.pack(">Bd", 0xfb, value))
+    elif isinstance(value, unicode):
+        data = value.encode("utf-8")
+        _encodeCborHead(3, len(data), chunks)
+        chunks.append(data)
+    elif isinstance(value, str):
+        _encodeCborHead(3, len(value), chunks)
+        chunks.append(value)
+    elif isinstance(value, (list, tuple)):
+        _encodeCborHead(4, len(value), chunks)
+        for item in value:
+            _encodeCbor(item, chunks)
+    elif isinstance(value, dict):
+        _encodeCborHead(5, len(value), chunks)
+        for key, item in value.iteritems():
+            _encodeCbor(key, chunks)
+            _encodeCbor(item, chunks)
+    else:
+        raise TypeError("Cannot encode value as CBOR: %r" % value)
+
+
+def _encodeCborHead(major, argument, chunks):
+    '''Append the head of a CBOR item with the given major type.'''
+    if argument < 24:
+        chunks.append(chr(major << 5 | argument))
+    elif argument <= 0xff:
+        chunks.append(struct.pack(">BB", major << 5 | 24, argument))
+    elif argument <= 0xffff:
+        chunks.append(struct.pack(">BH", major << 5 | 25, argument))
+    elif argument <= 0xffffffff:
+        chunks.append(struct.pack(">BI", major << 5 | 26, argument))
+    else:
+        chunks.append(struct.pack(">BQ", major << 5 | 27, argument))
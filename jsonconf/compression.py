@@ -0,0 +1,147 @@
+'''Support for reading compressed JSON configuration files.
+
+Compressed files are detected by their contents rather than their names.
+gzip files are always supported, xz files require the `lzma` module (or the
+`backports.lzma` package), and zstd files require the `zstandard` package.
+
+Compressed files are not decompressed incrementally: the decoder needs the
+whole text of a configuration, so a compressed file is decompressed
+entirely in memory when it is opened. Reading one needs memory for both the
+compressed data and the decompressed text.
+
+'''
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# The file name extensions of compressed JSON configuration files
+Extensions = (".gz", ".xz", ".zst")
+
+_GzipMagic = "\x1f\x8b"
+_XzMagic = "\xfd7zXZ\x00"
+_ZstdMagic = "\x28\xb5\x2f\xfd"
+
+
+def openFile(filename):
+    '''Open a JSON configuration file for reading. Files which are gzip, xz
+    or zstd compressed are decompressed entirely when they are opened.
+
+    The decoder needs all of the text of a configuration at once, so
+    decompressing it a chunk at a time would only add a copy of the
+    decompressed text while the chunks are joined. Instead the compressed
+    data is decompressed in a single call, and reading the whole file
+    returns the decompressed string itself rather than a copy.
+
+    :param filename: The path to the file
+    :rtype: file object
+
+    :raises IOError: If the file cannot be opened
+    :raises Exception: If the module needed to decompress the file is not
+                       installed
+
+    '''
+    fd = open(filename, 'rb')
+    try:
+        magic = fd.read(len(_XzMagic))
+        fd.seek(0)
+
+        if magic.startswith(_GzipMagic):
+            decompressor = _gzipDecompressor
+        elif magic.startswith(_XzMagic):
+            if lzma is None:
+                raise Exception("The lzma module is required to read xz "
+                                "compressed files: %s" % filename)
+            decompressor = lzma.LZMADecompressor
+        elif magic.startswith(_ZstdMagic):
+            if zstandard is None:
+                raise Exception("The zstandard module is required to read "
+                                "zstd compressed files: %s" % filename)
+            decompressor = zstandard.ZstdDecompressor().decompressobj
+        else:
+            return fd
+    except:
+        fd.close()
+        raise
+
+    try:
+        compressed = fd.read()
+    finally:
+        fd.close()
+
+    return _DecompressedFile(_decompress(compressed, decompressor))
+
+
+def _gzipDecompressor():
+    '''Create a decompressor for a gzip member.'''
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def _decompress(compressed, decompressor):
+    '''Decompress data which may contain several concatenated compressed
+    streams.
+
+    :param compressed: The compressed data
+    :param decompressor: The function which creates a decompressor for
+                         a compressed stream
+    :rtype: string
+
+    '''
+    chunks = []
+    while compressed:
+        stream = decompressor()
+        chunks.append(stream.decompress(compressed))
+        if hasattr(stream, "flush"):
+            chunks.append(stream.flush())
+        compressed = getattr(stream, "unused_data", "")
+
+    # A single stream is returned without being copied
+    chunks = [chunk for chunk in chunks if chunk]
+    return chunks[0] if len(chunks) == 1 else "".join(chunks)
+
+
+class _DecompressedFile:
+    '''A read only file object holding decompressed data.'''
+
+    def __init__(self, data):
+        '''
+        :param data: The decompressed data
+
+        '''
+        self.__data = data
+        self.__offset = 0
+
+    def read(self, size=-1):
+        '''Read decompressed data. Reading all of the data at once returns
+        it without a copy, and releases it.
+
+        :param size: The maximum number of bytes to read, or -1 to read
+                     until the end of the file
+        :rtype: string
+
+        '''
+        if size < 0 or self.__offset + size >= len(self.__data):
+            data = self.__data[self.__offset:]
+            self.__data = ""
+            self.__offset = 0
+            return data
+
+        data = self.__data[self.__offset:self.__offset + size]
+        self.__offset += size
+        return data
+
+    def close(self):
+        '''Release the decompressed data.'''
+        self.__data = ""
+        self.__offset = 0
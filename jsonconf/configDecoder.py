@@ -0,0 +1,249 @@
+import json
+
+from binaryFormats import decodeCbor, decodeMsgPack, detectFormat
+
+
+class ConfigDecoder:
+    '''The ConfigDecoder class decodes JSON configuration data and verifies
+    the keys of every JSON object while it is being decoded.
+
+    The JSON configuration is forced not to use delimiters within keys, as
+    it is easier to maintain sub objects, and JSON objects must not contain
+    duplicate keys. Both rules are checked at every depth of the
+    configuration in the same pass that decodes it, rather than by walking
+    the decoded data a second time.
+
+    Errors report the full path to each offending key. For example, the
+    following JSON::
+
+        {
+            "services": {
+                "payments": {
+                    "db.host": "localhost"
+                }
+            }
+        }
+
+    Is reported as::
+
+        Config file keys must not contain the '.' key. Please use JSON
+        objects instead: services.payments.db.host
+
+    When an include function is given, objects may contain an "$include"
+    key naming one, or a list of, JSON fragment files. The contents of the
+    included fragments are merged into the object, and keys specified by
+    the object itself take precedence. For example::
+
+        {
+            "$include": "common/db.json",
+            "port": 5433
+        }
+
+    Configuration data may also be encoded as MessagePack or CBOR (see
+    :mod:`jsonconf.binaryFormats`), in which case the same rules apply to
+    the decoded maps, and every map key must be a string.
+
+    '''
+    __IncludeKey = "$include"
+
+    def __init__(self, delimiter='.', include=None):
+        '''
+        :param delimiter: The delimiter used to access sub keys
+        :param include: The optional function used to load included
+                        fragments, which must have the following
+                        signature and return a dictionary::
+
+                            include(name)
+
+        '''
+        self.__delimiter = delimiter
+        self.__include = include
+
+        # Map ids of decoded objects to the errors found within them
+        self.__errors = {}
+
+    def load(self, fd, format=None):
+        '''Decode the configuration data contained in a file.
+
+        :param fd: The file object
+        :param format: The format of the data: json, msgpack, or cbor. The
+                       format is detected from the data when not given.
+        :rtype: The decoded data
+
+        :raises ValueError: If the file contains invalid data
+        :raises Exception: If any object key contains the delimiter, or if
+                           any object contains duplicate keys
+
+        '''
+        return self.loads(fd.read(), format)
+
+    def loads(self, text, format=None):
+        '''Decode the given configuration string.
+
+        :param text: The JSON, MessagePack or CBOR string
+        :param format: The format of the data: json, msgpack, or cbor. The
+                       format is detected from the data when not given.
+        :rtype: The decoded data
+
+        :raises ValueError: If the string contains invalid data
+        :raises Exception: If any object key contains the delimiter, or if
+                           any object contains duplicate keys
+
+        '''
+        if format is None:
+            format = detectFormat(text)
+
+        self.__errors = {}
+        try:
+            if format == "json":
+                data = json.loads(text,
+                                  object_pairs_hook=self.objectPairsHook)
+            elif format == "msgpack":
+                data = decodeMsgPack(text, self.__binaryPairsHook)
+            elif format == "cbor":
+                data = decodeCbor(text, self.__binaryPairsHook)
+            else:
+                raise Exception("Unsupported configuration format: %s" %
+                                format)
+            errors = self.__collectErrors(data)
+        finally:
+            self.__errors = {}
+
+        if len(errors) > 0:
+            raise Exception(self.__formatErrors(errors))
+
+        return data
+
+    def objectPairsHook(self, pairs):
+        '''Create the dictionary for a decoded JSON object, verifying its
+        keys. This is used as the `object_pairs_hook` of the JSON decoder.
+
+        :param pairs: The list of decoded (key, value) pairs
+        :rtype: A dictionary
+
+        '''
+        data = dict(pairs)
+
+        errors = None
+
+        # Check all keys at once, and only examine them individually when
+        # the combined check finds a possible problem
+        if self.__delimiter in "".join(data):
+            errors = [((key,), "delimiter") for key in data
+                      if self.__delimiter in key]
+
+        if len(data) != len(pairs):
+            errors = [] if errors is None else errors
+            seen = set()
+            for key, value in pairs:
+                if key in seen:
+                    errors.append(((key,), "duplicate"))
+                seen.add(key)
+
+        # Gather any errors found within the values of this object
+        if len(self.__errors) > 0:
+            for key, value in pairs:
+                childErrors = self.__collectErrors(value)
+                if len(childErrors) > 0:
+                    errors = [] if errors is None else errors
+                    errors.extend(((key,) + path, kind)
+                                  for path, kind in childErrors)
+
+        if self.__include is not None and self.__IncludeKey in data:
+            data = self.__includeFragments(data)
+
+        if errors:
+            self.__errors[id(data)] = errors
+
+        return data
+
+    ##### Private functions
+
+    def __binaryPairsHook(self, pairs):
+        '''Create the dictionary for a decoded MessagePack or CBOR map,
+        whose keys, unlike those of JSON objects, may not be strings.
+
+        :param pairs: The list of decoded (key, value) pairs
+        :rtype: A dictionary
+
+        :raises ValueError: If any key is not a string
+
+        '''
+        for key, _ in pairs:
+            if not isinstance(key, basestring):
+                raise ValueError("Config file keys must be strings: %r" %
+                                 (key,))
+        return self.objectPairsHook(pairs)
+
+    def __collectErrors(self, value):
+        '''Remove and return the errors found within the given value.
+
+        :param value: The decoded value
+        :rtype: list of (path, kind) tuples
+
+        '''
+        if type(value) == type(dict()):
+            return self.__errors.pop(id(value), [])
+        elif type(value) == type(list()) and len(self.__errors) > 0:
+            errors = []
+            for index, item in enumerate(value):
+                for path, kind in self.__collectErrors(item):
+                    errors.append((("[%d]" % index,) + path, kind))
+            return errors
+        return []
+
+    def __includeFragments(self, data):
+        '''Merge the fragments included by an object into the object.
+
+        :param data: The object dictionary
+        :rtype: The merged dictionary
+
+        :raises Exception: If the included names are invalid
+
+        '''
+        names = data.pop(self.__IncludeKey)
+        if isinstance(names, basestring):
+            names = [names]
+        elif type(names) != type(list()) or \
+                not all(isinstance(name, basestring) for name in names):
+            raise Exception("Invalid %s value: %s" %
+                            (self.__IncludeKey, names))
+
+        merged = {}
+        for name in names:
+            merged.update(self.__include(name))
+        merged.update(data)
+
+        return merged
+
+    def __formatErrors(self, errors):
+        '''Create the error message for the given errors.
+
+        :param errors: The list of (path, kind) tuples
+        :rtype: string
+
+        '''
+        delimited = []
+        duplicates = []
+        for path, kind in errors:
+            key = path[0]
+            for part in path[1:]:
+                if part.startswith("["):
+                    key += part
+                else:
+                    key += self.__delimiter + part
+            if kind == "delimiter":
+                delimited.append(key)
+            else:
+                duplicates.append(key)
+
+        messages = []
+        if len(delimited) > 0:
+            messages.append("Config file keys must not contain the '%s' "
+                            "key. Please use JSON objects instead: %s" %
+                            (self.__delimiter, ", ".join(delimited)))
+        if len(duplicates) > 0:
+            messages.append("Duplicate config file keys: %s" %
+                            ", ".join(duplicates))
+
+        return "\n".join(messages)
@@ -1,5 +1,38 @@
+import gc
 import json
-from os.path import exists
+import marshal
+from hashlib import sha1
+from itertools import chain
+from glob import glob
+from multiprocessing import Pool, cpu_count
+from os import stat
+from os.path import abspath, basename, dirname, exists, isdir, join, \
+    splitext
+from StringIO import StringIO
+from threading import Thread
+from time import time
+
+from binaryFormats import Formats
+from compression import Extensions, openFile
+from configDecoder import ConfigDecoder
+from configProxy import ConfigProxy, ProxyBindings
+from configSource import ConfigSource, FileSource
+from fragmentCache import fragments
+from instrumentation import Instrumentation
+from interpolation import Interpolator
+from keyAudit import KeyAudit
+from keyIndex import KeyIndex
+from packedData import PackedData
+from pathQuery import PathQuery
+from schemaValidator import SchemaValidator, compileSchema
+from units import parseBool, parseDuration, parseFloat, parseInt, parseSize
+
+
+# Marks keys which do not exist
+_Missing = object()
+
+# The types of JSON objects and lists
+_ContainerTypes = frozenset([type(dict()), type(list())])
 
 
 class ConfigFile:
@@ -31,7 +64,39 @@ class ConfigFile:
 
     Sub keys can be accessed by separating a set of keys by a delimiter.
 
+    When interpolation is enabled, string values can reference the values of
+    other keys using the ${key} syntax (see :class:`jsonconf.Interpolator`).
+
+    Objects within the configuration may include shared JSON fragment
+    files using the "$include" key (see :class:`jsonconf.ConfigDecoder`).
+    Each fragment is parsed once per process, and its data is shared by
+    every configuration which includes it.
+
+    The configuration can also be split across a directory of JSON fragment
+    files (or a glob pattern matching them), in which case each fragment is
+    stored under a key named after its file. For example, a directory
+    containing 'payments.json' and 'billing.json' produces a configuration
+    with the 'payments' and 'billing' keys.
+
     '''
+    # The minimum number of fragments worth parsing with a process pool
+    __MinParallelFragments = 32
+
+    # The number of characters buffered before writing dumped data
+    __DumpChunkSize = 65536
+
+    # The maximum number of values in a JSON object, or list, which is
+    # dumped in a single piece when it contains no other objects or lists
+    __DumpFlatItems = 1000
+
+    # The maximum number of compiled keys remembered
+    __MaxCompiledKeys = 10000
+
+    # The maximum number of converted values remembered
+    __MaxConversions = 10000
+
+    # The maximum number of compiled queries, and their results, remembered
+    __MaxQueries = 1000
 
     def __init__(self, delimiter='.'):
         '''
@@ -40,6 +105,67 @@ class ConfigFile:
         '''
         self.__delimiter = delimiter
         self.__data = {}
+        self.__filename = None
+        self.__stamp = None
+        self.__includes = []
+        self.__workers = None
+        self.__shared = False
+        self.__sources = None
+        self.__instrumentation = None
+        self.__keyAudit = None
+        self.__interpolator = None
+
+        # Map delimited keys to the values which override the parsed data
+        self.__overrides = {}
+
+        # Map the ancestors of all overridden keys to the number of
+        # overridden keys beneath them
+        self.__overridePrefixes = {}
+
+        # The parsed data merged with the overrides, which is created when
+        # first needed, and the ids of the objects copied to create it
+        self.__merged = None
+        self.__mergedIds = set()
+
+        # Whether the configuration is frozen, and its packed data, if it
+        # has been packed (see freeze)
+        self.__frozen = False
+        self.__packed = None
+
+        # Map ids of objects to tuples of (object, fingerprint)
+        self.__fingerprints = {}
+
+        # Map delimited keys to their tuple of sub keys
+        self.__compiledKeys = {}
+
+        # Map (converter, type, value) tuples to converted values
+        self.__conversions = {}
+
+        # Map converted keys to their values before they were converted,
+        # with references unresolved, and map the ancestors of converted
+        # keys to the set of converted keys beneath them
+        self.__rawValues = {}
+        self.__rawPrefixes = {}
+
+        # Map (parser, key) tuples to typed values
+        self.__typedValues = {}
+
+        # Map query patterns to their compiled PathQuery
+        self.__queries = {}
+
+        # Map query patterns to tuples of (generation, results)
+        self.__queryResults = {}
+
+        # The tuple of (generation, KeyIndex) used to suggest keys
+        self.__keyIndex = None
+
+        # Incremented whenever the configuration data changes
+        self.__generation = 0
+
+        # The root proxy, and the values bound to the attributes of all
+        # proxies, which are discarded whenever the generation changes
+        self.__proxy = None
+        self.__proxyBindings = None
 
     def delimiter(self):
         '''The delimiter used by this configuration.
@@ -49,15 +175,280 @@ class ConfigFile:
         '''
         return self.__delimiter
 
-    def parse(self, filename):
-        '''Parse the given JSON configuration file.
-
-        :param filename: The path to the JSON configuration file
+    def parse(self, filename, workers=None, shared=False):
+        '''Parse the given JSON configuration file. Any updates made to the
+        previously parsed configuration are discarded.
+
+        The filename may also be a directory, or a glob pattern, naming a
+        set of JSON fragment files. Large sets of fragments are parsed in
+        parallel using a pool of worker processes, while small sets are
+        parsed sequentially in this process.
+
+        JSON configuration files, fragments and included files may be gzip,
+        xz or zstd compressed (see :mod:`jsonconf.compression`), and are
+        decompressed while they are read.
+
+        Configuration data may also be loaded from a
+        :class:`jsonconf.ConfigSource`, or a list of sources and filenames.
+        The sources in a list are fetched concurrently, and merged in order,
+        so values from later sources override those from earlier ones.
+
+        The parsed data is never modified, since updates are kept separately
+        (see :func:`jsonconf.ConfigFile.updateData`). A shared JSON
+        configuration file is parsed through the process wide
+        :class:`jsonconf.FragmentCache`, so every configuration which parses
+        the same unchanged file shares a single copy of its data.
+
+        :param filename: The path to the JSON configuration file, directory
+                         or glob pattern, or the sources
+        :param workers: The number of worker processes used to parse
+                        fragments, defaults to the number of CPUs
+        :param shared: True to share the parsed data of a JSON configuration
+                       file with other configurations
 
         '''
+        if self.__instrumentation is not None:
+            start = time()
+
         if filename is not None:
-            self.__data = self.__parse(filename)
-        self.__verifyKeys(self.__data)
+            self.__workers = workers
+            self.__shared = shared
+            self.__includes = []
+            self.__sources = None
+            if not isinstance(filename, basestring):
+                self.__sources = self.__toSources(filename)
+                self.__data = self.__loadSources(self.__sources)
+            elif self.__isFragmentPattern(filename):
+                self.__data = self.__parseFragments(filename, workers)
+            elif shared:
+                self.__data = self.__parseSharedFile(filename, self.__includes)
+            else:
+                self.__data = self.__parseFile(filename, (), self.__includes)
+            self.__filename = filename if self.__sources is None \
+                else self.__sources
+            self.__stamp = self.__currentStamp()
+            self.__overrides = {}
+            self.__overridePrefixes = {}
+            self.__discardMerged()
+            self.__frozen = False
+            self.__packed = None
+            self.__fingerprints = {}
+            self.__typedValues = {}
+            self.__rawValues = {}
+            self.__rawPrefixes = {}
+            self.__changed()
+            self.__scanReferences()
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordTime("parse", time() - start)
+
+    def enableInstrumentation(self, sampleInterval=1):
+        '''Start collecting statistics about the usage of this
+        configuration. Instrumentation is disabled by default, and has
+        no effect on performance while disabled.
+
+        :param sampleInterval: Record one out of every `sampleInterval`
+                               key accesses
+        :rtype: The :class:`jsonconf.Instrumentation` object
+
+        '''
+        self.__instrumentation = Instrumentation(sampleInterval)
+        return self.__instrumentation
+
+    def disableInstrumentation(self):
+        '''Stop collecting statistics about the usage of this
+        configuration.
+
+        '''
+        self.__instrumentation = None
+
+    def instrumentation(self):
+        '''The statistics collected about the usage of this configuration.
+
+        :rtype: The :class:`jsonconf.Instrumentation` object, or None if
+                instrumentation is disabled
+
+        '''
+        return self.__instrumentation
+
+    def enableStrictMode(self):
+        '''Start recording the keys read from this configuration, and the
+        keys read which do not exist (see :class:`jsonconf.KeyAudit`).
+        Strict mode is disabled by default.
+
+        :rtype: The :class:`jsonconf.KeyAudit` object
+
+        '''
+        self.__keyAudit = KeyAudit()
+        return self.__keyAudit
+
+    def disableStrictMode(self):
+        '''Stop recording the keys read from this configuration.'''
+        self.__keyAudit = None
+
+    def keyAudit(self):
+        '''The keys recorded in strict mode.
+
+        :rtype: The :class:`jsonconf.KeyAudit` object, or None if strict
+                mode is disabled
+
+        '''
+        return self.__keyAudit
+
+    def enableInterpolation(self, enabled=True):
+        '''Enable, or disable, the interpolation of ${key} references
+        contained in string values. Interpolation is disabled by default.
+
+        :param enabled: True to enable interpolation
+
+        :raises Exception: If a reference cycle exists
+
+        '''
+        if enabled:
+            self.__interpolator = Interpolator(self.__delimiter)
+            self.__scanReferences()
+        else:
+            self.__interpolator = None
+        self.__changed()
+
+    def isInterpolationEnabled(self):
+        '''Determine if ${key} references are interpolated.
+
+        :rtype: bool
+
+        '''
+        return self.__interpolator is not None
+
+    def generation(self):
+        '''A number which changes whenever the configuration data changes,
+        which allows values derived from the configuration to be cached.
+
+        :rtype: int
+
+        '''
+        return self.__generation
+
+    def proxy(self):
+        '''Get a proxy which provides attribute style access to the
+        configuration values (see :class:`jsonconf.ConfigProxy`)::
+
+            config.proxy().services.payments.db.host
+
+        :rtype: :class:`jsonconf.ConfigProxy`
+
+        '''
+        if self.__proxy is None:
+            self.__proxyBindings = ProxyBindings()
+            self.__proxy = ConfigProxy(self, None, self.__proxyBindings)
+        return self.__proxy
+
+    def filename(self):
+        '''The path to the most recently parsed JSON configuration file, or
+        the list of sources.
+
+        :rtype: string, list of :class:`jsonconf.ConfigSource`, or None if
+                no file has been parsed
+
+        '''
+        return self.__filename
+
+    def isModified(self):
+        '''Determine if the most recently parsed JSON configuration file,
+        or any of the sources, has changed since it was parsed.
+
+        :rtype: bool
+
+        '''
+        if self.__filename is None:
+            return False
+        elif self.__sources is not None:
+            return any(source.isModified() for source in self.__sources)
+        return self.__currentStamp() != self.__stamp
+
+    def overlay(self, keyValueMap=None, interpolation=True):
+        '''Create a configuration which shares the data of this
+        configuration, including its current updates, and applies the given
+        updates on top of it. The shared data is not copied, and is not
+        modified by either configuration.
+
+        The new configuration does not follow later changes to this
+        configuration, and cannot be reloaded.
+
+        :param keyValueMap: The optional dictionary mapping keys to values
+        :param interpolation: False to leave interpolation disabled in the
+                              new configuration, which avoids scanning all
+                              of the data for references
+
+        :rtype: :class:`jsonconf.ConfigFile`
+
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+
+        '''
+        config = ConfigFile(self.__delimiter)
+        config.__data = self.__view()
+        config.__conversions = self.__conversions
+        if interpolation and self.__interpolator is not None:
+            config.enableInterpolation()
+        if keyValueMap is not None:
+            config.updateData(keyValueMap)
+        return config
+
+    def reload(self, prepare=None):
+        '''Re-parse the most recently parsed JSON configuration file.
+
+        The file is read and decoded into a separate configuration which
+        is swapped in only once it is complete, so readers never observe
+        a partially loaded configuration.
+
+        The optional prepare function is called with the staged
+        :class:`jsonconf.ConfigFile` before it is swapped in, which allows
+        overrides and conversions to be applied first. It must have the
+        following signature::
+
+            prepare(configFile)
+
+        :param prepare: The optional function used to prepare the staged
+                        configuration
+
+        :rtype: list of delimited keys whose values changed
+
+        :raises Exception: If no configuration file has been parsed
+        :raises Exception: If the configuration is frozen
+
+        '''
+        if self.__filename is None:
+            raise Exception("No configuration file has been parsed")
+        if self.__frozen:
+            raise Exception("Cannot reload a frozen configuration")
+
+        staged = ConfigFile(self.__delimiter)
+        staged.__instrumentation = self.__instrumentation
+        staged.__keyAudit = self.__keyAudit
+        staged.__conversions = self.__conversions
+        if self.__interpolator is not None:
+            staged.__interpolator = Interpolator(self.__delimiter)
+        staged.parse(self.__filename, self.__workers, self.__shared)
+        if prepare is not None:
+            prepare(staged)
+
+        changed = []
+        self.__diff(self.__view(), staged.__view(), None, changed)
+
+        self.__data = staged.__data
+        self.__overrides = staged.__overrides
+        self.__overridePrefixes = staged.__overridePrefixes
+        self.__rawValues = staged.__rawValues
+        self.__rawPrefixes = staged.__rawPrefixes
+        self.__discardMerged()
+        self.__stamp = staged.__stamp
+        self.__includes = staged.__includes
+        self.__fingerprints = {}
+        self.__typedValues = {}
+        self.__changed()
+        self.__interpolator = staged.__interpolator
+
+        return changed
 
     def keys(self):
         '''Return the list of keys specified in this configuration.
@@ -65,16 +456,65 @@ class ConfigFile:
         :rtype: list of strings
 
         '''
-        return self.__data.keys()
+        return self.__view().keys()
+
+    def iterItems(self, prefix=None, maxDepth=None, sort=False):
+        '''Iterate over the delimited keys, and values, of every leaf of the
+        configuration, or of the JSON object specified by the given prefix.
+        Empty JSON objects are leaves, and JSON objects nested deeper than
+        the depth limit are produced as values::
+
+            for key, value in config.iterItems("services", maxDepth=2):
+                ...
+
+        The configuration is walked one JSON object at a time, so no list of
+        keys is built however large the configuration is. References are
+        resolved when interpolation is enabled.
+
+        :param prefix: The delimited key of the JSON object to iterate, or
+                       None for the entire configuration
+        :param maxDepth: The optional number of levels beneath the prefix
+                         to descend into
+        :param sort: True to produce keys in sorted order
+
+        :rtype: generator of (key, value) tuples
+
+        '''
+        data = self.__view() if prefix is None else self.__lookup(prefix)
+        if data is _Missing:
+            return
+
+        for key, value in self.__walk(data, prefix, maxDepth, sort):
+            if self.__interpolator is not None:
+                value = self.__interpolator.resolve(key, value,
+                                                    self.__referencedValue)
+            yield key, value
+
+    def flatten(self, prefix=None, maxDepth=None):
+        '''Get the leaves of the configuration, or of the JSON object
+        specified by the given prefix, as a dictionary mapping delimited
+        keys to values (see :func:`jsonconf.ConfigFile.iterItems`). The
+        result can be passed to :func:`jsonconf.ConfigFile.updateData`.
+
+        :param prefix: The delimited key of the JSON object to flatten, or
+                       None for the entire configuration
+        :param maxDepth: The optional number of levels beneath the prefix
+                         to descend into
+
+        :rtype: dictionary
+
+        '''
+        return dict(self.iterItems(prefix, maxDepth))
 
     def hasKey(self, key):
         '''Determine if the given key is specified in this configuration.
+        Keys which are specified with a null value exist.
 
         :param key: The key
         :rtype: bool
 
         '''
-        return self.get(key) is not None
+        return self.__lookup(key) is not _Missing
 
     def get(self, key, default=None):
         '''Get the value specified by the given key.
@@ -85,27 +525,173 @@ class ConfigFile:
         :returns: The configuration value for the given key
 
         '''
-        keyParts = key.split(self.__delimiter)
+        return self.getWithPresence(key, default)[1]
 
-        data = self.__data
-        for subKey in keyParts:
-            if type(data) == type(dict()) and subKey in data:
-                data = data.get(subKey)
-            else:
-                return default
+    def getWithPresence(self, key, default=None):
+        '''Get the value specified by the given key, and whether the key
+        exists. This distinguishes keys specified with a null value from
+        keys which do not exist, without looking up the key twice::
 
-        return data
+            found, value = config.getWithPresence("one.two")
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: tuple of (bool, value)
+
+        '''
+        data = self.__lookup(key)
+        if data is _Missing:
+            if self.__instrumentation is not None:
+                self.__instrumentation.recordAccess(key, False)
+            if self.__keyAudit is not None:
+                self.__keyAudit.recordRead(key, False)
+            return False, default
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordAccess(key, True)
+        if self.__keyAudit is not None:
+            self.__keyAudit.recordRead(key, True)
+
+        if self.__interpolator is not None:
+            data = self.__interpolator.resolve(key, data,
+                                               self.__referencedValue)
+
+        return True, data
+
+    def peekWithPresence(self, key, default=None):
+        '''Get the value specified by the given key, and whether the key
+        exists, like :func:`jsonconf.ConfigFile.getWithPresence`, without
+        recording the read by instrumentation or in strict mode. This is
+        meant for reads made on behalf of the program rather than by it,
+        such as finding the keys whose values an update changed.
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: tuple of (bool, value)
+
+        '''
+        value = self.__resolvedValue(key)
+        if value is _Missing:
+            return False, default
+        return True, value
+
+    def getInt(self, key, default=None):
+        '''Get the value specified by the given key as an integer.
+
+        Values are converted once, and the converted value is remembered
+        until the configuration changes. Keys which do not exist, or have
+        a null value, produce the default value.
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: int
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        return self.__getTyped(key, default, parseInt)
+
+    def getFloat(self, key, default=None):
+        '''Get the value specified by the given key as a float
+        (see :func:`jsonconf.ConfigFile.getInt`).
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: float
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        return self.__getTyped(key, default, parseFloat)
+
+    def getBool(self, key, default=None):
+        '''Get the value specified by the given key as a boolean
+        (see :func:`jsonconf.ConfigFile.getInt`). Strings such as "true",
+        "no", "on", and "0" are accepted (see :func:`jsonconf.parseBool`).
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: bool
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        return self.__getTyped(key, default, parseBool)
+
+    def getDuration(self, key, default=None):
+        '''Get the value specified by the given key as a number of seconds
+        (see :func:`jsonconf.ConfigFile.getInt`). Strings such as "30s",
+        "250ms", and "1h30m" are accepted (see
+        :func:`jsonconf.parseDuration`).
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: float
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        return self.__getTyped(key, default, parseDuration)
+
+    def getSize(self, key, default=None):
+        '''Get the value specified by the given key as a number of bytes
+        (see :func:`jsonconf.ConfigFile.getInt`). Strings such as "512MB"
+        and "4KiB" are accepted (see :func:`jsonconf.parseSize`).
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :rtype: int
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        return self.__getTyped(key, default, parseSize)
 
     def updateData(self, keyValueMap):
         '''Update the current configuration values with the given
         dictionary values.
 
+        Updates are kept in a flat dictionary of overrides which is checked
+        before the parsed data, so the parsed data itself is never modified
+        and may be shared by many configurations. Overridden keys are merged
+        into a copy of the JSON objects containing them only when those
+        objects are accessed.
+
         :param keyValueMap: Dictionary mapping keys to values
 
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+
         '''
+        if self.__instrumentation is not None:
+            start = time()
+
         # Update all of the data with the given key value pairs
         for key, value in keyValueMap.iteritems():
-            self.__setKeyValue(self.__data, key, value)
+            self.__set(key, value)
+            if len(self.__rawValues) > 0:
+                self.__updateRawValues(key, value)
+
+        if self.__interpolator is not None:
+            self.__interpolator.checkCycles()
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordTime("updateData", time() - start)
+
+    def overrides(self):
+        '''Get the updates made to the parsed configuration.
+
+        :rtype: dictionary mapping delimited keys to values
+
+        '''
+        return dict(self.__overrides)
 
     def requireKeys(self, requiredKeys):
         '''Require that the given list of keys are specified.
@@ -114,11 +700,109 @@ class ConfigFile:
         :raises Exception: If one of the required keys is not specified
 
         '''
+        if self.__instrumentation is not None:
+            start = time()
+
         # Ensure all required keys exist
         for key in requiredKeys:
             if not self.hasKey(key):
                 raise Exception("Required key was not specified: %s" % key)
 
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordTime("requireKeys", time() - start)
+
+    def referencingKeys(self, keys):
+        '''Get the given keys, and, when interpolation is enabled, the keys
+        whose values reference them, directly or through other references.
+        The values of all of these keys change when the given keys change.
+
+        :param keys: The delimited keys
+        :rtype: set of keys
+
+        '''
+        if self.__interpolator is None:
+            return set(keys)
+        return self.__interpolator.dependents(keys)
+
+    def validateSchema(self, schema):
+        '''Validate the configuration, including all updates, against a
+        JSON Schema document (see :class:`jsonconf.SchemaValidator`).
+        References are resolved first when interpolation is enabled.
+
+        :param schema: The JSON Schema document, or a compiled
+                       :class:`jsonconf.SchemaValidator`
+
+        :raises Exception: If the schema is invalid
+        :raises Exception: If the configuration does not match the schema,
+                           listing every error
+
+        '''
+        if self.__instrumentation is not None:
+            start = time()
+
+        validator = schema if isinstance(schema, SchemaValidator) \
+            else compileSchema(schema)
+        errors = validator.validate(self.__resolvedData(), self.__delimiter)
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordTime("validateSchema",
+                                              time() - start)
+
+        if len(errors) > 0:
+            lines = ["Configuration does not match the schema:"]
+            for key, message in errors:
+                lines.append("    %s: %s" % (key, message) if key is not None
+                             else "    %s" % message)
+            raise Exception("\n".join(lines))
+
+    def suggestKeys(self, key, maxDistance=2, limit=3):
+        '''Find the existing keys nearest to a key which may be misspelled
+        (see :class:`jsonconf.KeyIndex`). The index of the keys is built
+        when first needed, and again after the configuration changes.
+
+        :param key: The delimited key
+        :param maxDistance: The maximum total edit distance of a suggestion
+        :param limit: The maximum number of suggestions
+
+        :rtype: list of delimited keys, nearest first
+
+        '''
+        generation = self.__generation
+        if self.__keyIndex is None or self.__keyIndex[0] != generation:
+            self.__keyIndex = (generation,
+                               KeyIndex(self.__view(), self.__delimiter))
+        return self.__keyIndex[1].suggest(key, maxDistance, limit)
+
+    def checkKeys(self):
+        '''Check that no unknown keys were recorded in strict mode, and
+        suggest the existing keys they may have been meant to be (see
+        :func:`jsonconf.ConfigFile.enableStrictMode`). Keys which were read
+        are not reported if they have been set since.
+
+        :raises Exception: If strict mode is disabled
+        :raises Exception: If any unknown keys were recorded, listing every
+                           one of them
+
+        '''
+        if self.__keyAudit is None:
+            raise Exception("Strict mode is not enabled")
+
+        lines = []
+        for key, source in self.__keyAudit.unknownKeys():
+            if source == KeyAudit.Read and \
+                    self.__lookup(key) is not _Missing:
+                continue
+
+            line = "    %s (%s)" % (key, source)
+            suggestions = self.suggestKeys(key)
+            if len(suggestions) > 0:
+                line += ", did you mean: %s" % ", ".join(suggestions)
+            lines.append(line)
+
+        if len(lines) > 0:
+            raise Exception("\n".join(["Unknown configuration keys:"] +
+                                       lines))
+
     def convertKeys(self, converterMap):
         '''Convert all of keys using conversion functions as specified in the
         given dictionary of key, function pairs.
@@ -127,22 +811,256 @@ class ConfigFile:
 
             conversionFunction(value)
 
+        Converted values replace the original values, so subsequent calls to
+        :func:`jsonconf.ConfigFile.get` return the converted values. Keys
+        which do not exist are not converted. The keys containing other
+        keys are converted first.
+
+        The original value of a converted key is remembered, and a key
+        which is converted again is converted from its original value,
+        rather than from its converted value, until the key, or a key
+        beneath it, is updated. When interpolation is enabled, the
+        references of the original value are kept, so a key converted
+        again after a key it references changes is converted from the
+        new value of the reference.
+
+        Reading the values to convert is not recorded by instrumentation,
+        or in strict mode, since the keys are not being used by the program.
+
+        Conversion functions are expected to always produce the same result
+        for the same value. The results of converting hashable values are
+        remembered, and reused when the same conversion function is applied
+        to an equal value for another key, or after the configuration is
+        reloaded.
+
         :param converterMap: A dictionary mapping keys to conversion functions
 
         :raises Exception: If a conversion function causes an error
 
         '''
-        # Attempt to convert all of the keys
+        if self.__instrumentation is not None:
+            start = time()
+
+        # Attempt to convert all of the keys, containing keys first
+        delimiter = self.__delimiter
+        depths = {}
         for key, converter in converterMap.iteritems():
-            value = self.get(key, None)
             if converter is not None:
-                try:
-                    converted = converter(value)
-                except Exception, e:
-                    msg = "Failed to convert key: %s\n%s" % (key, e)
-                    raise Exception(msg)
-                else:
-                    self.__data[key] = value
+                depths.setdefault(key.count(delimiter), []).append(key)
+
+        for key in chain.from_iterable(depths[depth]
+                                       for depth in sorted(depths)):
+            converter = converterMap[key]
+
+            raw = self.__rawValues.get(key, _Missing)
+            remembered = raw is not _Missing
+            if not remembered:
+                raw = self.__lookup(key)
+                if raw is _Missing:
+                    continue
+
+            value = raw
+            if self.__interpolator is not None:
+                value = self.__interpolator.resolveValue(
+                    key, raw, self.__referencedValue)
+
+            try:
+                converted = self.__convert(converter, value)
+            except Exception, e:
+                msg = "Failed to convert key: %s\n%s" % (key, e)
+                raise Exception(msg)
+
+            # The keys beneath the key are replaced by the converted value
+            self.__set(key, converted)
+            if key in self.__rawPrefixes:
+                self.__discardRawValues(key)
+                remembered = False
+            if not remembered:
+                self.__setRawValue(key, raw)
+            if self.__interpolator is not None:
+                self.__interpolator.update(key, raw)
+
+        if self.__interpolator is not None:
+            self.__interpolator.checkCycles()
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.recordTime("convertKeys", time() - start)
+
+    def freeze(self, packed=False):
+        '''Freeze the configuration before forking worker processes, so the
+        children keep sharing its memory with the parent rather than each
+        copying it.
+
+        A frozen configuration cannot be updated or reloaded until it is
+        parsed again. The merged data is created before freezing, so no
+        lookup needs to create it, and a full garbage collection is run so
+        that the configuration is left in the oldest generation. Where
+        `gc.freeze` is available (Python 3.7 and later) the objects are then
+        moved to the permanent generation, which collections in the children
+        never visit.
+
+        Looking up a value still changes the reference counts of the objects
+        along its key, which copies the pages holding them into the child.
+        A packed configuration instead keeps its data in a few flat buffers
+        which lookups never write to (see :class:`jsonconf.PackedData`), at
+        the cost of decoding the value of a key each time it is looked up.
+        References are resolved, and interpolation disabled, before packing.
+
+        :param packed: True to pack the configuration data
+
+        :raises Exception: If the configuration is packed, and contains
+                           values which are not JSON values
+
+        '''
+        if packed:
+            self.__packed = PackedData(self.__resolvedData(), self.__delimiter)
+            self.__data = {}
+            self.__overrides = {}
+            self.__overridePrefixes = {}
+            self.__discardMerged()
+            self.__fingerprints = {}
+            self.__typedValues = {}
+            self.__compiledKeys = {}
+            self.__interpolator = None
+        else:
+            self.__view()
+
+        self.__frozen = True
+        self.__changed()
+
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    def isFrozen(self):
+        '''Determine if the configuration is frozen (see
+        :func:`jsonconf.ConfigFile.freeze`).
+
+        :rtype: bool
+
+        '''
+        return self.__frozen
+
+    def fingerprint(self, key=None):
+        '''Get a content hash of the value of the given key, or of the
+        entire configuration.
+
+        Fingerprints form a Merkle tree: the fingerprint of a JSON object
+        is computed from the fingerprints of its values, and is cached until
+        one of its sub keys is updated. Comparing the fingerprints of the
+        same key across reloads, or across hosts, quickly determines whether
+        anything within it changed. Equal values have equal fingerprints
+        regardless of the order of their keys. References are fingerprinted
+        as written, rather than as resolved.
+
+        :param key: The key, or None for the entire configuration
+        :rtype: hexadecimal string, or None if the key does not exist
+
+        '''
+        value = self.__view() if key is None else self.__lookup(key)
+        if value is _Missing:
+            return None
+        return self.__fingerprint(value)
+
+    def query(self, pattern):
+        '''Find all of the values whose keys match the given pattern (see
+        :class:`jsonconf.PathQuery` for the pattern syntax)::
+
+            for key, size in config.query("services.*.db.pool_size"):
+                ...
+
+        Values are produced in key order, with references resolved when
+        interpolation is enabled. Only the values which the pattern visits
+        are resolved, rather than the entire configuration. The results of
+        a completed query are remembered until the configuration changes,
+        so repeating a query against an unchanged configuration does not
+        walk the data again.
+
+        :param pattern: The key path pattern
+        :rtype: generator of (key, value) tuples
+
+        :raises Exception: If the pattern is invalid
+
+        '''
+        generation = self.__generation
+        cached = self.__queryResults.get(pattern)
+        if cached is not None and cached[0] == generation:
+            return iter(cached[1])
+
+        compiled = self.__queries.get(pattern)
+        if compiled is None:
+            if len(self.__queries) >= self.__MaxQueries:
+                self.__queries = {}
+            compiled = PathQuery(pattern, self.__delimiter)
+            self.__queries[pattern] = compiled
+
+        return self.__query(pattern, compiled, generation)
+
+    def dump(self, fd, canonical=False, indent=None):
+        '''Write the configuration, including all updates, to a file object
+        as JSON. References are resolved when interpolation is enabled.
+
+        The JSON is encoded incrementally and written in chunks, so the
+        complete JSON string is never held in memory. JSON objects and lists
+        are encoded one value at a time, at every level, except for small
+        ones which contain no other objects or lists, which are encoded in
+        a single piece by the fast, single shot, encoder.
+
+        The canonical form sorts all keys, and uses compact separators, so
+        the same configuration always produces the same JSON regardless of
+        the order in which it was loaded or updated. This makes it suitable
+        for content hashes.
+
+        :param fd: The file object
+        :param canonical: True to write the canonical form
+        :param indent: The optional JSON indentation level
+
+        :raises ValueError: If the canonical form is requested and the
+                            configuration contains NaN or infinite numbers
+
+        '''
+        data = self.__resolvedData()
+
+        if canonical:
+            encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'),
+                                       allow_nan=False, indent=indent)
+        else:
+            encoder = json.JSONEncoder(indent=indent)
+
+        if indent is not None:
+            chunks = encoder.iterencode(data)
+        else:
+            chunks = self.__encodeValue(data, encoder, canonical)
+
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= self.__DumpChunkSize:
+                fd.write("".join(buffered))
+                buffered = []
+                size = 0
+
+        if len(buffered) > 0:
+            fd.write("".join(buffered))
+
+    def dumps(self, canonical=False, indent=None):
+        '''Get the configuration, including all updates, as a JSON string.
+        References are resolved when interpolation is enabled.
+
+        See :func:`jsonconf.ConfigFile.dump` for a description of the
+        canonical form.
+
+        :param canonical: True to produce the canonical form
+        :param indent: The optional JSON indentation level
+
+        :rtype: string
+
+        '''
+        output = StringIO()
+        self.dump(output, canonical, indent)
+        return output.getvalue()
 
     def __getitem__(self, key):
         '''Get the value specified by the given key.
@@ -157,15 +1075,610 @@ class ConfigFile:
 
     ##### Private functions
 
-    def __setKeyValue(self, data, key, value):
+    def __lookup(self, key):
+        '''Get the value specified by the given key, as written.
+
+        :param key: The key
+        :rtype: The value, or _Missing if the key does not exist
+
+        '''
+        if self.__packed is not None:
+            return self.__packed.get(key, _Missing)
+
+        # Overridden keys are found without walking the data, unless other
+        # keys beneath them are overridden as well
+        overrides = self.__overrides
+        if len(overrides) > 0:
+            data = overrides.get(key, _Missing)
+            if data is not _Missing and key not in self.__overridePrefixes:
+                return data
+
+        subKeys = self.__compiledKeys.get(key)
+        if subKeys is None:
+            subKeys = self.__compileKey(key)
+
+        # Keys beneath overridden keys are found within the merged data.
+        # The first sub key of an overridden key is either the key itself,
+        # or one of its ancestors.
+        data = self.__data
+        if len(overrides) > 0 and (subKeys[0] in overrides or
+                                   subKeys[0] in self.__overridePrefixes):
+            data = self.__view()
+
+        # Only JSON objects can be indexed by a string, so indexing any
+        # other value raises a TypeError
+        try:
+            for subKey in subKeys:
+                data = data[subKey]
+        except (KeyError, TypeError):
+            return _Missing
+
+        return data
+
+    def __changed(self):
+        '''Advance the generation after the configuration data changes, and
+        discard the values bound to proxies.
+
+        '''
+        self.__generation += 1
+        if self.__proxyBindings is not None:
+            self.__proxyBindings.clear()
+
+    def __walk(self, data, prefix, maxDepth, sort):
+        '''Walk the leaves of the given data using an explicit stack of
+        iterators, one for each JSON object being walked.
+
+        :param data: The data
+        :param prefix: The delimited key of the data, or None
+        :param maxDepth: The optional number of levels to descend into
+        :param sort: True to produce keys in sorted order
+
+        :rtype: generator of (key, value) tuples
+
+        '''
+        if type(data) != type(dict()) or len(data) == 0 or maxDepth == 0:
+            if prefix is not None:
+                yield prefix, data
+            return
+
+        delimiter = self.__delimiter
+        items = iter(sorted(data.iteritems())) if sort else data.iteritems()
+        stack = [(prefix, 1, items)]
+        while len(stack) > 0:
+            path, depth, items = stack[-1]
+            for key, value in items:
+                if path is not None:
+                    key = path + delimiter + key
+                if type(value) == type(dict()) and len(value) > 0 and \
+                        (maxDepth is None or depth < maxDepth):
+                    items = iter(sorted(value.iteritems())) if sort \
+                        else value.iteritems()
+                    stack.append((key, depth + 1, items))
+                    break
+                yield key, value
+            else:
+                stack.pop()
+
+    def __query(self, pattern, compiled, generation):
+        '''Evaluate a compiled query, and remember its results once it has
+        been completely evaluated.
+
+        :param pattern: The key path pattern
+        :param compiled: The :class:`jsonconf.PathQuery`
+        :param generation: The generation being queried
+
+        :rtype: generator of (key, value) tuples
+
+        '''
+        if self.__interpolator is None:
+            matches = compiled.match(self.__view())
+        else:
+            matches = self.__resolvedMatches(compiled)
+
+        results = []
+        for result in matches:
+            results.append(result)
+            yield result
+
+        if generation == self.__generation:
+            if len(self.__queryResults) >= self.__MaxQueries:
+                self.__queryResults = {}
+            self.__queryResults[pattern] = (generation, results)
+
+    def __resolvedMatches(self, compiled):
+        '''Match a compiled query against the unresolved data, resolving
+        only the values which the query visits. References which resolve
+        to JSON objects, or lists, are followed by the query.
+
+        :param compiled: The :class:`jsonconf.PathQuery`
+        :rtype: generator of (key, value) tuples
+
+        '''
+        interpolator = self.__interpolator
+        lookup = self.__referencedValue
+
+        # The sub keys of visited JSON objects are resolved as the query
+        # visits them, so objects are only resolved once they are matched
+        def resolve(key, value):
+            if type(value) == type(dict()):
+                return value
+            return interpolator.resolve(key, value, lookup)
+
+        for key, value in compiled.match(self.__view(), resolve):
+            if type(value) == type(dict()):
+                value = interpolator.resolve(key, value, lookup)
+            yield key, value
+
+    def __compileKey(self, key):
+        '''Split a delimited key into its sub keys, and remember the result.
+
+        :param key: The delimited key
+        :rtype: tuple of strings
+
+        '''
+        if len(self.__compiledKeys) >= self.__MaxCompiledKeys:
+            self.__compiledKeys = {}
+
+        subKeys = tuple(key.split(self.__delimiter))
+        self.__compiledKeys[key] = subKeys
+        return subKeys
+
+    def __fingerprint(self, value):
+        '''Get the fingerprint of a value, computing and caching the
+        fingerprints of all of the objects and lists it contains.
+
+        :param value: The value
+        :rtype: hexadecimal string
+
+        '''
+        if type(value) == type(dict()):
+            cached = self.__fingerprints.get(id(value))
+            if cached is not None:
+                return cached[1]
+
+            digest = sha1("{")
+            for key in sorted(value):
+                digest.update(json.dumps(key))
+                digest.update(self.__fingerprintPart(value[key]))
+        elif type(value) == type(list()):
+            cached = self.__fingerprints.get(id(value))
+            if cached is not None:
+                return cached[1]
+
+            digest = sha1("[")
+            for item in value:
+                digest.update(self.__fingerprintPart(item))
+        else:
+            return sha1(json.dumps(value)).hexdigest()
+
+        fingerprint = digest.hexdigest()
+
+        # Keep a reference to the value so its id cannot be reused
+        self.__fingerprints[id(value)] = (value, fingerprint)
+
+        return fingerprint
+
+    def __fingerprintPart(self, value):
+        '''Get the string which represents a value within the fingerprint
+        of its container.
+
+        :param value: The value
+        :rtype: string
+
+        '''
+        if type(value) == type(dict()) or type(value) == type(list()):
+            return "#" + self.__fingerprint(value)
+        return ":" + json.dumps(value)
+
+    def __resolvedData(self):
+        '''Get the configuration data with all references resolved.
+
+        :rtype: dictionary
+
+        '''
+        if self.__interpolator is None:
+            return self.__view()
+        return self.__interpolator.resolveAll(self.__view(),
+                                              self.__referencedValue)
+
+    def __encodeValue(self, value, encoder, canonical):
+        '''Encode a value as JSON one piece at a time, descending into JSON
+        objects and lists unless they are small and flat.
+
+        :param value: The value
+        :param encoder: The JSON encoder
+        :param canonical: True to sort the entries of JSON objects by key
+
+        :rtype: generator of strings
+
+        '''
+        if self.__isFlat(value):
+            yield encoder.encode(value)
+            return
+
+        separator, keySeparator = (',', ':') if canonical else (', ', ': ')
+
+        if type(value) == type(dict()):
+            items = sorted(value.iteritems()) if canonical \
+                else value.iteritems()
+            yield "{"
+        else:
+            items = ((None, item) for item in value)
+            yield "["
+
+        first = True
+        for key, item in items:
+            if not first:
+                yield separator
+            first = False
+            if key is not None:
+                yield encoder.encode(key) + keySeparator
+            for chunk in self.__encodeValue(item, encoder, canonical):
+                yield chunk
+
+        yield "}" if type(value) == type(dict()) else "]"
+
+    def __isFlat(self, value):
+        '''Determine if a value can be encoded in a single piece, which is
+        the case for everything other than JSON objects and lists holding
+        many values, or holding other objects or lists.
+
+        :param value: The value
+        :rtype: bool
+
+        '''
+        if type(value) == type(dict()):
+            values = value.itervalues()
+        elif type(value) == type(list()):
+            values = value
+        else:
+            return True
+
+        if len(value) > self.__DumpFlatItems:
+            return False
+        return _ContainerTypes.isdisjoint(map(type, values))
+
+    def __scanReferences(self):
+        '''Collect the references contained in the configuration, if
+        interpolation is enabled.
+
+        :raises Exception: If a reference cycle exists
+
+        '''
+        if self.__interpolator is not None:
+            self.__interpolator.reset()
+            self.__interpolator.scan(self.__view())
+
+            # Converted keys keep the references of their original values
+            delimiter = self.__delimiter
+            for key in sorted(self.__rawValues,
+                              key=lambda key: key.count(delimiter)):
+                self.__interpolator.update(key, self.__rawValues[key])
+            self.__interpolator.checkCycles()
+
+    def __resolvedValue(self, key):
+        '''Get the value of a key, with its references resolved, without
+        recording the access. This is used to read keys on behalf of the
+        configuration itself, rather than of the program.
+
+        :param key: The key
+        :rtype: The value of the key, or _Missing if it does not exist
+
+        '''
+        value = self.__lookup(key)
+        if value is not _Missing and self.__interpolator is not None:
+            value = self.__interpolator.resolve(key, value,
+                                                self.__referencedValue)
+        return value
+
+    def __referencedValue(self, key):
+        '''Get the value of a key referenced by another value.
+
+        :param key: The key
+        :rtype: The value of the key
+
+        :raises KeyError: If the key does not exist
+
+        '''
+        value = self.__resolvedValue(key)
+        if value is _Missing:
+            raise KeyError(key)
+        return value
+
+    def __set(self, key, value):
+        '''Override the value of a (possibly delimited) key.
+
+        :param key: The key
+        :param value: The value for the key
+
+        :raises Exception: If the key is beneath a value which is not a JSON
+                           object
+        :raises Exception: If the configuration is frozen
+
+        '''
+        if self.__frozen:
+            raise Exception("Cannot update a frozen configuration: %s" % key)
+        self.__checkConflicts(key)
+
+        overrides = self.__overrides
+        prefixes = self.__overridePrefixes
+
+        # The new value replaces any overridden keys beneath the key
+        if key in prefixes:
+            subKeyPrefix = key + self.__delimiter
+            for path in overrides.keys():
+                if path.startswith(subKeyPrefix):
+                    del overrides[path]
+                    self.__countAncestors(path, -1)
+
+        if key not in overrides:
+            self.__countAncestors(key, 1)
+        overrides[key] = value
+
+        self.__mergeOverride(key, value)
+        self.__changed()
+        if len(self.__typedValues) > 0:
+            self.__typedValues = {}
+        if self.__interpolator is not None:
+            self.__interpolator.update(key, value)
+
+    def __setRawValue(self, key, raw):
+        '''Remember the original value of a converted key.
+
+        :param key: The delimited key
+        :param raw: The value of the key before it was converted
+
+        '''
+        for ancestor in self.__ancestors(key):
+            self.__rawPrefixes.setdefault(ancestor, set()).add(key)
+        self.__rawValues[key] = raw
+
+    def __discardRawValues(self, key):
+        '''Forget the original values of a key, and of the keys beneath it.
+
+        :param key: The delimited key
+
+        '''
+        paths = list(self.__rawPrefixes.get(key, ()))
+        if key in self.__rawValues:
+            paths.append(key)
+
+        for path in paths:
+            del self.__rawValues[path]
+            for ancestor in self.__ancestors(path):
+                beneath = self.__rawPrefixes[ancestor]
+                beneath.discard(path)
+                if len(beneath) == 0:
+                    del self.__rawPrefixes[ancestor]
+
+    def __updateRawValues(self, key, value):
+        '''Apply an update to the remembered original values, so that keys
+        containing the updated key are converted again from their original
+        values with the update applied.
+
+        :param key: The updated delimited key
+        :param value: The new value for the key
+
+        '''
+        self.__discardRawValues(key)
+
+        delimiter = self.__delimiter
+        for path in self.__ancestors(key):
+            raw = self.__rawValues.get(path, _Missing)
+            if raw is _Missing:
+                continue
+
+            if type(raw) != type(dict()):
+                # The update replaces the original value entirely
+                self.__discardRawValues(path)
+                continue
+
+            raw = dict(raw)
+            self.__setKeyValue(raw, key[len(path) + len(delimiter):], value,
+                               set([id(raw)]))
+            self.__rawValues[path] = raw
+
+    def __ancestors(self, key):
+        '''Get the list of ancestor keys of a delimited key.
+
+        :param key: The delimited key
+        :rtype: list of strings
+
+        '''
+        ancestors = []
+        index = key.find(self.__delimiter)
+        while index != -1:
+            ancestors.append(key[:index])
+            index = key.find(self.__delimiter, index + 1)
+        return ancestors
+
+    def __getTyped(self, key, default, parser):
+        '''Get the value specified by the given key converted by the given
+        parser, reusing the previously converted value if possible.
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+        :param parser: The function used to convert the value
+
+        :returns: The converted value
+
+        :raises Exception: If the value cannot be converted
+
+        '''
+        typed = self.__typedValues.get((parser, key), _Missing)
+        if typed is not _Missing:
+            if self.__instrumentation is not None:
+                self.__instrumentation.recordAccess(key, True)
+            if self.__keyAudit is not None:
+                self.__keyAudit.recordRead(key, True)
+            return typed
+
+        found, value = self.getWithPresence(key)
+        if not found or value is None:
+            return default
+
+        try:
+            typed = parser(value)
+        except ValueError, e:
+            raise Exception("Failed to convert key [%s]: %s" % (key, e))
+
+        self.__typedValues[(parser, key)] = typed
+        return typed
+
+    def __convert(self, converter, value):
+        '''Convert a value, reusing the result of a previous conversion of
+        an equal value by the same conversion function.
+
+        :param converter: The conversion function
+        :param value: The value to convert
+
+        :returns: The converted value
+
+        '''
+        # The type distinguishes values which compare equal, such as 1,
+        # 1.0 and True
+        conversion = (converter, type(value), value)
+        try:
+            return self.__conversions[conversion]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable values are always converted
+            return converter(value)
+
+        converted = converter(value)
+
+        if len(self.__conversions) >= self.__MaxConversions:
+            self.__conversions.clear()
+        self.__conversions[conversion] = converted
+
+        return converted
+
+    def __checkConflicts(self, key):
+        '''Ensure that none of the ancestors of a key have a value which is
+        not a JSON object.
+
+        :param key: The delimited key
+
+        :raises Exception: If an ancestor is not a JSON object
+
+        '''
+        index = key.find(self.__delimiter)
+        if index == -1:
+            return
+
+        overrides = self.__overrides
+        data = self.__data
+        start = 0
+        while index != -1:
+            if data is _Missing:
+                return
+            path = key[:index]
+            value = overrides.get(path, _Missing)
+            if value is _Missing:
+                value = data.get(key[start:index], _Missing)
+            if value is not _Missing and type(value) != type(dict()):
+                raise Exception("Conflicting key entries: %s" % key)
+
+            data = value
+            start = index + len(self.__delimiter)
+            index = key.find(self.__delimiter, start)
+
+    def __countAncestors(self, key, count):
+        '''Add to the number of overridden keys beneath each of the
+        ancestors of a key.
+
+        :param key: The delimited key
+        :param count: The number to add
+
+        '''
+        prefixes = self.__overridePrefixes
+        index = key.find(self.__delimiter)
+        while index != -1:
+            ancestor = key[:index]
+            total = prefixes.get(ancestor, 0) + count
+            if total == 0:
+                del prefixes[ancestor]
+            else:
+                prefixes[ancestor] = total
+            index = key.find(self.__delimiter, index + 1)
+
+    def __view(self):
+        '''Get the parsed data merged with the overrides.
+
+        :rtype: dictionary
+
+        '''
+        if self.__packed is not None:
+            return self.__packed.unpack()
+        if len(self.__overrides) == 0:
+            return self.__data
+
+        if self.__merged is None:
+            merged = dict(self.__data)
+            owned = set([id(merged)])
+
+            # Ancestors are merged before the keys beneath them
+            delimiter = self.__delimiter
+            for key in sorted(self.__overrides,
+                              key=lambda key: key.count(delimiter)):
+                self.__setKeyValue(merged, key, self.__overrides[key], owned)
+
+            self.__merged = merged
+            self.__mergedIds = owned
+
+        return self.__merged
+
+    def __discardMerged(self):
+        '''Discard the merged data, and the fingerprints of its copied
+        objects.
+
+        '''
+        for copied in self.__mergedIds:
+            self.__fingerprints.pop(copied, None)
+        self.__merged = None
+        self.__mergedIds = set()
+
+    def __mergeOverride(self, key, value):
+        '''Apply an override to the merged data, if it has been created, so
+        that it does not need to be created again. The objects containing
+        the key are copied rather than changed, since the merged data may
+        have been returned to callers, or shared with overlays.
+
+        :param key: The delimited key
+        :param value: The value for the key
+
+        '''
+        if self.__merged is None:
+            return
+
+        # The replaced copies, and their fingerprints, are no longer needed
+        data = self.__merged
+        for subKey in [None] + key.split(self.__delimiter)[:-1]:
+            if subKey is not None:
+                data = data.get(subKey) if type(data) == type(dict()) \
+                    else None
+            if id(data) in self.__mergedIds:
+                self.__mergedIds.discard(id(data))
+                self.__fingerprints.pop(id(data), None)
+
+        owned = set()
+        merged = dict(self.__merged)
+        owned.add(id(merged))
+        self.__setKeyValue(merged, key, value, owned)
+
+        self.__merged = merged
+        self.__mergedIds.update(owned)
+
+    def __setKeyValue(self, data, key, value, owned):
         '''Update the given data dictionary with the given key value
         pair in order to convert possibly delimited keys into a
         proper dictionary structure.
 
         For example, given::
 
-            data = {"a", "b"}
-            self.__setKeyValue({"a": "b"}, "one.two.three", 123)
+            data = {"a": "b"}
+            self.__setKeyValue(data, "one.two.three", 123, set([id(data)]))
             print data
 
         The following dictionary is printed::
@@ -179,12 +1692,17 @@ class ConfigFile:
                 }
             }
 
+        Dictionaries which are not owned are copied before they are changed,
+        so the given data must be owned, and no other data is modified.
+
         :param data: The current data dictionary
         :param key: The current (possibly delimited) key to convert
         :param value: The value for the key
+        :param owned: The set of ids of the dictionaries which may be
+                      changed, which is updated with the ids of copies
 
         '''
-        index = key.find(".")
+        index = key.find(self.__delimiter)
 
         if type(data) != type(dict()):
             raise Exception("Conflicting key entries: %s" % key)
@@ -196,48 +1714,362 @@ class ConfigFile:
         else:
             # More keys remain
             currentKey = key[0:index]
-            nextKey = key[index+1:]
+            nextKey = key[index+len(self.__delimiter):]
 
+            newData = data.get(currentKey)
             if currentKey not in data:
-                data[currentKey] = {}
+                newData = data[currentKey] = {}
+                owned.add(id(newData))
+            elif type(newData) == type(dict()) and id(newData) not in owned:
+                newData = data[currentKey] = dict(newData)
+                owned.add(id(newData))
+            self.__setKeyValue(newData, nextKey, value, owned)
+
+    def __diff(self, old, new, prefix, changed):
+        '''Collect the delimited keys whose values differ between two
+        configuration dictionaries.
+
+        :param old: The previous data
+        :param new: The current data
+        :param prefix: The delimited key of the given data, or None
+        :param changed: The list to which changed keys are appended
+
+        '''
+        if type(old) != type(dict()) or type(new) != type(dict()):
+            if old != new:
+                changed.append(prefix)
+            return
+
+        for key, value in new.iteritems():
+            path = key if prefix is None else \
+                "%s%s%s" % (prefix, self.__delimiter, key)
+            if key not in old:
+                changed.append(path)
+            elif old[key] is not value:
+                self.__diff(old[key], value, path, changed)
+
+        for key in old:
+            if key not in new:
+                path = key if prefix is None else \
+                    "%s%s%s" % (prefix, self.__delimiter, key)
+                changed.append(path)
+
+    def __currentStamp(self):
+        '''Get the combined stamp of the configuration file, and of all of
+        the fragments it includes. Sources track their own changes.
+
+        :rtype: tuple, or None for sources
 
-            newData = data[currentKey]
-            self.__setKeyValue(newData, nextKey, value)
+        '''
+        if self.__sources is not None:
+            return None
 
-    def __verifyKeys(self, data):
-        '''Verify that none of the keys in the configuration dictionary
-        contain delimiters. The JSON configuration is forced not to use
-        delimiters, as it is easier to maintain sub objects.
+        stamp = self.__fileStamp(self.__filename)
+        if len(self.__includes) > 0:
+            stamp = (stamp, tuple(self.__fileStamp(path)
+                                  for path in self.__includes))
+        return stamp
 
-        :param data: The dictionary of configuration values
+    def __fileStamp(self, filename):
+        '''Get the modification time and size of the given file. For
+        a directory or glob pattern, the stamps of all of the fragment
+        files are combined.
 
-        :raises Exception: If one of the configuration keys contains the
-                           delimiter character
+        :param filename: The path to the file
+        :rtype: tuple of (mtime, size), or None if the file does not exist
 
         '''
-        # Only verify dictionary keys
-        if type(data) == type(dict()):
-            for key, value in data.iteritems():
-                if self.__delimiter in key:
-                    msg = "Config file keys must not contain the '%s' key. " \
-                        "Please use JSON objects instead." % self.__delimiter
-                    raise Exception(msg)
+        if self.__isFragmentPattern(filename):
+            return tuple((path, self.__fileStamp(path))
+                         for path in self.__fragmentFiles(filename))
 
-    def __parse(self, filename):
-        '''Parse a JSON configuration file.
+        try:
+            info = stat(filename)
+        except OSError:
+            return None
+        return (info.st_mtime, info.st_size)
 
-        :param filename: The path to the JSON configuration file
+    def __isFragmentPattern(self, filename):
+        '''Determine if the given filename names a set of fragment files.
+
+        :param filename: The path to a file, directory or glob pattern
+        :rtype: bool
+
+        '''
+        if isdir(filename):
+            return True
+        return any(char in filename for char in "*?[")
+
+    def __fragmentFiles(self, filename):
+        '''Get the sorted list of fragment files named by the given
+        directory or glob pattern. Directories contain JSON, MessagePack
+        and CBOR fragment files, each of which may be compressed.
+
+        :param filename: The path to a directory or glob pattern
+        :rtype: list of strings
+
+        '''
+        if not isdir(filename):
+            return sorted(glob(filename))
+
+        filenames = []
+        for format in Formats:
+            for extension in ("",) + Extensions:
+                pattern = join(filename, "*" + format + extension)
+                filenames.extend(glob(pattern))
+        return sorted(filenames)
+
+    def __fragmentKey(self, path):
+        '''Get the key of a fragment file, which is its file name without
+        its extension, or extensions for compressed files.
+
+        :param path: The path to the fragment file
+        :rtype: string
+
+        '''
+        key, extension = splitext(basename(path))
+        if extension in Extensions:
+            key = splitext(key)[0]
+        return key
+
+    def __parseFragments(self, filename, workers):
+        '''Parse a set of JSON fragment files into a single dictionary
+        keyed by the fragment file names.
+
+        :param filename: The path to a directory or glob pattern
+        :param workers: The number of worker processes, or None
         :rtype: A dictionary
 
+        :raises Exception: If no fragment files exist
+        :raises Exception: If two fragments map to the same key, or a
+                           fragment key contains the delimiter
+
+        '''
+        filenames = self.__fragmentFiles(filename)
+        if len(filenames) == 0:
+            raise Exception("Could not find file: %s" % filename)
+
+        data = {}
+        for path in filenames:
+            key = self.__fragmentKey(path)
+            if self.__delimiter in key:
+                raise Exception("Fragment file names must not contain the "
+                                "'%s' key: %s" % (self.__delimiter, path))
+            if key in data:
+                raise Exception("Duplicate fragment key [%s]: %s" %
+                                (key, path))
+            data[key] = None
+
+        workers = cpu_count() if workers is None else workers
+        jobs = [(path, self.__delimiter) for path in filenames]
+
+        if workers <= 1 or len(jobs) < self.__MinParallelFragments:
+            results = map(_parseFragment, jobs)
+        else:
+            pool = Pool(min(workers, len(jobs)))
+            try:
+                results = pool.map(_parseFragment, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+        for path, result in zip(filenames, results):
+            key = self.__fragmentKey(path)
+            data[key] = marshal.loads(result)
+
+        return data
+
+    def __parseFile(self, filename, including, includes):
+        '''Parse a JSON configuration file, resolving included fragments.
+
+        :param filename: The path to the JSON configuration file
+        :param including: The tuple of paths of the files currently being
+                          parsed, used to detect circular includes
+        :param includes: The list to which the paths of all included files
+                         are appended
+
+        :rtype: The parsed data
+
         :raises Exception: If the file does not exist
         :raises ValueError: If the file contains invalid JSON
+        :raises Exception: If any of the configuration keys contain the
+                           delimiter, or are duplicated
+        :raises Exception: If an included file cannot be loaded, or files
+                           include each other
+
+        '''
+        if not exists(filename):
+            raise Exception("Could not find file: %s" % filename)
+
+        path = abspath(filename)
+        including = including + (path,)
+
+        def include(name):
+            return self.__include(name, dirname(path), including, includes)
+
+        name, extension = splitext(filename)
+        if extension in Extensions:
+            extension = splitext(name)[1]
+
+        fd = openFile(filename)
+        try:
+            decoder = ConfigDecoder(self.__delimiter, include)
+            data = decoder.load(fd, Formats.get(extension))
+        finally:
+            fd.close()
+
+        return data
+
+    def __toSources(self, sources):
+        '''Convert a source, or a list of sources and filenames, into a list
+        of sources.
+
+        :param sources: The source, or list of sources and filenames
+        :rtype: list of :class:`jsonconf.ConfigSource`
+
+        :raises Exception: If there are no sources
+
+        '''
+        if isinstance(sources, ConfigSource):
+            return [sources]
+
+        sources = [FileSource(source, self.__workers)
+                   if isinstance(source, basestring) else source
+                   for source in sources]
+        if len(sources) == 0:
+            raise Exception("No configuration sources were given")
+        return sources
+
+    def __loadSources(self, sources):
+        '''Load the data of each source, concurrently when there are several
+        sources, and merge it into a single dictionary.
+
+        :param sources: The list of :class:`jsonconf.ConfigSource`
+        :rtype: dictionary
+
+        '''
+        delimiter = self.__delimiter
+        if len(sources) == 1:
+            results = [sources[0].load(delimiter)]
+        else:
+            # Map indices of sources to their data, or the exception raised
+            # while loading them
+            results = [None] * len(sources)
+            errors = [None] * len(sources)
+
+            def load(index):
+                try:
+                    results[index] = sources[index].load(delimiter)
+                except Exception, e:
+                    errors[index] = e
+
+            threads = [Thread(target=load, args=(index,))
+                       for index in xrange(len(sources))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for error in errors:
+                if error is not None:
+                    raise error
+
+        data = results[0]
+        for result in results[1:]:
+            data = self.__mergeData(data, result)
+        return data
+
+    def __mergeData(self, data, update):
+        '''Merge a dictionary into a copy of another. Only the JSON objects
+        which contain merged values are copied.
+
+        :param data: The dictionary
+        :param update: The dictionary whose values take precedence
+        :rtype: dictionary
+
+        '''
+        merged = dict(data)
+        for key, value in update.iteritems():
+            current = merged.get(key)
+            if type(current) == type(dict()) and type(value) == type(dict()):
+                value = self.__mergeData(current, value)
+            merged[key] = value
+        return merged
+
+    def __parseSharedFile(self, filename, includes):
+        '''Parse a JSON configuration file through the fragment cache, so
+        its data is shared with other configurations.
+
+        :param filename: The path to the JSON configuration file
+        :param includes: The list to which the paths of all included files
+                         are appended
+
+        :rtype: The shared data
 
         '''
         if not exists(filename):
             raise Exception("Could not find file: %s" % filename)
 
-        fd = open(filename, 'r')
-        data = json.load(fd)
-        fd.close()
+        def load(path):
+            dependencies = []
+            return self.__parseFile(path, (), dependencies), dependencies
+
+        data, dependencies = fragments.get(abspath(filename), load,
+                                           self.__delimiter)
+        includes.extend(dependencies)
 
         return data
+
+    def __include(self, name, directory, including, includes):
+        '''Load an included JSON fragment file.
+
+        :param name: The path to the fragment, relative to the directory of
+                     the including file
+        :param directory: The directory of the including file
+        :param including: The tuple of paths of the files currently being
+                          parsed
+        :param includes: The list to which the paths of all included files
+                         are appended
+
+        :rtype: The shared fragment dictionary
+
+        :raises Exception: If files include each other
+        :raises Exception: If the fragment does not contain a JSON object
+
+        '''
+        path = abspath(join(directory, name))
+        if path in including:
+            cycle = list(including[including.index(path):]) + [path]
+            raise Exception("Circular include: %s" % " -> ".join(cycle))
+
+        def load(path):
+            dependencies = []
+            return self.__parseFile(path, including, dependencies), \
+                dependencies
+
+        data, dependencies = fragments.get(path, load,
+                                           self.__delimiter)
+        if type(data) != type(dict()):
+            raise Exception("Included file must contain a JSON object: %s" %
+                            path)
+
+        includes.append(path)
+        includes.extend(dependencies)
+
+        return data
+
+
+def _parseFragment(job):
+    '''Parse a single JSON fragment file. This is executed by the
+    worker processes used to parse sets of fragments.
+
+    :param job: A tuple of (filename, delimiter)
+    :rtype: The marshalled fragment data
+
+    '''
+    filename, delimiter = job
+
+    config = ConfigFile(delimiter)
+    config.parse(filename)
+
+    return marshal.dumps(dict((key, config.get(key)) for key in config.keys()))
@@ -0,0 +1,157 @@
+class ConfigProxy(object):
+    '''The ConfigProxy class provides attribute style access to the values
+    of a :class:`jsonconf.ConfigFile`. For example, given the following
+    JSON::
+
+        {
+            "services": {
+                "payments": {
+                    "db": {
+                        "host": "localhost"
+                    }
+                }
+            }
+        }
+
+    The 'host' entry can be accessed in either of the following ways::
+
+        proxy = config.proxy()
+
+        proxy.services.payments.db.host  # "localhost"
+        proxy["services"]["payments"]["db"]["host"]  # "localhost"
+
+    JSON objects are represented by proxies, and all other values are
+    returned as is. The values and sub proxies produced by a proxy are bound
+    as attributes of the proxy, so repeated accesses are ordinary attribute
+    lookups which do not run any Python code. The bound values are discarded
+    whenever the configuration changes.
+
+    Accessing a key which does not exist raises an AttributeError, or a
+    KeyError when using item access.
+
+    '''
+    __slots__ = ("__config", "__key", "__bindings", "__dict__")
+
+    def __init__(self, config, key=None, bindings=None):
+        '''
+        :param config: The :class:`jsonconf.ConfigFile`
+        :param key: The delimited key of the JSON object represented by
+                    this proxy, or None for the entire configuration
+        :param bindings: The :class:`jsonconf.configProxy.ProxyBindings`
+                         which the configuration clears whenever it changes
+
+        '''
+        self.__config = config
+        self.__key = key
+        self.__bindings = ProxyBindings() if bindings is None else bindings
+
+    def __getattr__(self, name):
+        '''Get the value of the given sub key, which is only called when
+        the value is not already bound to the proxy.
+
+        :param name: The sub key
+        :returns: The value, or a proxy for JSON objects
+
+        :raises AttributeError: If the key does not exist
+
+        '''
+        # Attributes of the proxy itself which have not been set
+        if name.startswith("_ConfigProxy__"):
+            raise AttributeError(name)
+
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError("Key does not exist: %s" %
+                                 self.__subKey(name))
+
+    def __getitem__(self, name):
+        '''Get the value of the given sub key.
+
+        :param name: The sub key
+        :returns: The value, or a proxy for JSON objects
+
+        :raises KeyError: If the key does not exist
+
+        '''
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            pass
+
+        key = self.__subKey(name)
+        found, value = self.__config.getWithPresence(key)
+        if not found:
+            raise KeyError(key)
+
+        if type(value) == type(dict()):
+            value = ConfigProxy(self.__config, key, self.__bindings)
+
+        self.__bindings.bind(self, name, value)
+        return value
+
+    def __contains__(self, name):
+        '''Determine if the given sub key exists.
+
+        :param name: The sub key
+        :rtype: bool
+
+        '''
+        return self.__config.hasKey(self.__subKey(name))
+
+    def __iter__(self):
+        '''Iterate over the sub keys of the JSON object.
+
+        :rtype: iterator of strings
+
+        '''
+        if self.__key is None:
+            return iter(self.__config.keys())
+        return iter(self.__config.get(self.__key, {}))
+
+    def __repr__(self):
+        return "ConfigProxy(%s)" % ("" if self.__key is None else self.__key)
+
+    ##### Private functions
+
+    def __subKey(self, name):
+        '''Get the delimited key of the given sub key.
+
+        :param name: The sub key
+        :rtype: string
+
+        '''
+        if self.__key is None:
+            return name
+        return self.__key + self.__config.delimiter() + name
+
+
+class ProxyBindings(object):
+    '''The ProxyBindings class keeps track of the proxies of a configuration
+    which have values bound to their attributes, so that the values can be
+    discarded when the configuration changes.
+
+    '''
+    __slots__ = ("__proxies",)
+
+    def __init__(self):
+        self.__proxies = []
+
+    def bind(self, proxy, name, value):
+        '''Bind a value to an attribute of a proxy.
+
+        :param proxy: The :class:`jsonconf.ConfigProxy`
+        :param name: The name of the attribute
+        :param value: The value
+
+        '''
+        attributes = proxy.__dict__
+        if len(attributes) == 0:
+            self.__proxies.append(proxy)
+        attributes[name] = value
+
+    def clear(self):
+        '''Discard the values bound to all of the proxies.'''
+        for proxy in self.__proxies:
+            proxy.__dict__.clear()
+        self.__proxies = []
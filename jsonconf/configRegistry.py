@@ -0,0 +1,254 @@
+from collections import OrderedDict
+
+
+class ConfigRegistry:
+    '''The ConfigRegistry class manages the configurations of many tenants
+    which share a single base configuration.
+
+    Each tenant is described by a small dictionary of the keys it overrides,
+    rather than by a complete copy of the base configuration. For example::
+
+        registry = ConfigRegistry(base)
+        registry.setTenant("acme", {"db.pool_size": 20})
+
+        registry.get("acme", "db.pool_size")  # 20
+        registry.get("acme", "db.host")  # The base value
+
+    Keys which are not related to any of the overrides of a tenant are read
+    directly from the base configuration. Other keys are read from a view of
+    the tenant (see :func:`jsonconf.ConfigFile.overlay`), which is created
+    when first needed, so adding or updating a tenant only checks its
+    overrides against the base configuration. Only the views of the most
+    recently used tenants are kept, and all views are recreated after the
+    base configuration changes.
+
+    '''
+
+    def __init__(self, base, maxViews=128):
+        '''
+        :param base: The base :class:`jsonconf.ConfigFile`
+        :param maxViews: The maximum number of tenant views kept
+
+        '''
+        self.__base = base
+        self.__maxViews = maxViews
+
+        # Map tenants to tuples of (overrides, root keys of the overrides)
+        self.__tenants = {}
+
+        # Map tenants to tuples of (base generation, view), in order of use
+        self.__views = OrderedDict()
+
+    def __len__(self):
+        '''Get the number of tenants.
+
+        :rtype: int
+
+        '''
+        return len(self.__tenants)
+
+    def base(self):
+        '''The base configuration shared by all tenants.
+
+        :rtype: :class:`jsonconf.ConfigFile`
+
+        '''
+        return self.__base
+
+    def tenants(self):
+        '''Get the list of tenants.
+
+        :rtype: list
+
+        '''
+        return self.__tenants.keys()
+
+    def hasTenant(self, tenant):
+        '''Determine if the given tenant exists.
+
+        :param tenant: The tenant
+        :rtype: bool
+
+        '''
+        return tenant in self.__tenants
+
+    def setTenant(self, tenant, keyValueMap):
+        '''Add a tenant, or replace all of the overrides of an existing
+        tenant.
+
+        :param tenant: The tenant
+        :param keyValueMap: The dictionary mapping keys to values which
+                            override the base configuration
+
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+
+        '''
+        self.__setOverrides(tenant, self.__validate({}, keyValueMap))
+
+    def updateTenant(self, tenant, keyValueMap):
+        '''Add to the overrides of a tenant.
+
+        :param tenant: The tenant
+        :param keyValueMap: The dictionary mapping keys to values
+
+        :raises Exception: If the tenant does not exist
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+
+        '''
+        overrides = self.__tenant(tenant)[0]
+        self.__setOverrides(tenant, self.__validate(overrides, keyValueMap))
+
+    def removeTenant(self, tenant):
+        '''Remove a tenant.
+
+        :param tenant: The tenant
+
+        '''
+        self.__tenants.pop(tenant, None)
+        self.__views.pop(tenant, None)
+
+    def overrides(self, tenant):
+        '''Get the overrides of a tenant.
+
+        :param tenant: The tenant
+        :rtype: dictionary mapping keys to values
+
+        :raises Exception: If the tenant does not exist
+
+        '''
+        return dict(self.__tenant(tenant)[0])
+
+    def hasKey(self, tenant, key):
+        '''Determine if the given key is specified for a tenant.
+
+        :param tenant: The tenant
+        :param key: The key
+        :rtype: bool
+
+        :raises Exception: If the tenant does not exist
+
+        '''
+        if self.__isBaseKey(tenant, key):
+            return self.__base.hasKey(key)
+        return self.view(tenant).hasKey(key)
+
+    def get(self, tenant, key, default=None):
+        '''Get the value specified by the given key for a tenant.
+
+        :param tenant: The tenant
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :raises Exception: If the tenant does not exist
+
+        '''
+        if self.__isBaseKey(tenant, key):
+            return self.__base.get(key, default)
+        return self.view(tenant).get(key, default)
+
+    def view(self, tenant):
+        '''Get the configuration of a tenant. The view must not be updated
+        directly, use :func:`jsonconf.ConfigRegistry.updateTenant` instead.
+
+        :param tenant: The tenant
+        :rtype: :class:`jsonconf.ConfigFile`
+
+        :raises Exception: If the tenant does not exist
+        :raises Exception: If interpolation is enabled, and the overrides of
+                           the tenant create a cycle of references
+
+        '''
+        cached = self.__views.get(tenant)
+        if cached is not None and cached[0] == self.__base.generation():
+            # Mark the view as the most recently used
+            del self.__views[tenant]
+            self.__views[tenant] = cached
+            return cached[1]
+
+        view = self.__base.overlay(self.__tenant(tenant)[0])
+        self.__cacheView(tenant, view)
+        return view
+
+    ##### Private functions
+
+    def __tenant(self, tenant):
+        '''Get the overrides, and root keys, of a tenant.
+
+        :param tenant: The tenant
+        :rtype: tuple of (dictionary, frozenset)
+
+        :raises Exception: If the tenant does not exist
+
+        '''
+        try:
+            return self.__tenants[tenant]
+        except KeyError:
+            raise Exception("Unknown tenant: %s" % tenant)
+
+    def __isBaseKey(self, tenant, key):
+        '''Determine if the value of a key for a tenant is the value in the
+        base configuration, which is the case when the tenant does not
+        override the key, or any key related to it. References may relate
+        any keys, so no key is a base key when interpolation is enabled.
+
+        :param tenant: The tenant
+        :param key: The key
+        :rtype: bool
+
+        :raises Exception: If the tenant does not exist
+
+        '''
+        roots = self.__tenant(tenant)[1]
+        if self.__base.isInterpolationEnabled():
+            return False
+
+        index = key.find(self.__base.delimiter())
+        return (key if index == -1 else key[:index]) not in roots
+
+    def __validate(self, overrides, keyValueMap):
+        '''Apply updates to the overrides of a tenant, checking them
+        against the base configuration. Interpolation is left disabled, so
+        the references of the base configuration are not scanned again, and
+        no view is created.
+
+        :param overrides: The current overrides of the tenant
+        :param keyValueMap: The dictionary mapping keys to values
+
+        :rtype: dictionary mapping keys to values, the new overrides
+
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+
+        '''
+        config = self.__base.overlay(overrides, interpolation=False)
+        config.updateData(keyValueMap)
+        return config.overrides()
+
+    def __setOverrides(self, tenant, overrides):
+        '''Replace the overrides of a tenant. Its view is discarded, and
+        created again when it is next used.
+
+        :param tenant: The tenant
+        :param overrides: The dictionary mapping keys to values
+
+        '''
+        delimiter = self.__base.delimiter()
+        roots = frozenset(key.split(delimiter, 1)[0] for key in overrides)
+
+        self.__tenants[tenant] = (overrides, roots)
+        self.__views.pop(tenant, None)
+
+    def __cacheView(self, tenant, view):
+        '''Remember the view of a tenant, discarding the least recently used
+        view if there are too many.
+
+        :param tenant: The tenant
+        :param view: The :class:`jsonconf.ConfigFile`
+
+        '''
+        self.__views.pop(tenant, None)
+        self.__views[tenant] = (self.__base.generation(), view)
+        while len(self.__views) > self.__maxViews:
+            self.__views.popitem(last=False)
@@ -0,0 +1,382 @@
+'''Sources from which configuration data can be loaded, in addition to
+local JSON configuration files.
+
+A list of sources may be given to :func:`jsonconf.ConfigFile.parse`, or
+:func:`jsonconf.JsonConfig.parse`, in which case the sources are fetched
+concurrently and merged in order, so later sources override earlier ones.
+
+'''
+import httplib
+import json
+import os
+import socket
+from os.path import dirname
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from urlparse import urlsplit
+
+from configDecoder import ConfigDecoder
+
+
+class ConfigSource:
+    '''The ConfigSource class is the interface implemented by every source
+    of configuration data.
+
+    '''
+
+    def load(self, delimiter='.'):
+        '''Load the configuration data. The returned data is shared, and must
+        not be modified.
+
+        :param delimiter: The delimiter used to access sub keys
+        :rtype: dictionary
+
+        :raises Exception: If the data cannot be loaded
+
+        '''
+        raise NotImplementedError()
+
+    def isModified(self):
+        '''Determine if the configuration data has changed since it was
+        last loaded.
+
+        :rtype: bool
+
+        '''
+        raise NotImplementedError()
+
+
+class FileSource(ConfigSource):
+    '''The FileSource class loads configuration data from a JSON
+    configuration file, a directory of JSON fragment files, or a glob
+    pattern (see :func:`jsonconf.ConfigFile.parse`).
+
+    '''
+
+    def __init__(self, filename, workers=None):
+        '''
+        :param filename: The path to the JSON configuration file, directory
+                         or glob pattern
+        :param workers: The number of worker processes used to parse
+                        fragments
+
+        '''
+        self.__filename = filename
+        self.__workers = workers
+        self.__config = None
+
+    def load(self, delimiter='.'):
+        # Import here, since ConfigFile depends on this module
+        from configFile import ConfigFile
+
+        config = ConfigFile(delimiter)
+        config.parse(self.__filename, self.__workers)
+        self.__config = config
+        return dict((key, config.get(key)) for key in config.keys())
+
+    def isModified(self):
+        return self.__config is None or self.__config.isModified()
+
+
+class DataSource(ConfigSource):
+    '''The DataSource class provides configuration data held in memory,
+    which may be replaced at any time. It can stand in for remote sources
+    when testing, or be fed by an in-process key value store.
+
+    '''
+
+    def __init__(self, data=None):
+        '''
+        :param data: The configuration dictionary
+
+        '''
+        self.__data = {} if data is None else data
+        self.__modified = True
+
+    def update(self, data):
+        '''Replace the configuration data.
+
+        :param data: The configuration dictionary
+
+        '''
+        self.__data = data
+        self.__modified = True
+
+    def load(self, delimiter='.'):
+        self.__modified = False
+        return self.__data
+
+    def isModified(self):
+        return self.__modified
+
+
+class HttpSource(ConfigSource):
+    '''The HttpSource class loads JSON configuration data from an HTTP, or
+    HTTPS, URL.
+
+    Connections are kept alive and shared by all sources fetching from the
+    same server. Requests are conditional, using the ETag and Last-Modified
+    headers of the previous response, so an unchanged configuration is not
+    transferred again.
+
+    When a cache file is given, every successful response is written to it.
+    A new source loads the cached copy without contacting the server, so a
+    restarting process does not wait for it, and the copy is revalidated
+    with a conditional request when the source is checked for changes, or
+    loaded again. The cached copy is also the last known good
+    configuration used whenever the server cannot be reached.
+
+    '''
+
+    def __init__(self, url, cacheFile=None, timeout=10.0, headers=None):
+        '''
+        :param url: The URL of the JSON configuration data
+        :param cacheFile: The optional path to the last known good copy
+        :param timeout: The number of seconds to wait for the server
+        :param headers: The optional dictionary of extra request headers
+
+        '''
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise Exception("Unsupported URL: %s" % url)
+
+        self.__url = url
+        self.__server = (parts.scheme, parts.hostname, parts.port)
+        self.__path = parts.path or "/"
+        if parts.query:
+            self.__path += "?" + parts.query
+        self.__cacheFile = cacheFile
+        self.__timeout = timeout
+        self.__headers = {} if headers is None else dict(headers)
+
+        # The last loaded response, as tuples of (etag, lastModified, body)
+        self.__response = None
+        self.__data = None
+
+        # A response received by isModified, which has not been loaded
+        self.__pending = None
+
+        if cacheFile is not None:
+            self.__response = self.__readCache()
+
+    def url(self):
+        '''The URL of the JSON configuration data.
+
+        :rtype: string
+
+        '''
+        return self.__url
+
+    def load(self, delimiter='.'):
+        '''Load the configuration data. The first load uses the last known
+        good copy, if there is one, without contacting the server. Later
+        loads use it if the server cannot be reached.
+
+        :param delimiter: The delimiter used to access sub keys
+        :rtype: dictionary
+
+        :raises Exception: If the server cannot be reached, and there is no
+                           last known good copy
+        :raises Exception: If the response is not a valid JSON object
+
+        '''
+        response, self.__pending = self.__pending, None
+        if response is None and self.__data is None and \
+                self.__response is not None:
+            # Start from the cached copy, which isModified revalidates
+            response = self.__response
+        elif response is None:
+            try:
+                response = self.__fetch()
+            except Exception, e:
+                if self.__response is None:
+                    raise Exception("Failed to fetch configuration: %s\n%s" %
+                                    (self.__url, e))
+                response = self.__response
+
+        if response is not self.__response or self.__data is None:
+            data = ConfigDecoder(delimiter).loads(response[2], "json")
+            if type(data) != type(dict()):
+                raise Exception("Configuration must be a JSON object: %s" %
+                                self.__url)
+            if response is not self.__response:
+                self.__writeCache(response)
+            self.__response = response
+            self.__data = data
+
+        return self.__data
+
+    def isModified(self):
+        '''Determine if the configuration data has changed since it was
+        last loaded. Servers which cannot be reached are assumed not to
+        have changed.
+
+        :rtype: bool
+
+        '''
+        if self.__pending is not None or self.__data is None:
+            return True
+
+        try:
+            response = self.__fetch()
+        except Exception:
+            return False
+
+        if response is self.__response:
+            return False
+        self.__pending = response
+        return True
+
+    ##### Private functions
+
+    def __fetch(self):
+        '''Make a conditional request for the configuration data.
+
+        :rtype: tuple of (etag, lastModified, body), which is the last
+                loaded response if the data has not changed
+
+        :raises Exception: If the request fails
+
+        '''
+        headers = dict(self.__headers)
+        headers["Accept"] = "application/json"
+        if self.__response is not None:
+            etag, lastModified, _ = self.__response
+            if etag is not None:
+                headers["If-None-Match"] = etag
+            if lastModified is not None:
+                headers["If-Modified-Since"] = lastModified
+
+        status, responseHeaders, body = _connections.request(
+            self.__server, self.__path, headers, self.__timeout)
+
+        if status == httplib.NOT_MODIFIED and self.__response is not None:
+            return self.__response
+        elif status != httplib.OK:
+            raise Exception("Unexpected HTTP status %d: %s" %
+                            (status, self.__url))
+
+        return (responseHeaders.get("etag"),
+                responseHeaders.get("last-modified"), body)
+
+    def __readCache(self):
+        '''Read the last known good response from the cache file.
+
+        :rtype: tuple of (etag, lastModified, body), or None
+
+        '''
+        try:
+            fd = open(self.__cacheFile, 'r')
+        except IOError:
+            return None
+
+        try:
+            cached = json.load(fd)
+            return (cached.get("etag"), cached.get("lastModified"),
+                    cached["body"])
+        except (ValueError, KeyError, AttributeError):
+            return None
+        finally:
+            fd.close()
+
+    def __writeCache(self, response):
+        '''Replace the cache file with the given response. The file is
+        written under a temporary name, and then renamed, so it is never
+        left partially written.
+
+        :param response: The tuple of (etag, lastModified, body)
+
+        '''
+        if self.__cacheFile is None:
+            return
+
+        etag, lastModified, body = response
+        fd = NamedTemporaryFile('w', dir=dirname(self.__cacheFile) or ".",
+                                delete=False)
+        try:
+            json.dump({"etag": etag, "lastModified": lastModified,
+                       "body": body}, fd)
+        finally:
+            fd.close()
+        os.rename(fd.name, self.__cacheFile)
+
+
+class _ConnectionPool:
+    '''A pool of idle, kept alive, HTTP connections shared by all sources.
+
+    '''
+    # The maximum number of idle connections kept for each server
+    __MaxIdle = 4
+
+    def __init__(self):
+        # Map (scheme, host, port) tuples to lists of idle connections
+        self.__idle = {}
+        self.__lock = Lock()
+
+    def request(self, server, path, headers, timeout):
+        '''Make a GET request, reusing an idle connection to the server when
+        one exists. A request on a reused connection which fails, because
+        the server closed it, is retried once on a new connection.
+
+        :param server: The tuple of (scheme, host, port)
+        :param path: The request path
+        :param headers: The dictionary of request headers
+        :param timeout: The number of seconds to wait for the server
+
+        :rtype: tuple of (status, headers, body), where the header names
+                are lower case
+
+        '''
+        connection = self.__acquire(server)
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = self.__connect(server, timeout)
+
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+                if not reused:
+                    raise
+                connection = None
+                reused = False
+                continue
+
+            if response.will_close:
+                connection.close()
+            else:
+                self.__release(server, connection)
+            return response.status, dict(response.getheaders()), body
+
+    ##### Private functions
+
+    def __acquire(self, server):
+        '''Take an idle connection to the server, if one exists.'''
+        with self.__lock:
+            idle = self.__idle.get(server)
+            if idle:
+                return idle.pop()
+        return None
+
+    def __release(self, server, connection):
+        '''Return a connection to the pool.'''
+        with self.__lock:
+            idle = self.__idle.setdefault(server, [])
+            if len(idle) < self.__MaxIdle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def __connect(self, server, timeout):
+        '''Open a new connection to the server.'''
+        scheme, host, port = server
+        if scheme == "https":
+            return httplib.HTTPSConnection(host, port, timeout=timeout)
+        return httplib.HTTPConnection(host, port, timeout=timeout)
+
+
+# The connection pool shared by all HTTP sources within the process
+_connections = _ConnectionPool()
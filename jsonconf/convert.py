@@ -0,0 +1,93 @@
+'''Convert configuration files between the JSON, MessagePack and CBOR
+formats.
+
+Usage::
+
+    $ python -m jsonconf.convert config.json config.msgpack
+    $ python -m jsonconf.convert config.cbor.gz config.json
+    $ python -m jsonconf.convert conf.d/ - --format cbor > config.cbor
+
+The input may be any file, fragment directory or glob pattern which
+:func:`jsonconf.ConfigFile.parse` accepts, and it is verified while it is
+parsed. The output format is chosen by the extension of the output file,
+unless one is given, and output files ending with .gz are gzip compressed.
+
+'''
+import gzip
+import json
+import sys
+from argparse import ArgumentParser
+from os.path import splitext
+
+from binaryFormats import Formats, encodeCbor, encodeMsgPack
+from configFile import ConfigFile
+
+
+def convert(data, format):
+    '''Encode configuration data in the given format.
+
+    :param data: The configuration dictionary
+    :param format: The format: json, msgpack, or cbor
+    :rtype: string
+
+    :raises Exception: If the format is not supported
+
+    '''
+    if format == "json":
+        return json.dumps(data, indent=4, sort_keys=True) + "\n"
+    elif format == "msgpack":
+        return encodeMsgPack(data)
+    elif format == "cbor":
+        return encodeCbor(data)
+    raise Exception("Unsupported configuration format: %s" % format)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Convert configuration files "
+                            "between JSON, MessagePack and CBOR")
+    parser.add_argument("input",
+                        help="The configuration file, directory or glob")
+    parser.add_argument("output", help="The output file, or - for stdout")
+    parser.add_argument("--format", choices=sorted(set(Formats.values())),
+                        help="The output format (default: chosen by the "
+                        "output file extension)")
+    parser.add_argument("--delimiter", default='.',
+                        help="The delimiter used to access sub keys")
+    options = parser.parse_args(argv)
+
+    name, extension = splitext(options.output)
+    compress = extension == ".gz"
+    if compress:
+        extension = splitext(name)[1]
+
+    format = options.format
+    if format is None:
+        format = Formats.get(extension)
+        if format is None:
+            parser.error("Cannot determine the output format of %s, use "
+                         "--format" % options.output)
+
+    try:
+        config = ConfigFile(options.delimiter)
+        config.parse(options.input)
+        data = dict((key, config.get(key)) for key in config.keys())
+        output = convert(data, format)
+    except Exception, e:
+        sys.stderr.write("%s\n" % e)
+        return 1
+
+    if options.output == "-":
+        sys.stdout.write(output)
+    else:
+        fd = gzip.open(options.output, 'wb') if compress else \
+            open(options.output, 'wb')
+        try:
+            fd.write(output)
+        finally:
+            fd.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+from os import stat
+
+
+class FragmentCache:
+    '''The FragmentCache class stores parsed configuration fragments so
+    that a fragment included by many configurations is only parsed once.
+
+    Fragments are keyed by their path, and by the delimiter of the
+    configurations parsing them, since the delimiter determines which keys
+    are valid. An entry is reused only while the modification time and
+    size of the fragment, and of every fragment it includes, are unchanged.
+
+    The parsed data of a fragment is shared by every configuration which
+    includes it, and is never modified: configurations keep their updates
+    separately, and copy the objects containing updated keys when merging
+    them (see :func:`jsonconf.ConfigFile.updateData`).
+
+    '''
+
+    def __init__(self):
+        '''Create an empty FragmentCache.'''
+        # Map (path, delimiter) tuples to tuples of (data, dependencies,
+        # stamps)
+        self.__entries = {}
+
+    def __len__(self):
+        '''Get the number of cached fragments.
+
+        :rtype: int
+
+        '''
+        return len(self.__entries)
+
+    def get(self, path, load, delimiter='.'):
+        '''Get the parsed data for the fragment at the given path.
+
+        The load function is called to parse the fragment when it is not
+        cached, or has changed since it was cached. It must have the
+        following signature::
+
+            data, dependencies = load(path)
+
+        where `dependencies` is the list of paths of all of the fragments
+        included, directly or indirectly, by the fragment.
+
+        :param path: The absolute path to the fragment
+        :param load: The function used to parse the fragment
+        :param delimiter: The delimiter used by the load function
+
+        :rtype: tuple of (data, dependencies)
+
+        '''
+        entry = self.__entries.get((path, delimiter))
+        if entry is not None:
+            data, dependencies, stamps = entry
+            if all(_fileStamp(dependency) == stamp
+                   for dependency, stamp in stamps):
+                return data, dependencies
+
+        stamp = _fileStamp(path)
+        data, dependencies = load(path)
+
+        stamps = [(path, stamp)]
+        stamps.extend((dependency, _fileStamp(dependency))
+                      for dependency in dependencies)
+
+        self.__entries[(path, delimiter)] = (data, dependencies, stamps)
+
+        return data, dependencies
+
+    def clear(self):
+        '''Remove all of the cached fragments.'''
+        self.__entries = {}
+
+
+def _fileStamp(path):
+    '''Get the modification time and size of the given file.
+
+    :param path: The path to the file
+    :rtype: tuple of (mtime, size), or None if the file does not exist
+
+    '''
+    try:
+        info = stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime, info.st_size)
+
+
+# The fragment cache shared by all configurations within the process
+fragments = FragmentCache()
@@ -0,0 +1,129 @@
+import json
+
+
+class Instrumentation:
+    '''The Instrumentation class collects statistics about how a
+    configuration is used.
+
+    It keeps a count of the accesses made to each key, a count of the
+    accesses which did not find the key and fell back to the default value,
+    and the number of calls to, and total time spent in, each of the
+    instrumented operations (parse, updateData, requireKeys, and
+    convertKeys).
+
+    Key accesses can be sampled to reduce overhead. With a sample interval
+    of N, only every Nth access is recorded, so the reported counts are
+    approximately 1/N of the actual number of accesses.
+
+    For example::
+
+        config = ConfigFile()
+        stats = config.enableInstrumentation(sampleInterval=10)
+        config.parse(filename)
+
+        ...
+
+        print stats.toJson(indent=4)
+
+    '''
+
+    def __init__(self, sampleInterval=1):
+        '''
+        :param sampleInterval: Record one out of every `sampleInterval`
+                               key accesses
+
+        '''
+        if sampleInterval < 1:
+            raise Exception("Invalid sample interval: %s" % sampleInterval)
+
+        self.__sampleInterval = sampleInterval
+        self.reset()
+
+    def sampleInterval(self):
+        '''The number of key accesses per recorded access.
+
+        :rtype: int
+
+        '''
+        return self.__sampleInterval
+
+    def reset(self):
+        '''Discard all of the collected statistics.'''
+        self.__countdown = self.__sampleInterval
+        self.__accesses = {}
+        self.__misses = {}
+        self.__timings = {}
+
+    def recordAccess(self, key, found):
+        '''Record an access to the given key.
+
+        :param key: The key
+        :param found: True if the key exists, False if the access fell back
+                      to the default value
+
+        '''
+        self.__countdown -= 1
+        if self.__countdown > 0:
+            return
+        self.__countdown = self.__sampleInterval
+
+        self.__accesses[key] = self.__accesses.get(key, 0) + 1
+        if not found:
+            self.__misses[key] = self.__misses.get(key, 0) + 1
+
+    def recordTime(self, operation, seconds):
+        '''Record a call to the given operation.
+
+        :param operation: The name of the operation
+        :param seconds: The time spent in the operation
+
+        '''
+        timing = self.__timings.get(operation)
+        if timing is None:
+            timing = self.__timings[operation] = [0, 0.0]
+        timing[0] += 1
+        timing[1] += seconds
+
+    def accesses(self):
+        '''Return the dictionary mapping keys to their recorded number
+        of accesses.
+
+        :rtype: dictionary
+
+        '''
+        return dict(self.__accesses)
+
+    def misses(self):
+        '''Return the dictionary mapping keys to the recorded number of
+        accesses which fell back to the default value.
+
+        :rtype: dictionary
+
+        '''
+        return dict(self.__misses)
+
+    def toDict(self):
+        '''Export the collected statistics as a dictionary.
+
+        :rtype: dictionary
+
+        '''
+        timings = {}
+        for operation, (calls, seconds) in self.__timings.iteritems():
+            timings[operation] = {"calls": calls, "seconds": seconds}
+
+        return {
+            "sampleInterval": self.__sampleInterval,
+            "accesses": dict(self.__accesses),
+            "misses": dict(self.__misses),
+            "timings": timings,
+            }
+
+    def toJson(self, indent=None):
+        '''Export the collected statistics as a JSON string.
+
+        :param indent: The optional JSON indentation level
+        :rtype: string
+
+        '''
+        return json.dumps(self.toDict(), indent=indent, sort_keys=True)
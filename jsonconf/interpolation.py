@@ -0,0 +1,401 @@
+import re
+
+
+class Interpolator:
+    '''The Interpolator class manages references between configuration
+    values.
+
+    A string value may reference other configuration keys using the
+    ${key} syntax. For example, given the following JSON::
+
+        {
+            "host": "db.example.com",
+            "db": {
+                "port": 5432,
+                "url": "postgres://${host}:${db.port}/main",
+                "backupPort": "${db.port}"
+            }
+        }
+
+    The 'db.url' key resolves to "postgres://db.example.com:5432/main". A
+    value which consists of a single reference resolves to the referenced
+    value itself, so 'db.backupPort' resolves to the integer 5432.
+
+    References are collected into a dependency graph when the configuration
+    is scanned, which allows circular references to be detected up front.
+    The graph is indexed by key and by key prefix, so the references related
+    to a key are found without visiting every reference, and only the
+    references added since the last check are checked for cycles. Values
+    are only resolved when they are accessed, and resolved values are
+    remembered until one of the keys they depend on changes.
+
+    '''
+    __Reference = re.compile(r"\$\{([^}]+)\}")
+
+    def __init__(self, delimiter='.'):
+        '''
+        :param delimiter: The delimiter used to access sub keys
+
+        '''
+        self.__delimiter = delimiter
+        self.reset()
+
+    def reset(self):
+        '''Discard all known references and resolved values.'''
+        # Map keys to the list of keys they reference
+        self.__references = {}
+
+        # Map referenced keys to the set of keys referencing them
+        self.__dependents = {}
+
+        # Map the ancestors of all referencing keys to the set of
+        # referencing keys beneath them
+        self.__prefixes = {}
+
+        # Map the ancestors of all referenced keys to the set of referenced
+        # keys beneath them
+        self.__referencedPrefixes = {}
+
+        # The referencing keys which have not been checked for cycles
+        self.__unchecked = set()
+
+        # Map keys to their resolved values
+        self.__resolved = {}
+
+    def hasReferences(self):
+        '''Determine if any references are known.
+
+        :rtype: bool
+
+        '''
+        return len(self.__references) > 0
+
+    def references(self, key):
+        '''Get the list of keys referenced by the value of the given key.
+
+        :param key: The key
+        :rtype: list of strings
+
+        '''
+        return list(self.__references.get(key, []))
+
+    def scan(self, data, prefix=None):
+        '''Collect the references contained in the given data.
+
+        :param data: The configuration data
+        :param prefix: The delimited key of the data, or None for the
+                       root of the configuration
+
+        '''
+        if prefix is not None and type(data) != type(dict()):
+            if self.__containsReference(data):
+                self.__addReferences(prefix, data)
+            return
+
+        stack = [(prefix, data)]
+        while len(stack) > 0:
+            path, node = stack.pop()
+            for key, value in node.iteritems():
+                key = key if path is None else \
+                    path + self.__delimiter + key
+                if type(value) == type(dict()):
+                    stack.append((key, value))
+                elif self.__containsReference(value):
+                    self.__addReferences(key, value)
+
+    def update(self, key, value):
+        '''Replace the references of the given key, and all of its sub keys,
+        with the references contained in its new value. Resolved values
+        which depend on the key are discarded.
+
+        :param key: The delimited key
+        :param value: The new value
+
+        '''
+        for path in self.__related(self.__references, self.__prefixes, key):
+            self.__removeReferences(path)
+
+        self.scan(value, key)
+        self.invalidate(key)
+
+    def invalidate(self, key):
+        '''Discard the resolved values which depend on the given key.
+
+        :param key: The delimited key which changed
+
+        '''
+        for changed in self.dependents([key]):
+            # Resolved containers include the changed value, and resolved
+            # sub keys may have been replaced. Only referencing keys, and
+            # their ancestors, are ever resolved.
+            ancestors = self.__ancestors(changed)
+            self.__resolved.pop(changed, None)
+            for ancestor in ancestors:
+                self.__resolved.pop(ancestor, None)
+            if len(self.__resolved) > 0:
+                depth = len(ancestors) + 1
+                for path in self.__prefixes.get(changed, ()):
+                    self.__resolved.pop(path, None)
+                    for ancestor in self.__ancestors(path)[depth:]:
+                        self.__resolved.pop(ancestor, None)
+
+    def dependents(self, keys):
+        '''Get the given keys, and the keys whose values reference them,
+        directly or through other references.
+
+        :param keys: The delimited keys which changed
+        :rtype: set of keys
+
+        '''
+        pending = list(keys)
+        visited = set()
+        while len(pending) > 0:
+            changed = pending.pop()
+            if changed in visited:
+                continue
+            visited.add(changed)
+
+            # Values referencing the changed key, the keys beneath it, or
+            # the keys containing it, have changed as well
+            for referenced in self.__related(self.__dependents,
+                                             self.__referencedPrefixes,
+                                             changed):
+                pending.extend(self.__dependents[referenced])
+            for ancestor in self.__ancestors(changed):
+                pending.extend(self.__dependents.get(ancestor, ()))
+
+        return visited
+
+    def checkCycles(self):
+        '''Ensure that no references are circular. Any new cycle passes
+        through a reference added since the last check, so only the
+        references reachable from those are visited.
+
+        :raises Exception: If a reference cycle exists
+
+        '''
+        # 0: unvisited, 1: in progress, 2: done
+        state = {}
+        for start in self.__unchecked:
+            if state.get(start, 0) != 0 or start not in self.__references:
+                continue
+
+            state[start] = 1
+            stack = [(start, iter(self.__edges(start)))]
+            while len(stack) > 0:
+                key, edges = stack[-1]
+                for target in edges:
+                    targetState = state.get(target, 0)
+                    if targetState == 1:
+                        cycle = [path for path, _ in stack]
+                        cycle = cycle[cycle.index(target):] + [target]
+                        raise Exception("Circular reference: %s" %
+                                        " -> ".join(cycle))
+                    elif targetState == 0:
+                        state[target] = 1
+                        stack.append((target, iter(self.__edges(target))))
+                        break
+                else:
+                    state[key] = 2
+                    stack.pop()
+
+        self.__unchecked = set()
+
+    def resolve(self, key, value, lookup):
+        '''Resolve the references contained in the value of the given key.
+
+        The lookup function is used to get the (resolved) values of
+        referenced keys, and must have the following signature::
+
+            lookup(key)
+
+        and raise a KeyError if the key does not exist.
+
+        :param key: The delimited key
+        :param value: The value of the key
+        :param lookup: The function used to get referenced values
+
+        :returns: The resolved value
+
+        :raises Exception: If a referenced key does not exist
+
+        '''
+        if key not in self.__references and key not in self.__prefixes:
+            return value
+
+        try:
+            return self.__resolved[key]
+        except KeyError:
+            pass
+
+        resolved = self.__resolveValue(key, value, lookup)
+        self.__resolved[key] = resolved
+        return resolved
+
+    def resolveValue(self, key, value, lookup):
+        '''Resolve all of the references contained in a value which is not
+        the current value of the key, such as the value of a key before it
+        was converted. The resolved value is not remembered.
+
+        :param key: The delimited key
+        :param value: The value
+        :param lookup: The function used to get referenced values
+
+        :returns: The resolved value
+
+        :raises Exception: If a referenced key does not exist
+
+        '''
+        return self.__resolveValue(key, value, lookup, True)
+
+    def resolveAll(self, data, lookup):
+        '''Resolve all of the references contained in the given
+        configuration data.
+
+        :param data: The root configuration data
+        :param lookup: The function used to get referenced values
+        :rtype: The resolved data
+
+        '''
+        if not self.hasReferences():
+            return data
+        return self.__resolveValue(None, data, lookup)
+
+    ##### Private functions
+
+    def __containsReference(self, value):
+        '''Determine if the given value contains any references.'''
+        if isinstance(value, basestring):
+            return "${" in value
+        elif type(value) == type(list()):
+            return any(self.__containsReference(item) for item in value)
+        elif type(value) == type(dict()):
+            return any(self.__containsReference(item)
+                       for item in value.itervalues())
+        return False
+
+    def __findReferences(self, value, references):
+        '''Collect the keys referenced within the given value.'''
+        if isinstance(value, basestring):
+            references.extend(self.__Reference.findall(value))
+        elif type(value) == type(list()):
+            for item in value:
+                self.__findReferences(item, references)
+        elif type(value) == type(dict()):
+            for item in value.itervalues():
+                self.__findReferences(item, references)
+        return references
+
+    def __addReferences(self, key, value):
+        '''Register the references contained in the value of a key.'''
+        references = self.__findReferences(value, [])
+        self.__references[key] = references
+        self.__unchecked.add(key)
+
+        for referenced in references:
+            dependents = self.__dependents.get(referenced)
+            if dependents is None:
+                dependents = self.__dependents[referenced] = set()
+                for ancestor in self.__ancestors(referenced):
+                    self.__referencedPrefixes.setdefault(
+                        ancestor, set()).add(referenced)
+            dependents.add(key)
+
+        for ancestor in self.__ancestors(key):
+            self.__prefixes.setdefault(ancestor, set()).add(key)
+
+    def __removeReferences(self, key):
+        '''Unregister the references of a key.'''
+        for referenced in self.__references.pop(key):
+            dependents = self.__dependents.get(referenced)
+            if dependents is not None:
+                dependents.discard(key)
+                if len(dependents) == 0:
+                    del self.__dependents[referenced]
+                    self.__discardPrefixes(self.__referencedPrefixes,
+                                           referenced)
+
+        self.__discardPrefixes(self.__prefixes, key)
+        self.__unchecked.discard(key)
+
+    def __discardPrefixes(self, prefixes, key):
+        '''Remove a key from the sets of keys beneath its ancestors.'''
+        for ancestor in self.__ancestors(key):
+            beneath = prefixes[ancestor]
+            beneath.discard(key)
+            if len(beneath) == 0:
+                del prefixes[ancestor]
+
+    def __related(self, keys, prefixes, key):
+        '''Get the list of the given key, and the keys beneath it, which
+        are in a dictionary of keys indexed by the given prefixes.'''
+        related = list(prefixes.get(key, ()))
+        if key in keys:
+            related.append(key)
+        return related
+
+    def __ancestors(self, key):
+        '''Get the list of ancestor keys of a delimited key.'''
+        ancestors = []
+        index = key.find(self.__delimiter)
+        while index != -1:
+            ancestors.append(key[:index])
+            index = key.find(self.__delimiter, index + 1)
+        return ancestors
+
+    def __edges(self, key):
+        '''Get the referencing keys which must be resolved in order to
+        resolve the given key.'''
+        edges = []
+        for referenced in self.__references.get(key, []):
+            edges.extend(self.__related(self.__references, self.__prefixes,
+                                        referenced))
+        return edges
+
+    def __resolveValue(self, key, value, lookup, nested=False):
+        '''Resolve all references contained within a value. Values nested
+        within lists are not registered individually, so they are resolved
+        unconditionally.'''
+        if isinstance(value, basestring):
+            return self.__interpolate(key, value, lookup)
+        elif type(value) == type(list()):
+            return [self.__resolveValue(key, item, lookup, True)
+                    for item in value]
+        elif type(value) == type(dict()):
+            resolved = {}
+            for subKey, item in value.iteritems():
+                if nested:
+                    item = self.__resolveValue(key, item, lookup, True)
+                else:
+                    path = subKey if key is None else \
+                        key + self.__delimiter + subKey
+                    if path in self.__references or path in self.__prefixes:
+                        item = self.resolve(path, item, lookup)
+                resolved[subKey] = item
+            return resolved
+        return value
+
+    def __interpolate(self, key, value, lookup):
+        '''Substitute the references contained in a string.'''
+        if "${" not in value:
+            return value
+
+        def referencedValue(referenced):
+            try:
+                return lookup(referenced)
+            except KeyError:
+                raise Exception("Undefined reference [%s] in key: %s" %
+                                (referenced, key))
+
+        # A single reference produces the referenced value itself
+        match = self.__Reference.match(value)
+        if match is not None and match.end() == len(value):
+            return referencedValue(match.group(1))
+
+        def substitute(match):
+            referenced = referencedValue(match.group(1))
+            if isinstance(referenced, basestring):
+                return referenced
+            return unicode(referenced)
+
+        return self.__Reference.sub(substitute, value)
@@ -1,5 +1,11 @@
+import os
+import time
+from collections import OrderedDict
+
 from configFile import ConfigFile
 from commandLine import CommandLineParser
+from schemaValidator import compileSchema
+from subscriptions import Subscriptions
 
 
 class JsonConfig:
@@ -45,16 +51,56 @@ class JsonConfig:
     This command line argument overrides the filename passed to the
     :func:`jsonconf.JsonConfig.parse` function.
 
+    Configuration values may also be overridden by environment variables
+    whose names start with a given prefix. The rest of the name is the key,
+    with sub keys separated by two underscores. For example, with the
+    'MYAPP_' prefix::
+
+        MYAPP_var1__var2=goodbye /usr/bin/program
+
+    Values set by :func:`jsonconf.JsonConfig.updateData` take precedence
+    over command line arguments, which take precedence over environment
+    variables, which take precedence over the JSON configuration file.
+    Overrides are kept separately from the parsed file, which is never
+    modified, so many JsonConfig objects with different overrides can share
+    the data of the same file.
+
     '''
     __ConfigFileKey = "configFile"
 
-    def __init__(self):
-        '''Create a JsonConfig object.'''
+    # Separates sub keys within the names of environment variables
+    __EnvDelimiter = "__"
+
+    def __init__(self, envPrefix=None, shared=False, executor=None):
+        '''Create a JsonConfig object.
+
+        :param envPrefix: The optional prefix of the names of environment
+                          variables which override configuration values
+        :param shared: True to share the parsed JSON configuration file with
+                       other configurations which parse the same file (see
+                       :func:`jsonconf.ConfigFile.parse`)
+        :param executor: The optional executor on which subscribers are
+                         called (see :class:`jsonconf.Subscriptions`)
+
+        '''
         self.__configFile = ConfigFile()
+        self.__subscriptions = Subscriptions(self.__configFile.delimiter(),
+                                             executor)
         self.__commandLine = CommandLineParser()
+        self.__envPrefix = envPrefix
+        self.__shared = shared
 
         self.__requiredKeys = []
+        self.__requiredKeySet = set()
         self.__keyConverters = {}
+        self.__validators = []
+
+        # Map every prefix of the keys of required keys, and key
+        # conversions, to the set of those keys beneath, or equal to, it
+        self.__rulePrefixes = {}
+
+        # The values set by updateData, in the order they were set
+        self.__updates = OrderedDict()
 
         # Allow the specification of the JSON configuration file via the
         # command line
@@ -65,7 +111,13 @@ class JsonConfig:
         '''Parse the given JSON configuration file, and the command
         line arguments.
 
-        :param filename: The path to the JSON configuration file
+        The configuration may also be loaded from a
+        :class:`jsonconf.ConfigSource`, or a list of sources and filenames,
+        which are fetched concurrently (see
+        :func:`jsonconf.ConfigFile.parse`).
+
+        :param filename: The path to the JSON configuration file, or the
+                         sources
         :param args: The list of command line arguments
 
         '''
@@ -78,16 +130,51 @@ class JsonConfig:
         filename = self.__commandLine.get(self.__ConfigFileKey, filename)
 
         # Parse the desired configuration file
-        self.__configFile.parse(filename)
+        self.__configFile.parse(filename, shared=self.__shared)
+        self.__prepare(self.__configFile)
 
-        # Command line arguments override the configuration file
-        clData = self.__commandLine.getKeywordArguments()
-        self.__configFile.updateData(clData)
+    def reload(self):
+        '''Re-parse the JSON configuration file, and re-apply the command
+        line arguments, required keys and key conversions.
 
-        # Ensure all required keys are specified, and attempt to convert
-        # all keys to their specified types
-        self.__configFile.requireKeys(self.__requiredKeys)
-        self.__configFile.convertKeys(self.__keyConverters)
+        The new configuration replaces the current configuration only once
+        it has been completely loaded and verified. If loading fails, the
+        current configuration remains in place. Subscribers to the changed
+        keys are called once the new configuration is in place.
+
+        :rtype: list of delimited keys whose values changed
+
+        :raises Exception: If no configuration file has been parsed
+        :raises Exception: If a subscriber fails, once all subscribers have
+                           been called
+
+        '''
+        changed = self.__configFile.reload(self.__prepare)
+        if len(changed) > 0 and len(self.__subscriptions) > 0:
+            self.__subscriptions.notify(changed)
+        return changed
+
+    def changes(self, interval=1.0):
+        '''Watch the JSON configuration file for changes.
+
+        This generator polls the configuration file every `interval`
+        seconds, reloads it whenever it is modified, and yields the list
+        of delimited keys whose values changed::
+
+            for changed in config.changes():
+                print "Changed keys: %s" % changed
+
+        :param interval: The number of seconds between polls
+
+        :rtype: generator of lists of delimited keys
+
+        '''
+        while True:
+            if self.__configFile.isModified():
+                changed = self.reload()
+                if len(changed) > 0:
+                    yield changed
+            time.sleep(interval)
 
     def convertKey(self, key, converterFn):
         '''Specify a conversion function to be applied to the given key
@@ -103,6 +190,7 @@ class JsonConfig:
         '''
         if converterFn is not None:
             self.__keyConverters[key] = converterFn
+            self.__indexRule(key)
 
     def requireKey(self, key, converterFn=None):
         '''Require the given key value pair to be specified by either
@@ -117,8 +205,157 @@ class JsonConfig:
 
         '''
         self.__requiredKeys.append(key)
+        self.__requiredKeySet.add(key)
+        self.__indexRule(key)
         self.convertKey(key, converterFn)
 
+    def validateSchema(self, schema):
+        '''Require the configuration to match a JSON Schema document (see
+        :class:`jsonconf.SchemaValidator`).
+
+        The configuration is validated after all overrides and key
+        conversions have been applied, when it is parsed, and on every
+        reload, which fails if the reloaded configuration does not match.
+        If a configuration has already been parsed, it is validated
+        immediately. The schema is compiled once, and shared with other
+        configurations which use an equal schema.
+
+        :param schema: The JSON Schema document
+
+        :raises Exception: If the schema is invalid
+        :raises Exception: If the parsed configuration does not match the
+                           schema, listing every error
+
+        '''
+        validator = compileSchema(schema)
+        if self.__configFile.filename() is not None:
+            self.__configFile.validateSchema(validator)
+        self.__validators.append(validator)
+
+    def updateData(self, keyValueMap):
+        '''Update configuration values, for example with overrides pushed
+        while the program is running. Updates take precedence over the
+        command line arguments, and are re-applied whenever the
+        configuration is parsed or reloaded.
+
+        Only the required keys, and key conversions, related to the updated
+        keys are applied again: those of the updated keys, of the keys
+        beneath them, and of the keys containing them, along with the rules
+        beneath those. When interpolation is enabled, the keys whose values
+        reference the updated keys count as updated as well. The keys of
+        these rules are indexed by their prefixes, so the cost of an update
+        depends on the number of keys it changes rather than on the number
+        of rules. Conversions are applied to the values the keys had before
+        they were converted (see :func:`jsonconf.ConfigFile.convertKeys`),
+        and schemas always validate the entire configuration. Subscribers to
+        the updated keys whose values changed are then called.
+
+        :param keyValueMap: Dictionary mapping keys to values
+
+        :raises Exception: If a key is beneath a value which is not a JSON
+                           object
+        :raises Exception: If a required key is no longer specified, a
+                           conversion fails, or the configuration no longer
+                           matches a schema
+        :raises Exception: If a subscriber fails, once all subscribers have
+                           been called
+        :raises Exception: If the configuration is frozen
+
+        '''
+        if self.__configFile.isFrozen():
+            raise Exception("Cannot update a frozen configuration")
+
+        # Remember the current values, to find the keys which change
+        if len(self.__subscriptions) > 0:
+            previous = [(key, self.__configFile.peekWithPresence(key))
+                        for key in keyValueMap]
+
+        for key, value in keyValueMap.iteritems():
+            # Keep the updates in the order they were made
+            self.__updates.pop(key, None)
+            self.__updates[key] = value
+        self.__configFile.updateData(keyValueMap)
+
+        keys = self.__affectedRules(
+            self.__configFile.referencingKeys(keyValueMap))
+        requiredKeys = sorted(key for key in keys
+                              if key in self.__requiredKeySet)
+        converters = dict((key, self.__keyConverters[key])
+                          for key in keys if key in self.__keyConverters)
+
+        self.__configFile.requireKeys(requiredKeys)
+        self.__configFile.convertKeys(converters)
+
+        for validator in self.__validators:
+            self.__configFile.validateSchema(validator)
+
+        if len(self.__subscriptions) > 0:
+            changed = [key for key, value in previous
+                       if self.__configFile.peekWithPresence(key) != value]
+            if len(changed) > 0:
+                self.__subscriptions.notify(changed)
+
+    def subscribe(self, prefix, callback):
+        '''Subscribe a function to changes of the keys related to a prefix,
+        which are the prefix itself, the keys beneath it, and the keys
+        containing it. Subscribers are called when
+        :func:`jsonconf.JsonConfig.updateData`, or a reload, changes any of
+        these keys (see :class:`jsonconf.Subscriptions`). Values which
+        change only because a reference they contain was updated are not
+        considered changed.
+
+        The function must have the following signature, and is called with
+        the list of changed keys related to the prefix::
+
+            callback(changedKeys)
+
+        :param prefix: The delimited key, or None for every key
+        :param callback: The function
+
+        :returns: The subscription, which may be passed to
+                  :func:`jsonconf.JsonConfig.unsubscribe`
+
+        '''
+        return self.__subscriptions.subscribe(prefix, callback)
+
+    def unsubscribe(self, subscription):
+        '''Remove a subscription.
+
+        :param subscription: The subscription returned by
+                             :func:`jsonconf.JsonConfig.subscribe`
+
+        '''
+        self.__subscriptions.unsubscribe(subscription)
+
+    def freeze(self, packed=False):
+        '''Freeze the configuration before forking worker processes, so the
+        children share its memory with the parent. A frozen configuration
+        cannot be updated or reloaded until it is parsed again (see
+        :func:`jsonconf.ConfigFile.freeze`)::
+
+            config.parse("config.json", sys.argv)
+            config.freeze(packed=True)
+            for index in range(workers):
+                if os.fork() == 0:
+                    serve(config)
+
+        :param packed: True to pack the configuration data into flat
+                       buffers, which lookups never write to
+
+        :raises Exception: If the configuration is packed, and contains
+                           values which are not JSON values
+
+        '''
+        self.__configFile.freeze(packed)
+
+    def isFrozen(self):
+        '''Determine if the configuration is frozen.
+
+        :rtype: bool
+
+        '''
+        return self.__configFile.isFrozen()
+
     def renameCommandLineArguments(self, newKey, keys):
         '''Rename any command line arguments in the given list to
         the given new key name.
@@ -129,6 +366,117 @@ class JsonConfig:
         '''
         self.__commandLine.renameKeys(newKey, keys)
 
+    def enableInterpolation(self, enabled=True):
+        '''Enable, or disable, the interpolation of ${key} references
+        contained in string values. Interpolation is disabled by default.
+
+        For example, given the following JSON configuration file::
+
+            {
+                "host": "db.example.com",
+                "url": "postgres://${host}/main"
+            }
+
+        The following is true::
+
+            jsonConf.get("url") == "postgres://db.example.com/main"
+
+        References are resolved after command line arguments are applied,
+        so overriding 'host' on the command line also changes 'url'.
+
+        :param enabled: True to enable interpolation
+
+        '''
+        self.__configFile.enableInterpolation(enabled)
+
+    def enableInstrumentation(self, sampleInterval=1):
+        '''Start collecting statistics about the usage of the configuration,
+        including per key access counts, accesses which fell back to the
+        default value, and the time spent parsing, updating, requiring, and
+        converting keys. Instrumentation is disabled by default.
+
+        :param sampleInterval: Record one out of every `sampleInterval`
+                               key accesses
+        :rtype: The :class:`jsonconf.Instrumentation` object
+
+        '''
+        return self.__configFile.enableInstrumentation(sampleInterval)
+
+    def disableInstrumentation(self):
+        '''Stop collecting statistics about the usage of the
+        configuration.
+
+        '''
+        self.__configFile.disableInstrumentation()
+
+    def instrumentation(self):
+        '''The statistics collected about the usage of the configuration.
+
+        :rtype: The :class:`jsonconf.Instrumentation` object, or None if
+                instrumentation is disabled
+
+        '''
+        return self.__configFile.instrumentation()
+
+    def enableStrictMode(self):
+        '''Start recording every key read from the configuration, the keys
+        read which do not exist, and the keys overridden by command line
+        arguments, or environment variables, which are not in the
+        configuration file (see :class:`jsonconf.KeyAudit`). Strict mode is
+        disabled by default, and should be enabled before parsing, so that
+        overrides are checked.
+
+        Unknown keys, which are often misspelled, are reported along with
+        the existing keys nearest to them by
+        :func:`jsonconf.JsonConfig.checkKeys`::
+
+            config.enableStrictMode()
+            config.parse("config.json", sys.argv)
+            size = config.get("db.pool_szie", 10)
+            config.checkKeys()  # db.pool_szie (read), did you mean: ...
+
+        :rtype: The :class:`jsonconf.KeyAudit` object
+
+        '''
+        return self.__configFile.enableStrictMode()
+
+    def disableStrictMode(self):
+        '''Stop recording the keys read from the configuration.'''
+        self.__configFile.disableStrictMode()
+
+    def keyAudit(self):
+        '''The keys recorded in strict mode.
+
+        :rtype: The :class:`jsonconf.KeyAudit` object, or None if strict
+                mode is disabled
+
+        '''
+        return self.__configFile.keyAudit()
+
+    def suggestKeys(self, key, maxDistance=2, limit=3):
+        '''Find the existing keys nearest to a key which may be misspelled
+        (see :func:`jsonconf.ConfigFile.suggestKeys`).
+
+        :param key: The delimited key
+        :param maxDistance: The maximum total edit distance of a suggestion
+        :param limit: The maximum number of suggestions
+
+        :rtype: list of delimited keys, nearest first
+
+        '''
+        return self.__configFile.suggestKeys(key, maxDistance, limit)
+
+    def checkKeys(self):
+        '''Check that no unknown keys were recorded in strict mode (see
+        :func:`jsonconf.ConfigFile.checkKeys`).
+
+        :raises Exception: If strict mode is disabled
+        :raises Exception: If any unknown keys were recorded, listing every
+                           one of them with suggested keys
+
+        '''
+        self.__configFile.checkKeys()
+
     def hasKey(self, key):
         '''Determine if the given configuration key is specified.
 
@@ -147,6 +495,166 @@ class JsonConfig:
         '''
         return self.__configFile.get(key, default)
 
+    def fingerprint(self, key=None):
+        '''Get a content hash of the value of the given key, or of the
+        entire configuration (see :func:`jsonconf.ConfigFile.fingerprint`).
+
+        :param key: The key, or None for the entire configuration
+        :rtype: hexadecimal string, or None if the key does not exist
+
+        '''
+        return self.__configFile.fingerprint(key)
+
+    def iterItems(self, prefix=None, maxDepth=None, sort=False):
+        '''Iterate over the delimited keys, and values, of every leaf of the
+        configuration (see :func:`jsonconf.ConfigFile.iterItems`).
+
+        :param prefix: The delimited key of the JSON object to iterate, or
+                       None for the entire configuration
+        :param maxDepth: The optional number of levels beneath the prefix
+                         to descend into
+        :param sort: True to produce keys in sorted order
+
+        :rtype: generator of (key, value) tuples
+
+        '''
+        return self.__configFile.iterItems(prefix, maxDepth, sort)
+
+    def flatten(self, prefix=None, maxDepth=None):
+        '''Get the leaves of the configuration as a dictionary mapping
+        delimited keys to values (see :func:`jsonconf.ConfigFile.flatten`).
+
+        :param prefix: The delimited key of the JSON object to flatten, or
+                       None for the entire configuration
+        :param maxDepth: The optional number of levels beneath the prefix
+                         to descend into
+
+        :rtype: dictionary
+
+        '''
+        return self.__configFile.flatten(prefix, maxDepth)
+
+    def query(self, pattern):
+        '''Find all of the values whose keys match the given pattern (see
+        :func:`jsonconf.ConfigFile.query`).
+
+        :param pattern: The key path pattern
+        :rtype: generator of (key, value) tuples
+
+        :raises Exception: If the pattern is invalid
+
+        '''
+        return self.__configFile.query(pattern)
+
+    def dump(self, fd, canonical=False, indent=None):
+        '''Write the configuration, including all command line overrides and
+        conversions, to a file object as JSON.
+
+        See :func:`jsonconf.ConfigFile.dump` for a description of the
+        canonical form.
+
+        :param fd: The file object
+        :param canonical: True to write the canonical form
+        :param indent: The optional JSON indentation level
+
+        '''
+        self.__configFile.dump(fd, canonical, indent)
+
+    def dumps(self, canonical=False, indent=None):
+        '''Get the configuration, including all command line overrides and
+        conversions, as a JSON string.
+
+        :param canonical: True to produce the canonical form
+        :param indent: The optional JSON indentation level
+
+        :rtype: string
+
+        '''
+        return self.__configFile.dumps(canonical, indent)
+
+    def getInt(self, key, default=None):
+        '''Get the value of the given configuration key as an integer
+        (see :func:`jsonconf.ConfigFile.getInt`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: int
+
+        '''
+        return self.__configFile.getInt(key, default)
+
+    def getFloat(self, key, default=None):
+        '''Get the value of the given configuration key as a float
+        (see :func:`jsonconf.ConfigFile.getFloat`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: float
+
+        '''
+        return self.__configFile.getFloat(key, default)
+
+    def getBool(self, key, default=None):
+        '''Get the value of the given configuration key as a boolean
+        (see :func:`jsonconf.ConfigFile.getBool`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: bool
+
+        '''
+        return self.__configFile.getBool(key, default)
+
+    def getDuration(self, key, default=None):
+        '''Get the value of the given configuration key as a number of seconds
+        (see :func:`jsonconf.ConfigFile.getDuration`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: float
+
+        '''
+        return self.__configFile.getDuration(key, default)
+
+    def getSize(self, key, default=None):
+        '''Get the value of the given configuration key as a number of bytes
+        (see :func:`jsonconf.ConfigFile.getSize`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: int
+
+        '''
+        return self.__configFile.getSize(key, default)
+
+    def getWithPresence(self, key, default=None):
+        '''Get the value of the given configuration key, and whether the key
+        exists (see :func:`jsonconf.ConfigFile.getWithPresence`).
+
+        :param key: The key
+        :param default: The default value returned if the key does not exist
+
+        :rtype: tuple of (bool, value)
+
+        '''
+        return self.__configFile.getWithPresence(key, default)
+
+    def proxy(self):
+        '''Get a proxy which provides attribute style access to the
+        configuration values (see :class:`jsonconf.ConfigProxy`)::
+
+            config.proxy().services.payments.db.host
+
+        :rtype: :class:`jsonconf.ConfigProxy`
+
+        '''
+        return self.__configFile.proxy()
+
     def hasCommandLineArgument(self, arg):
         '''Determine if the given command line argument was specified.
 
@@ -185,3 +693,110 @@ class JsonConfig:
 
         '''
         return self.__commandLine.getExtraArguments()
+
+    ##### Private functions
+
+    def __prepare(self, configFile):
+        '''Apply the environment variables, command line arguments,
+        updates, required keys, key conversions and schemas to the given
+        configuration.
+
+        :param configFile: The :class:`jsonconf.ConfigFile` to prepare
+
+        '''
+        # Environment variables, and then command line arguments, override
+        # the configuration file. In strict mode, overrides of keys which
+        # are not in the file are recorded.
+        audit = configFile.keyAudit()
+        if self.__envPrefix is not None:
+            envData = self.__environmentOverrides(configFile.delimiter())
+            if audit is not None:
+                self.__auditOverrides(configFile, audit, envData,
+                                      "environment")
+            configFile.updateData(envData)
+
+        clData = self.__commandLine.getKeywordArguments()
+        if audit is not None:
+            self.__auditOverrides(configFile, audit, clData, "command line")
+        configFile.updateData(clData)
+        if len(self.__updates) > 0:
+            configFile.updateData(self.__updates)
+
+        # Ensure all required keys are specified, and attempt to convert
+        # all keys to their specified types
+        configFile.requireKeys(self.__requiredKeys)
+        configFile.convertKeys(self.__keyConverters)
+
+        for validator in self.__validators:
+            configFile.validateSchema(validator)
+
+    def __auditOverrides(self, configFile, audit, keyValueMap, source):
+        '''Record the overridden keys which do not exist in the given
+        configuration, other than the key naming the configuration file.
+
+        :param configFile: The :class:`jsonconf.ConfigFile`
+        :param audit: The :class:`jsonconf.KeyAudit`
+        :param keyValueMap: Dictionary mapping keys to values
+        :param source: The description of where the overrides came from
+
+        '''
+        for key in keyValueMap:
+            if key != self.__ConfigFileKey and not configFile.hasKey(key):
+                audit.recordUnknown(key, source)
+
+    def __indexRule(self, key):
+        '''Index the key of a required key, or key conversion, by each of
+        its prefixes.
+
+        :param key: The key
+
+        '''
+        delimiter = self.__configFile.delimiter()
+        prefix = None
+        for part in key.split(delimiter):
+            prefix = part if prefix is None else prefix + delimiter + part
+            self.__rulePrefixes.setdefault(prefix, set()).add(key)
+
+    def __affectedRules(self, keys):
+        '''Get the keys of the required keys, and key conversions, whose
+        values depend on any of the given keys. These are the keys which
+        are equal to, beneath, or contain, the given keys, and the keys
+        beneath the rules containing them, whose values are replaced when
+        those rules are applied again.
+
+        :param keys: The updated keys
+        :rtype: set of keys
+
+        '''
+        delimiter = self.__configFile.delimiter()
+        affected = set()
+        for key in keys:
+            affected.update(self.__rulePrefixes.get(key, ()))
+
+            # Keys containing the key are the ancestors of the key which
+            # are themselves rules
+            prefix = None
+            for part in key.split(delimiter)[:-1]:
+                prefix = part if prefix is None else prefix + delimiter + part
+                rules = self.__rulePrefixes.get(prefix)
+                if rules is None:
+                    break
+                if prefix in rules:
+                    affected.update(rules)
+                    break
+        return affected
+
+    def __environmentOverrides(self, delimiter):
+        '''Get the configuration values specified by environment variables.
+
+        :param delimiter: The delimiter used to access sub keys
+        :rtype: dictionary mapping delimited keys to values
+
+        '''
+        overrides = {}
+        for name, value in os.environ.iteritems():
+            if name.startswith(self.__envPrefix) and \
+                    len(name) > len(self.__envPrefix):
+                key = name[len(self.__envPrefix):]
+                overrides[key.replace(self.__EnvDelimiter, delimiter)] = value
+        return overrides
@@ -0,0 +1,70 @@
+class KeyAudit:
+    '''The KeyAudit class records the keys read from a configuration in
+    strict mode, and the keys which did not exist when they were read or
+    overridden, which are often misspelled::
+
+        config = JsonConfig()
+        audit = config.enableStrictMode()
+        config.parse(filename, sys.argv)
+
+        ...
+
+        print audit.unknownKeys()
+
+    Recording a read only adds the key to a set, so strict mode may be left
+    enabled in production. Suggestions for the unknown keys are found when
+    they are checked (see :func:`jsonconf.ConfigFile.checkKeys`).
+
+    '''
+    # The source of unknown keys which were read
+    Read = "read"
+
+    def __init__(self):
+        '''Create an empty KeyAudit.'''
+        self.reset()
+
+    def reset(self):
+        '''Discard all of the recorded keys.'''
+        self.__reads = set()
+
+        # Map unknown keys to the source which first used them
+        self.__unknown = {}
+
+    def recordRead(self, key, found):
+        '''Record a read of the given key.
+
+        :param key: The key
+        :param found: True if the key exists
+
+        '''
+        self.__reads.add(key)
+        if not found and key not in self.__unknown:
+            self.__unknown[key] = self.Read
+
+    def recordUnknown(self, key, source):
+        '''Record a key which does not exist, such as a command line
+        argument which overrides a key that is not in the configuration file.
+
+        :param key: The key
+        :param source: The description of where the key was used, such
+                       as "command line"
+
+        '''
+        if key not in self.__unknown:
+            self.__unknown[key] = source
+
+    def readKeys(self):
+        '''Get the keys which have been read.
+
+        :rtype: sorted list of strings
+
+        '''
+        return sorted(self.__reads)
+
+    def unknownKeys(self):
+        '''Get the keys which did not exist when they were used.
+
+        :rtype: sorted list of (key, source) tuples
+
+        '''
+        return sorted(self.__unknown.iteritems())
@@ -0,0 +1,197 @@
+class KeyIndex:
+    '''The KeyIndex class finds the keys of a configuration which are
+    nearest to a misspelled key::
+
+        index = KeyIndex({"db": {"pool_size": 10, "host": "localhost"}})
+        index.suggest("db.pool_szie")  # ["db.pool_size"]
+
+    The distance between two keys is the sum of the edit (Levenshtein)
+    distances between their sub keys. Rather than comparing the key with
+    every path of the configuration, the distinct sub keys of all of its
+    JSON objects are indexed in a BK-tree, which finds the sub keys near a
+    given sub key while only visiting a small part of the tree. The
+    configuration is then walked one sub key at a time, only following the
+    sub keys which exist, or are near to the sub key of the misspelled key.
+    The cost of a suggestion therefore depends on the number of distinct sub
+    keys, rather than on the number of paths.
+
+    The index refers to the configuration data, which must not be changed
+    while it is in use.
+
+    '''
+
+    def __init__(self, data, delimiter='.'):
+        '''
+        :param data: The configuration data
+        :param delimiter: The delimiter used to access sub keys
+
+        '''
+        self.__data = data
+        self.__delimiter = delimiter
+
+        # Collect the sub keys of every JSON object
+        subKeys = set()
+        stack = [data] if type(data) == type(dict()) else []
+        while len(stack) > 0:
+            node = stack.pop()
+            subKeys.update(node)
+            stack.extend([value for value in node.itervalues()
+                          if type(value) == type(dict())])
+
+        # The nodes of the BK-tree are [sub key, {distance: child}] lists,
+        # where every sub key beneath a child is at the given distance from
+        # the node's sub key
+        self.__root = None
+        for subKey in sorted(subKeys):
+            if self.__root is None:
+                self.__root = [subKey, {}]
+                continue
+
+            node = self.__root
+            while True:
+                distance = editDistance(subKey, node[0])
+                child = node[1].get(distance)
+                if child is None:
+                    node[1][distance] = [subKey, {}]
+                    break
+                node = child
+
+        self.__size = len(subKeys)
+
+    def __len__(self):
+        '''Get the number of distinct sub keys indexed.
+
+        :rtype: int
+
+        '''
+        return self.__size
+
+    def nearSubKeys(self, subKey, maxDistance):
+        '''Find the indexed sub keys within the given edit distance of a
+        sub key.
+
+        :param subKey: The sub key
+        :param maxDistance: The maximum edit distance
+
+        :rtype: list of (distance, sub key) tuples
+
+        '''
+        found = []
+        if self.__root is None:
+            return found
+
+        stack = [self.__root]
+        while len(stack) > 0:
+            node = stack.pop()
+            distance = editDistance(subKey, node[0])
+            if distance <= maxDistance:
+                found.append((distance, node[0]))
+
+            # By the triangle inequality, only the children whose distance
+            # from this node is close to the sub key's can hold matches
+            for childDistance, child in node[1].iteritems():
+                if abs(childDistance - distance) <= maxDistance:
+                    stack.append(child)
+
+        return found
+
+    def suggest(self, key, maxDistance=2, limit=3):
+        '''Find the existing keys nearest to the given key, other than the
+        key itself.
+
+        :param key: The delimited key
+        :param maxDistance: The maximum total edit distance of a suggestion
+        :param limit: The maximum number of suggestions
+
+        :rtype: list of delimited keys, nearest first
+
+        '''
+        delimiter = self.__delimiter
+        subKeys = key.split(delimiter)
+
+        # Map the index of each sub key to the indexed sub keys near it
+        near = {}
+
+        suggestions = []
+        stack = [(self.__data, 0, None, 0)]
+        while len(stack) > 0:
+            node, index, path, cost = stack.pop()
+            if index == len(subKeys):
+                if cost > 0:
+                    suggestions.append((cost, path))
+                continue
+            if type(node) != type(dict()):
+                continue
+
+            subKey = subKeys[index]
+            if subKey in node:
+                stack.append((node[subKey], index + 1,
+                              self.__join(path, subKey), cost))
+            if cost >= maxDistance:
+                continue
+
+            candidates = near.get(index)
+            if candidates is None:
+                candidates = near[index] = self.nearSubKeys(subKey,
+                                                            maxDistance)
+            for distance, candidate in candidates:
+                if distance > 0 and cost + distance <= maxDistance and \
+                        candidate in node:
+                    stack.append((node[candidate], index + 1,
+                                  self.__join(path, candidate),
+                                  cost + distance))
+
+        suggestions.sort()
+        return [path for cost, path in suggestions[:limit]]
+
+    ##### Private functions
+
+    def __join(self, path, subKey):
+        '''Append a sub key to a delimited key.
+
+        :param path: The delimited key, or None
+        :param subKey: The sub key
+
+        :rtype: string
+
+        '''
+        return subKey if path is None else path + self.__delimiter + subKey
+
+
+def editDistance(first, second):
+    '''Get the Levenshtein distance between two strings, which is the
+    number of single character insertions, deletions and substitutions
+    which change one into the other.
+
+    :param first: The first string
+    :param second: The second string
+
+    :rtype: int
+
+    '''
+    # Common prefixes and suffixes do not change the distance
+    start = 0
+    limit = min(len(first), len(second))
+    while start < limit and first[start] == second[start]:
+        start += 1
+    end = 0
+    limit -= start
+    while end < limit and first[-1 - end] == second[-1 - end]:
+        end += 1
+    first = first[start:len(first) - end]
+    second = second[start:len(second) - end]
+
+    if len(first) < len(second):
+        first, second = second, first
+    if len(second) == 0:
+        return len(first)
+
+    previous = range(len(second) + 1)
+    for row, char in enumerate(first):
+        current = [row + 1]
+        for column, other in enumerate(second):
+            current.append(min(previous[column + 1] + 1,
+                               current[column] + 1,
+                               previous[column] + (char != other)))
+        previous = current
+    return previous[-1]
@@ -0,0 +1,200 @@
+import json
+from array import array
+
+
+class PackedData:
+    '''The PackedData class stores configuration data in a few flat buffers
+    rather than as a tree of Python objects, and decodes the value of a key
+    each time it is looked up::
+
+        packed = PackedData({"db": {"host": "localhost", "port": 5432}})
+        packed.get("db.port")  # 5432
+        packed.get("db")  # {"host": "localhost", "port": 5432}
+
+    The data is encoded as a single JSON string, and the span of the value
+    of every delimited key within it is recorded in an index, which is an
+    open addressed hash table kept in arrays of integers. Looking up a key
+    only reads the buffers, and only creates new objects, so the reference
+    counts of the packed data are never changed. The pages holding it
+    therefore stay shared with the parent when a process forks, however
+    many keys the child looks up.
+
+    Keys which contain the delimiter cannot be looked up, as with
+    :class:`jsonconf.ConfigFile`, and are not indexed.
+
+    '''
+    # The number of integers stored in the index entry of each key: the
+    # start and end of the key, and the start and end of its value
+    __EntrySize = 4
+
+    def __init__(self, data, delimiter='.'):
+        '''
+        :param data: The configuration data, which must only contain JSON
+                     values
+        :param delimiter: The delimiter used to access sub keys
+
+        :raises Exception: If the data contains values which are not JSON
+                           values
+
+        '''
+        self.__delimiter = delimiter
+
+        chunks = []
+        keys = []
+        encode = json.JSONEncoder(separators=(',', ':')).encode
+        try:
+            self.__encode(data, None, encode, chunks, keys, 0)
+        except (TypeError, ValueError), e:
+            raise Exception("Only JSON values can be packed: %s" % e)
+        self.__text = "".join(chunks)
+
+        # The table has at least twice as many slots as there are keys, so
+        # probing always finds an empty slot
+        size = 1
+        while size < 2 * len(keys) + 1:
+            size *= 2
+        mask = size - 1
+
+        # Slots hold the number of the entry of their key plus one, or zero
+        slots = array('l', [0]) * size
+        entries = array('l')
+        packedKeys = []
+        offset = 0
+        for number, (key, start, end) in enumerate(keys):
+            entries.extend((offset, offset + len(key), start, end))
+            packedKeys.append(key)
+            offset += len(key)
+
+            slot = hash(key) & mask
+            while slots[slot] != 0:
+                slot = (slot + 1) & mask
+            slots[slot] = number + 1
+
+        self.__keys = "".join(packedKeys)
+        self.__entries = entries
+        self.__slots = slots
+
+    def __len__(self):
+        '''Get the number of keys which can be looked up.
+
+        :rtype: int
+
+        '''
+        return len(self.__entries) // self.__EntrySize
+
+    def get(self, key, default=None):
+        '''Get the value specified by the given delimited key, decoded from
+        the packed data.
+
+        :param key: The key
+        :param default: The default value to return if the key does not exist
+
+        :returns: The value for the given key
+
+        '''
+        if isinstance(key, unicode):
+            key = key.encode("utf-8")
+
+        slots = self.__slots
+        entries = self.__entries
+        mask = len(slots) - 1
+
+        slot = hash(key) & mask
+        number = slots[slot]
+        while number != 0:
+            base = (number - 1) * self.__EntrySize
+            start = entries[base]
+            end = entries[base + 1]
+            if end - start == len(key) and self.__keys[start:end] == key:
+                return json.loads(
+                    self.__text[entries[base + 2]:entries[base + 3]])
+            slot = (slot + 1) & mask
+            number = slots[slot]
+
+        return default
+
+    def hasKey(self, key):
+        '''Determine if the given delimited key exists.
+
+        :param key: The key
+        :rtype: bool
+
+        '''
+        return self.get(key, self) is not self
+
+    def unpack(self):
+        '''Decode all of the packed data.
+
+        :rtype: The configuration data
+
+        '''
+        return json.loads(self.__text)
+
+    def size(self):
+        '''Get the number of bytes used by the packed buffers.
+
+        :rtype: int
+
+        '''
+        return len(self.__text) + len(self.__keys) + \
+            (len(self.__entries) + len(self.__slots)) * \
+            self.__entries.itemsize
+
+    ##### Private functions
+
+    def __encode(self, value, path, encode, chunks, keys, offset):
+        '''Encode a value as JSON, recording the spans of the values of the
+        keys of the JSON objects it contains.
+
+        :param value: The value
+        :param path: The utf-8 delimited key of the value, None for the
+                     entire configuration, or False if the value cannot
+                     be looked up
+        :param encode: The JSON encoding function
+        :param chunks: The list to which encoded chunks are appended
+        :param keys: The list to which (key, start, end) tuples are appended
+        :param offset: The offset at which the value is encoded
+
+        :rtype: int, the offset following the encoded value
+
+        :raises TypeError: If a value, or a key, is not a JSON value
+
+        '''
+        if type(value) != type(dict()):
+            text = encode(value)
+            chunks.append(text)
+            return offset + len(text)
+
+        chunks.append("{")
+        offset += 1
+        delimiter = self.__delimiter
+        first = True
+        for subKey, subValue in value.iteritems():
+            if not isinstance(subKey, basestring):
+                raise TypeError("Key %r is not a string" % (subKey,))
+
+            if not first:
+                chunks.append(",")
+                offset += 1
+            first = False
+
+            text = encode(subKey) + ":"
+            chunks.append(text)
+            offset += len(text)
+
+            if path is False or delimiter in subKey:
+                subPath = False
+            else:
+                if isinstance(subKey, unicode):
+                    subKey = subKey.encode("utf-8")
+                subPath = subKey if path is None \
+                    else path + delimiter + subKey
+
+            start = offset
+            offset = self.__encode(subValue, subPath, encode, chunks, keys,
+                                   offset)
+            if subPath is not False:
+                keys.append((subPath, start, offset))
+
+        chunks.append("}")
+        return offset + 1
@@ -0,0 +1,188 @@
+import re
+
+
+class PathQuery:
+    '''The PathQuery class matches a key path pattern against configuration
+    data. Patterns are delimited keys whose parts may be:
+
+    * a key, which matches that key of a JSON object
+    * `*`, which matches every key of a JSON object
+    * `**`, which matches any number of nested keys and list items,
+      including none
+    * followed by any number of list indices, such as `[0]`, or `[*]`
+      which matches every item of a list
+
+    For example, given the following JSON::
+
+        {
+            "services": {
+                "payments": {
+                    "db": {"pool_size": 10},
+                    "replicas": [{"host": "a"}, {"host": "b"}]
+                },
+                "billing": {
+                    "db": {"pool_size": 4}
+                }
+            }
+        }
+
+    The pattern 'services.*.db.pool_size' (or '**.pool_size') matches the
+    'services.payments.db.pool_size' and 'services.billing.db.pool_size'
+    keys, and 'services.payments.replicas[*].host' matches the
+    'services.payments.replicas[0].host' and
+    'services.payments.replicas[1].host' keys.
+
+    The pattern is compiled once into a list of steps, and the data is
+    only visited where the steps can still match, so a query which names
+    its leading keys never visits the rest of the configuration.
+
+    '''
+    __Part = re.compile(r"^([^\[\]]*)((?:\[(?:\d+|\*)\])*)$")
+    __Indices = re.compile(r"\[(\d+|\*)\]")
+
+    # The kinds of steps
+    __Key = 0
+    __AnyKey = 1
+    __Index = 2
+    __AnyIndex = 3
+    __Descend = 4
+
+    def __init__(self, pattern, delimiter='.'):
+        '''
+        :param pattern: The key path pattern
+        :param delimiter: The delimiter used to access sub keys
+
+        :raises Exception: If the pattern is invalid
+
+        '''
+        self.__pattern = pattern
+        self.__delimiter = delimiter
+        self.__steps = self.__compile(pattern)
+
+        # Patterns containing several ** can reach the same value in
+        # several ways
+        self.__unique = sum(1 for kind, _ in self.__steps
+                            if kind == self.__Descend) > 1
+
+    def pattern(self):
+        '''The key path pattern.
+
+        :rtype: string
+
+        '''
+        return self.__pattern
+
+    def match(self, data, resolve=None):
+        '''Find the values within the given data which match the pattern.
+
+        Keys of matched values are delimited, and list items are written
+        as indices, for example: 'services.payments.replicas[0].host'.
+
+        The optional resolve function is applied to each value the pattern
+        visits before it is matched, so that only those values need to be
+        resolved. It must have the following signature::
+
+            resolve(key, value)
+
+        :param data: The root configuration data
+        :param resolve: The optional function which returns the value to
+                        match in place of a visited value
+        :rtype: generator of (key, value) tuples
+
+        '''
+        steps = self.__steps
+        count = len(steps)
+        emitted = set() if self.__unique else None
+
+        stack = [(0, None, data)]
+        while len(stack) > 0:
+            position, path, value = stack.pop()
+            if resolve is not None and path is not None:
+                value = resolve(path, value)
+            if position == count:
+                if emitted is not None:
+                    if path in emitted:
+                        continue
+                    emitted.add(path)
+                yield path, value
+                continue
+
+            kind, argument = steps[position]
+            if kind == self.__Key:
+                if type(value) == type(dict()) and argument in value:
+                    stack.append((position + 1, self.__child(path, argument),
+                                  value[argument]))
+            elif kind == self.__AnyKey:
+                if type(value) == type(dict()):
+                    for key in sorted(value, reverse=True):
+                        stack.append((position + 1, self.__child(path, key),
+                                      value[key]))
+            elif kind == self.__Index:
+                if type(value) == type(list()) and argument < len(value):
+                    stack.append((position + 1, "%s[%d]" % (path, argument),
+                                  value[argument]))
+            elif kind == self.__AnyIndex:
+                if type(value) == type(list()):
+                    for index in xrange(len(value) - 1, -1, -1):
+                        stack.append((position + 1, "%s[%d]" % (path, index),
+                                      value[index]))
+            else:
+                # Either descend another level, or match the next step here
+                if type(value) == type(dict()):
+                    for key in sorted(value, reverse=True):
+                        stack.append((position, self.__child(path, key),
+                                      value[key]))
+                elif type(value) == type(list()):
+                    for index in xrange(len(value) - 1, -1, -1):
+                        stack.append((position, "%s[%d]" % (path, index),
+                                      value[index]))
+                stack.append((position + 1, path, value))
+
+    ##### Private functions
+
+    def __child(self, path, key):
+        '''Get the delimited key of a sub key.'''
+        if path is None:
+            return key
+        return path + self.__delimiter + key
+
+    def __compile(self, pattern):
+        '''Compile a pattern into its list of (kind, argument) steps.
+
+        :param pattern: The key path pattern
+        :rtype: list of tuples
+
+        :raises Exception: If the pattern is invalid
+
+        '''
+        steps = []
+        for part in pattern.split(self.__delimiter):
+            match = self.__Part.match(part)
+            if match is None or match.group(1) == "":
+                raise Exception("Invalid query: %s" % pattern)
+
+            name, indices = match.groups()
+            if name == "**":
+                if indices != "":
+                    raise Exception("Invalid query: %s" % pattern)
+
+                # Consecutive ** match the same keys as a single **
+                if len(steps) == 0 or steps[-1][0] != self.__Descend:
+                    steps.append((self.__Descend, None))
+                continue
+            elif name == "*":
+                steps.append((self.__AnyKey, None))
+            else:
+                steps.append((self.__Key, name))
+
+            for index in self.__Indices.findall(indices):
+                if index == "*":
+                    steps.append((self.__AnyIndex, None))
+                else:
+                    steps.append((self.__Index, int(index)))
+
+        # The root itself has no key, so cannot be matched
+        if steps == [(self.__Descend, None)]:
+            raise Exception("Invalid query: %s" % pattern)
+
+        return steps
@@ -0,0 +1,677 @@
+import json
+import re
+from hashlib import sha1
+from threading import Lock
+
+
+class SchemaValidator:
+    '''The SchemaValidator class validates configuration data against a
+    JSON Schema document. The validation keywords of JSON Schema draft 7
+    are supported, along with references to other parts of the same schema
+    document ("$ref": "#/definitions/..."). Formats are not checked.
+
+    The schema is compiled once into a tree of functions, one for each
+    schema object, which check a value and descend only into the parts of
+    the data constrained by the schema. Validation is a single pass over
+    the data which collects every error, rather than stopping at the first.
+    For example::
+
+        validator = SchemaValidator({
+            "type": "object",
+            "properties": {
+                "db": {
+                    "type": "object",
+                    "properties": {"port": {"type": "integer"}},
+                    "required": ["host"]
+                }
+            }
+        })
+        validator.validate({"db": {"port": "5432"}})
+
+    Returns::
+
+        [("db.host", "Required key is missing"),
+         ("db.port", "Expected integer, not string")]
+
+    Use :func:`jsonconf.schemaValidator.compileSchema` to share compiled
+    validators for equal schemas.
+
+    '''
+    __Types = {
+        "object": (dict,),
+        "array": (list,),
+        "string": (unicode, str),
+        "integer": (int, long),
+        "number": (int, long, float),
+        "boolean": (bool,),
+        "null": (type(None),),
+        }
+
+    def __init__(self, schema):
+        '''
+        :param schema: The JSON Schema document
+
+        :raises Exception: If the schema is invalid, or contains references
+                           to other documents
+
+        '''
+        self.__schema = schema
+
+        # Map JSON pointers to single item lists holding compiled schemas,
+        # which allows recursive references
+        self.__references = {}
+
+        self.__check = self.__compile(schema)
+
+    def schema(self):
+        '''The JSON Schema document.
+
+        :rtype: dictionary
+
+        '''
+        return self.__schema
+
+    def validate(self, data, delimiter='.'):
+        '''Validate configuration data against the schema.
+
+        :param data: The configuration data
+        :param delimiter: The delimiter used to join keys within paths
+
+        :rtype: sorted list of (key, message) tuples, where the key is the
+                delimited key of the invalid value, or None for the
+                configuration itself
+
+        '''
+        if self.__check is None:
+            return []
+
+        errors = []
+        self.__check(data, None, errors)
+
+        return sorted((self.__formatPath(path, delimiter), message)
+                      for path, message in errors)
+
+    ##### Private functions
+
+    def __formatPath(self, path, delimiter):
+        '''Convert a path into a delimited key. Paths are linked tuples of
+        (parent path, key or index), so creating one is cheap, and they are
+        only converted for invalid values.
+
+        :param path: The path, or None for the root
+        :param delimiter: The delimiter used to join keys
+
+        :rtype: string, or None for the root
+
+        '''
+        parts = []
+        while path is not None:
+            path, part = path
+            parts.append(part)
+        if len(parts) == 0:
+            return None
+
+        parts.reverse()
+        key = parts[0] if isinstance(parts[0], basestring) \
+            else "[%d]" % parts[0]
+        for part in parts[1:]:
+            if isinstance(part, basestring):
+                key += delimiter + part
+            else:
+                key += "[%d]" % part
+        return key
+
+    def __compile(self, schema):
+        '''Compile a schema into a function with the following signature,
+        which appends (path, message) tuples to the list of errors::
+
+            check(value, path, errors)
+
+        The keywords of the schema are grouped by the type of value they
+        constrain, so each value is only checked by the keywords which
+        apply to it.
+
+        :param schema: The schema
+        :rtype: function, or None if the schema accepts every value
+
+        :raises Exception: If the schema is invalid
+
+        '''
+        if schema is True:
+            return None
+        elif schema is False:
+            return _reject
+        elif type(schema) != type(dict()):
+            raise Exception("Invalid schema: %s" % (schema,))
+
+        if "$ref" in schema:
+            # Other keywords alongside a reference are ignored
+            return self.__compileReference(schema["$ref"])
+
+        allowed, expected = self.__compileType(schema)
+        integers = allowed is not None and long in allowed and \
+            float not in allowed
+
+        # Map types to the checks of the keywords which apply to them
+        dispatch = dict((kind, []) for kind in _AllTypes)
+        for kinds, compileFn in ((_AllTypes, self.__compileEnum),
+                                 (_NumberTypes, self.__compileNumber),
+                                 (_StringTypes, self.__compileString),
+                                 ((dict,), self.__compileObject),
+                                 ((list,), self.__compileArray),
+                                 (_AllTypes, self.__compileCombinations)):
+            checks = compileFn(schema)
+            for kind in kinds:
+                dispatch[kind].extend(checks)
+
+        anyCheck = _combine(dispatch[type(None)])
+        dispatch = dict((kind, _combine(checks))
+                        for kind, checks in dispatch.iteritems()
+                        if len(checks) > 0)
+
+        if allowed is None:
+            if len(dispatch) == 0:
+                return None
+
+            def check(value, path, errors):
+                checkFn = dispatch.get(type(value), anyCheck)
+                if checkFn is not None:
+                    checkFn(value, path, errors)
+            return check
+
+        def checkTyped(value, path, errors):
+            kind = type(value)
+            if kind not in allowed and \
+                    not (integers and kind is float and value.is_integer()):
+                errors.append((path, "Expected %s, not %s" %
+                               (expected, _typeName(value))))
+
+            checkFn = dispatch.get(kind, anyCheck)
+            if checkFn is not None:
+                checkFn(value, path, errors)
+        return checkTyped
+
+    def __compileReference(self, reference):
+        '''Compile a reference to part of the schema document.
+
+        :param reference: The JSON pointer, such as '#/definitions/port'
+        :rtype: function, or None
+
+        :raises Exception: If the reference cannot be resolved
+
+        '''
+        cell = self.__references.get(reference)
+        if cell is not None:
+            if cell[0] is not None:
+                return None if cell[0] is _accept else cell[0]
+
+            # A recursive reference, which is compiled once the schema
+            # containing it is
+            def check(value, path, errors):
+                cell[0](value, path, errors)
+            return check
+
+        if reference != "#" and not reference.startswith("#/"):
+            raise Exception("Unsupported schema reference: %s" % reference)
+
+        target = self.__schema
+        for part in reference[2:].split("/") if reference != "#" else []:
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                if type(target) == type(list()):
+                    target = target[int(part)]
+                else:
+                    target = target[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise Exception("Invalid schema reference: %s" % reference)
+
+        cell = [None]
+        self.__references[reference] = cell
+        compiled = self.__compile(target)
+        cell[0] = _accept if compiled is None else compiled
+        return compiled
+
+    def __compileType(self, schema):
+        '''Compile the type keyword.
+
+        :rtype: tuple of (set of allowed Python types, or None, and the
+                description of the allowed types)
+
+        '''
+        if "type" not in schema:
+            return None, None
+
+        names = schema["type"]
+        if isinstance(names, basestring):
+            names = [names]
+
+        allowed = set()
+        for name in names:
+            if name not in self.__Types:
+                raise Exception("Invalid schema type: %s" % name)
+            allowed.update(self.__Types[name])
+        return allowed, " or ".join(names)
+
+    def __compileEnum(self, schema):
+        '''Compile the enum and const keywords.'''
+        checks = []
+
+        if "enum" in schema:
+            choices = schema["enum"]
+            if type(choices) != type(list()):
+                raise Exception("Invalid schema enum: %s" % (choices,))
+            message = "Value must be one of: %s" % \
+                ", ".join(json.dumps(choice) for choice in choices)
+
+            def checkEnum(value, path, errors):
+                if value not in choices or \
+                        not any(_equal(value, choice) for choice in choices):
+                    errors.append((path, message))
+            checks.append(checkEnum)
+
+        if "const" in schema:
+            constant = schema["const"]
+            message = "Value must be: %s" % json.dumps(constant)
+
+            def checkConst(value, path, errors):
+                if not _equal(value, constant):
+                    errors.append((path, message))
+            checks.append(checkConst)
+
+        return checks
+
+    def __compileNumber(self, schema):
+        '''Compile the keywords which constrain numbers.'''
+        bounds = []
+
+        # Draft 4 exclusive bounds are booleans which modify the bounds
+        exclusiveMinimum = schema.get("exclusiveMinimum")
+        exclusiveMaximum = schema.get("exclusiveMaximum")
+        if "minimum" in schema:
+            exclusive = exclusiveMinimum is True
+            bounds.append((schema["minimum"], exclusive, False))
+        if "maximum" in schema:
+            exclusive = exclusiveMaximum is True
+            bounds.append((schema["maximum"], exclusive, True))
+        if _isNumber(exclusiveMinimum):
+            bounds.append((exclusiveMinimum, True, False))
+        if _isNumber(exclusiveMaximum):
+            bounds.append((exclusiveMaximum, True, True))
+        multipleOf = schema.get("multipleOf")
+
+        if len(bounds) == 0 and multipleOf is None:
+            return []
+
+        for bound, _, _ in bounds:
+            if not _isNumber(bound):
+                raise Exception("Invalid schema bound: %s" % (bound,))
+        if multipleOf is not None and \
+                (not _isNumber(multipleOf) or multipleOf <= 0):
+            raise Exception("Invalid schema multipleOf: %s" % (multipleOf,))
+
+        def checkNumber(value, path, errors):
+            for bound, exclusive, upper in bounds:
+                if upper:
+                    if value > bound or (exclusive and value == bound):
+                        errors.append((path, "Value must be %s %s" %
+                                       ("less than" if exclusive
+                                        else "at most", bound)))
+                elif value < bound or (exclusive and value == bound):
+                    errors.append((path, "Value must be %s %s" %
+                                   ("greater than" if exclusive
+                                    else "at least", bound)))
+
+            if multipleOf is not None:
+                quotient = value / float(multipleOf)
+                if quotient != int(quotient):
+                    errors.append((path, "Value must be a multiple of %s" %
+                                   multipleOf))
+        return [checkNumber]
+
+    def __compileString(self, schema):
+        '''Compile the keywords which constrain strings.'''
+        minLength = schema.get("minLength")
+        maxLength = schema.get("maxLength")
+        pattern = schema.get("pattern")
+        if minLength is None and maxLength is None and pattern is None:
+            return []
+
+        if pattern is not None:
+            try:
+                search = re.compile(pattern).search
+            except (re.error, TypeError):
+                raise Exception("Invalid schema pattern: %s" % (pattern,))
+
+        def checkString(value, path, errors):
+            if minLength is not None and len(value) < minLength:
+                errors.append((path, "Value must be at least %d characters "
+                               "long" % minLength))
+            if maxLength is not None and len(value) > maxLength:
+                errors.append((path, "Value must be at most %d characters "
+                               "long" % maxLength))
+            if pattern is not None and search(value) is None:
+                errors.append((path, "Value must match the pattern: %s" %
+                               pattern))
+        return [checkString]
+
+    def __compileObject(self, schema):
+        '''Compile the keywords which constrain JSON objects.'''
+        checks = []
+
+        # Tuples of (key, check) for the properties which are constrained
+        properties = []
+        for key, subschema in schema.get("properties", {}).iteritems():
+            properties.append((key, self.__compile(subschema)))
+        patterns = [(re.compile(pattern).search, self.__compile(subschema))
+                    for pattern, subschema in
+                    schema.get("patternProperties", {}).iteritems()]
+        additional = self.__compile(schema.get("additionalProperties", True))
+        names = self.__compile(schema.get("propertyNames", True))
+
+        known = frozenset(key for key, _ in properties)
+        constrained = [(key, check) for key, check in properties
+                       if check is not None]
+
+        if len(constrained) > 0:
+            def checkProperties(value, path, errors):
+                get = value.get
+                for key, check in constrained:
+                    child = get(key, _Missing)
+                    if child is not _Missing:
+                        check(child, (path, key), errors)
+            checks.append(checkProperties)
+
+        if len(patterns) > 0 or additional is not None or names is not None:
+            # Every key must be checked, in a single pass over the object
+            def checkKeys(value, path, errors):
+                for key, child in value.iteritems():
+                    childPath = (path, key)
+                    if names is not None:
+                        names(key, childPath, errors)
+
+                    matched = key in known
+                    for search, check in patterns:
+                        if search(key) is not None:
+                            matched = True
+                            if check is not None:
+                                check(child, childPath, errors)
+                    if not matched and additional is not None:
+                        if additional is _reject:
+                            errors.append((childPath, "Key is not allowed"))
+                        else:
+                            additional(child, childPath, errors)
+            checks.append(checkKeys)
+
+        required = schema.get("required", [])
+        if len(required) > 0:
+            def checkRequired(value, path, errors):
+                for key in required:
+                    if key not in value:
+                        errors.append(((path, key), "Required key is missing"))
+            checks.append(checkRequired)
+
+        minProperties = schema.get("minProperties")
+        maxProperties = schema.get("maxProperties")
+        if minProperties is not None or maxProperties is not None:
+            def checkSize(value, path, errors):
+                if minProperties is not None and len(value) < minProperties:
+                    errors.append((path, "Object must have at least %d keys" %
+                                   minProperties))
+                if maxProperties is not None and len(value) > maxProperties:
+                    errors.append((path, "Object must have at most %d keys" %
+                                   maxProperties))
+            checks.append(checkSize)
+
+        dependencies = []
+        for key, dependency in schema.get("dependencies", {}).iteritems():
+            if type(dependency) == type(list()):
+                dependencies.append((key, dependency, None))
+            else:
+                dependencies.append((key, [], self.__compile(dependency)))
+        if len(dependencies) > 0:
+            def checkDependencies(value, path, errors):
+                for key, requiredKeys, check in dependencies:
+                    if key not in value:
+                        continue
+                    for requiredKey in requiredKeys:
+                        if requiredKey not in value:
+                            errors.append(((path, requiredKey),
+                                           "Required by %s" % key))
+                    if check is not None:
+                        check(value, path, errors)
+            checks.append(checkDependencies)
+
+        return checks
+
+    def __compileArray(self, schema):
+        '''Compile the keywords which constrain lists.'''
+        checks = []
+
+        items = schema.get("items", True)
+        if type(items) == type(list()):
+            positional = [self.__compile(item) for item in items]
+            additional = self.__compile(schema.get("additionalItems", True))
+
+            def checkItems(value, path, errors):
+                for index, item in enumerate(value):
+                    if index < len(positional):
+                        check = positional[index]
+                    elif additional is _reject:
+                        errors.append(((path, index), "Item is not allowed"))
+                        continue
+                    else:
+                        check = additional
+                    if check is not None:
+                        check(item, (path, index), errors)
+            checks.append(checkItems)
+        else:
+            every = self.__compile(items)
+            if every is not None:
+                def checkEvery(value, path, errors):
+                    for index, item in enumerate(value):
+                        every(item, (path, index), errors)
+                checks.append(checkEvery)
+
+        minItems = schema.get("minItems")
+        maxItems = schema.get("maxItems")
+        unique = schema.get("uniqueItems", False)
+        if minItems is not None or maxItems is not None or unique:
+            def checkSize(value, path, errors):
+                if minItems is not None and len(value) < minItems:
+                    errors.append((path, "List must have at least %d items" %
+                                   minItems))
+                if maxItems is not None and len(value) > maxItems:
+                    errors.append((path, "List must have at most %d items" %
+                                   maxItems))
+                if unique:
+                    seen = set()
+                    for item in value:
+                        encoded = json.dumps(_typed(item), sort_keys=True)
+                        if encoded in seen:
+                            errors.append((path, "List items must be unique"))
+                            break
+                        seen.add(encoded)
+            checks.append(checkSize)
+
+        if "contains" in schema:
+            contains = self.__compile(schema["contains"])
+
+            def checkContains(value, path, errors):
+                for index, item in enumerate(value):
+                    if _matches(contains, item, (path, index)):
+                        return
+                errors.append((path, "List must contain a matching item"))
+            checks.append(checkContains)
+
+        return checks
+
+    def __compileCombinations(self, schema):
+        '''Compile the keywords which combine schemas.'''
+        checks = []
+
+        for subschema in schema.get("allOf", []):
+            check = self.__compile(subschema)
+            if check is not None:
+                checks.append(check)
+
+        if "anyOf" in schema:
+            anyOf = [self.__compile(subschema)
+                     for subschema in schema["anyOf"]]
+
+            def checkAnyOf(value, path, errors):
+                for check in anyOf:
+                    if _matches(check, value, path):
+                        return
+                errors.append((path, "Value does not match any of the "
+                               "allowed schemas"))
+            checks.append(checkAnyOf)
+
+        if "oneOf" in schema:
+            oneOf = [self.__compile(subschema)
+                     for subschema in schema["oneOf"]]
+
+            def checkOneOf(value, path, errors):
+                matches = 0
+                for check in oneOf:
+                    if _matches(check, value, path):
+                        matches += 1
+                if matches != 1:
+                    errors.append((path, "Value must match exactly one "
+                                   "schema, but matches %d" % matches))
+            checks.append(checkOneOf)
+
+        if "not" in schema:
+            negated = self.__compile(schema["not"])
+
+            def checkNot(value, path, errors):
+                if _matches(negated, value, path):
+                    errors.append((path, "Value must not match the schema"))
+            checks.append(checkNot)
+
+        if "if" in schema:
+            condition = self.__compile(schema["if"])
+            then = self.__compile(schema.get("then", True))
+            otherwise = self.__compile(schema.get("else", True))
+
+            def checkIf(value, path, errors):
+                check = then if _matches(condition, value, path) \
+                    else otherwise
+                if check is not None:
+                    check(value, path, errors)
+            checks.append(checkIf)
+
+        return checks
+
+
+# The Python types of JSON values
+_NumberTypes = (int, long, float)
+_StringTypes = (str, unicode)
+_AllTypes = (dict, list, bool, type(None)) + _NumberTypes + _StringTypes
+
+
+# The compiled validators of recently used schemas, keyed by schema hash
+_validators = {}
+_validatorsLock = Lock()
+_MaxValidators = 64
+
+# Marks keys which do not exist
+_Missing = object()
+
+
+def compileSchema(schema):
+    '''Get the validator of a JSON Schema document. Validators are cached
+    by the hash of the schema, so a schema is only compiled once however
+    many times it is used, for example on every reload.
+
+    :param schema: The JSON Schema document
+    :rtype: :class:`jsonconf.SchemaValidator`
+
+    :raises Exception: If the schema is invalid
+
+    '''
+    digest = sha1(json.dumps(schema, sort_keys=True)).hexdigest()
+    with _validatorsLock:
+        validator = _validators.get(digest)
+    if validator is not None:
+        return validator
+
+    validator = SchemaValidator(schema)
+    with _validatorsLock:
+        if len(_validators) >= _MaxValidators:
+            _validators.clear()
+        _validators[digest] = validator
+    return validator
+
+
+def _reject(value, path, errors):
+    '''The check of the false schema, which rejects every value.'''
+    errors.append((path, "Value is not allowed"))
+
+
+def _accept(value, path, errors):
+    '''The check of the true schema, which accepts every value.'''
+
+
+def _combine(checks):
+    '''Combine a list of checks into a single check, or None if the list
+    is empty.'''
+    if len(checks) == 0:
+        return None
+    elif len(checks) == 1:
+        return checks[0]
+
+    checks = tuple(checks)
+
+    def check(value, path, errors):
+        for checkFn in checks:
+            checkFn(value, path, errors)
+    return check
+
+
+def _matches(check, value, path):
+    '''Determine if a value satisfies a compiled schema.'''
+    if check is None:
+        return True
+    errors = []
+    check(value, path, errors)
+    return len(errors) == 0
+
+
+def _isNumber(value):
+    '''Determine if a value is a JSON number.'''
+    return type(value) in (int, long, float)
+
+
+def _typeName(value):
+    '''Get the JSON Schema type name of a value.'''
+    if value is None:
+        return "null"
+    elif type(value) is bool:
+        return "boolean"
+    elif _isNumber(value):
+        return "integer" if type(value) in (int, long) else "number"
+    elif isinstance(value, basestring):
+        return "string"
+    elif type(value) is list:
+        return "array"
+    elif type(value) is dict:
+        return "object"
+    return type(value).__name__
+
+
+def _typed(value):
+    '''Tag booleans, which Python considers equal to 0 and 1, so they can be
+    compared with numbers.'''
+    if type(value) is bool:
+        return [value]
+    elif type(value) is list:
+        return [_typed(item) for item in value]
+    elif type(value) is dict:
+        return dict((key, _typed(item)) for key, item in value.iteritems())
+    return value
+
+
+def _equal(first, second):
+    '''Compare two JSON values, which are not equal if one is a boolean and
+    the other is a number.'''
+    return first == second and _typed(first) == _typed(second)
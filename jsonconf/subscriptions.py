@@ -0,0 +1,200 @@
+class Subscriptions:
+    '''The Subscriptions class calls functions subscribed to changes of the
+    keys related to a prefix. A subscriber to the 'db' prefix is called
+    when the 'db' key changes, when keys beneath it, such as 'db.port',
+    change, and when keys containing it, such as the entire configuration,
+    change.
+
+    Subscriptions are kept in a trie of key parts, so finding the
+    subscribers to a change only visits the nodes along the changed key,
+    and the nodes beneath it, however many subscribers there are.
+
+    Subscribers must have the following signature, and are called once for
+    each set of changes with the list of changed keys related to their
+    prefix::
+
+        callback(changedKeys)
+
+    When an executor, such as a `concurrent.futures.ThreadPoolExecutor`,
+    is given, subscribers are called on it in batches, rather than by the
+    thread making the changes.
+
+    '''
+    # The number of subscribers called by each executor task
+    __BatchSize = 256
+
+    def __init__(self, delimiter='.', executor=None):
+        '''
+        :param delimiter: The delimiter used to access sub keys
+        :param executor: The optional object whose `submit(fn, *args)`
+                         method runs subscribers
+
+        '''
+        self.__delimiter = delimiter
+        self.__executor = executor
+        self.__root = _Node()
+        self.__count = 0
+
+    def __len__(self):
+        '''Get the number of subscriptions.
+
+        :rtype: int
+
+        '''
+        return self.__count
+
+    def subscribe(self, prefix, callback):
+        '''Subscribe a function to changes of the keys related to a prefix.
+
+        :param prefix: The delimited key, or None for every key
+        :param callback: The function called with the list of changed keys
+
+        :returns: The subscription, which may be passed to
+                  :func:`jsonconf.Subscriptions.unsubscribe`
+
+        '''
+        node = self.__root
+        for part in self.__parts(prefix):
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node()
+            node = child
+
+        subscription = (prefix, callback)
+        node.subscribers.append(subscription)
+        self.__count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        '''Remove a subscription. Removing a subscription which does not
+        exist has no effect.
+
+        :param subscription: The subscription returned by
+                             :func:`jsonconf.Subscriptions.subscribe`
+
+        '''
+        path = [(None, self.__root)]
+        for part in self.__parts(subscription[0]):
+            node = path[-1][1].children.get(part)
+            if node is None:
+                return
+            path.append((part, node))
+
+        node = path[-1][1]
+        for index, subscriber in enumerate(node.subscribers):
+            if subscriber is subscription:
+                del node.subscribers[index]
+                self.__count -= 1
+                break
+
+        # Remove the nodes which no longer lead to any subscribers
+        while len(path) > 1:
+            part, node = path.pop()
+            if len(node.subscribers) > 0 or len(node.children) > 0:
+                break
+            del path[-1][1].children[part]
+
+    def notify(self, changedKeys):
+        '''Call the subscribers to the keys related to any of the changed
+        keys. Each subscriber is called once, with the changed keys related
+        to its prefix, in the order they were given.
+
+        Without an executor, all of the subscribers are called before
+        returning, and the first exception raised by any of them is raised
+        once all have been called. With an executor, the exceptions are
+        raised by the returned futures.
+
+        :param changedKeys: The list of changed keys, where None is the
+                            entire configuration
+
+        :rtype: list of the futures of the submitted batches, which is
+                empty without an executor
+
+        '''
+        # Map ids of subscriptions to (subscription, changed keys) tuples,
+        # and keep the order in which subscriptions were found
+        found = {}
+        calls = []
+
+        def collect(subscribers, key):
+            for subscription in subscribers:
+                call = found.get(id(subscription))
+                if call is None:
+                    call = found[id(subscription)] = (subscription, [])
+                    calls.append(call)
+                call[1].append(key)
+
+        for key in changedKeys:
+            node = self.__root
+            if len(node.subscribers) > 0:
+                collect(node.subscribers, key)
+
+            # Subscribers to the key, and to the keys containing it
+            for part in self.__parts(key):
+                node = node.children.get(part)
+                if node is None:
+                    break
+                if len(node.subscribers) > 0:
+                    collect(node.subscribers, key)
+            else:
+                # Subscribers to the keys beneath the key
+                stack = node.children.values()
+                while len(stack) > 0:
+                    node = stack.pop()
+                    if len(node.subscribers) > 0:
+                        collect(node.subscribers, key)
+                    stack.extend(node.children.itervalues())
+
+        batch = [(subscription[1], keys) for subscription, keys in calls]
+        if self.__executor is None:
+            _callSubscribers(batch)
+            return []
+
+        size = self.__BatchSize
+        return [self.__executor.submit(_callSubscribers,
+                                       batch[start:start + size])
+                for start in xrange(0, len(batch), size)]
+
+    ##### Private functions
+
+    def __parts(self, key):
+        '''Split a key into its parts.
+
+        :param key: The delimited key, or None for the entire configuration
+        :rtype: list of strings
+
+        '''
+        if key is None or key == "":
+            return []
+        return key.split(self.__delimiter)
+
+
+class _Node(object):
+    '''A node of the subscription trie.'''
+    __slots__ = ("children", "subscribers")
+
+    def __init__(self):
+        # Map key parts to child nodes
+        self.children = {}
+
+        # The list of (prefix, callback) subscriptions to the node's key
+        self.subscribers = []
+
+
+def _callSubscribers(batch):
+    '''Call a batch of subscribers, raising the first exception raised by
+    any of them once all have been called.
+
+    :param batch: The list of (callback, changed keys) tuples
+
+    '''
+    error = None
+    for callback, keys in batch:
+        try:
+            callback(keys)
+        except Exception, e:
+            if error is None:
+                error = Exception("Subscriber failed for %s: %s" %
+                                  (", ".join(str(key) for key in keys), e))
+    if error is not None:
+        raise error
@@ -0,0 +1,153 @@
+import json
+import sys
+from StringIO import StringIO
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import ConfigDecoder, ConfigFile
+from jsonconf.binaryFormats import decodeCbor, decodeMsgPack, \
+    detectFormat, encodeCbor, encodeMsgPack
+from jsonconf.convert import main
+
+
+class BinaryFormatsTests(TestCase):
+    def setUp(self):
+        self.__directory = mkdtemp()
+        self.__data = {
+            u"db": {u"host": u"localhost", u"port": 5432, u"ratio": 0.5},
+            u"names": [u"caf\xe9", u"x" * 40, None, True, False],
+            u"limits": [0, 127, 128, -1, -33, 70000, -70000, 2 ** 40],
+            u"empty": {},
+            }
+
+    def tearDown(self):
+        rmtree(self.__directory)
+
+    def test_msgpack(self):
+        encoded = encodeMsgPack(self.__data)
+        self.assertEqual(detectFormat(encoded), "msgpack")
+        self.assertEqual(decodeMsgPack(encoded), self.__data)
+
+        # Values encoded with every width are decoded
+        self.assertEqual(decodeMsgPack("\x92\xcc\xff\xd1\xff\x00"),
+                         [255, -256])
+        self.assertEqual(decodeMsgPack("\x81\xd9\x01a\xc4\x02\x00\x01"),
+                         {u"a": "\x00\x01"})
+        self.assertEqual(decodeMsgPack("\xde\x00\x01\xa1a\xdc\x00\x00"),
+                         {u"a": []})
+
+        self.assertRaises(ValueError, decodeMsgPack, encoded[:-1])
+        self.assertRaises(ValueError, decodeMsgPack, encoded + "\xc0")
+        self.assertRaises(ValueError, decodeMsgPack, "\x81\xa1a\xc1")
+
+    def test_cbor(self):
+        encoded = encodeCbor(self.__data)
+        self.assertEqual(detectFormat(encoded), "cbor")
+        self.assertEqual(decodeCbor(encoded), self.__data)
+
+        # Indefinite lengths, half precision numbers and tags
+        self.assertEqual(decodeCbor("\xbf\x61a\x9f\x01\xf9\x3c\x00\xff\xff"),
+                         {u"a": [1, 1.0]})
+        self.assertEqual(decodeCbor("\x7f\x61a\x61b\xff"), u"ab")
+        self.assertEqual(decodeCbor("\xd9\xd9\xf7\xa1\x61a\xc1\x1a\x00\x01"
+                                    "\x00\x00"), {u"a": 65536})
+        self.assertEqual(decodeCbor("\xf9\x7c\x00"), float("inf"))
+
+        self.assertRaises(ValueError, decodeCbor, encoded[:-1])
+        self.assertRaises(ValueError, decodeCbor, "\xff")
+        self.assertRaises(ValueError, decodeCbor, "\xa1\x61a\xf8\x20")
+
+    def test_detectFormat(self):
+        self.assertEqual(detectFormat('{"a": 1}'), "json")
+        self.assertEqual(detectFormat(' {"a": 1}'), "json")
+        self.assertEqual(detectFormat('\xef\xbb\xbf{}'), "json")
+        self.assertEqual(detectFormat(''), "json")
+
+    def test_decoder(self):
+        decoder = ConfigDecoder()
+        for encode in [encodeMsgPack, encodeCbor]:
+            self.assertEqual(decoder.loads(encode(self.__data)), self.__data)
+
+            # Keys are verified as they are for JSON
+            try:
+                decoder.loads(encode({"one": {"two.three": 3}}))
+                self.fail("Expected an exception")
+            except Exception, e:
+                self.assertTrue("one.two.three" in str(e))
+
+            self.assertRaises(ValueError, decoder.loads, encode({1: 2}))
+
+        # Duplicate keys cannot be written by the encoders
+        self.assertRaises(Exception, decoder.loads, "\x82\xa1a\x01\xa1a\x02")
+        self.assertRaises(Exception, decoder.loads, "\xa2\x61a\x01\x61a\x02")
+
+        self.assertRaises(Exception, decoder.loads, "{}", "yaml")
+
+    def test_parse(self):
+        for name, encode in [("config.msgpack", encodeMsgPack),
+                             ("config.cbor", encodeCbor),
+                             ("config.bin", encodeCbor)]:
+            filename = join(self.__directory, name)
+            self.__write(filename, encode(self.__data))
+
+            config = ConfigFile()
+            config.parse(filename)
+            self.assertEqual(config.get("db.port"), 5432)
+            self.assertEqual(config.get("names"), self.__data["names"])
+
+        # The extension takes precedence over the contents
+        filename = join(self.__directory, "wrong.cbor")
+        self.__write(filename, encodeMsgPack(self.__data))
+        self.assertRaises(Exception, ConfigFile().parse, filename)
+
+    def test_includes(self):
+        self.__write(join(self.__directory, "db.msgpack"),
+                     encodeMsgPack({"host": "localhost", "port": 5432}))
+        filename = join(self.__directory, "config.json")
+        self.__write(filename, json.dumps(
+            {"db": {"$include": "db.msgpack", "port": 5433}}))
+
+        config = ConfigFile()
+        config.parse(filename)
+        self.assertEqual(config.get("db.host"), "localhost")
+        self.assertEqual(config.get("db.port"), 5433)
+
+    def test_fragments(self):
+        self.__write(join(self.__directory, "db.msgpack"),
+                     encodeMsgPack({"port": 5432}))
+        self.__write(join(self.__directory, "cache.cbor"),
+                     encodeCbor({"size": 10}))
+        self.__write(join(self.__directory, "app.json"), '{"name": "x"}')
+
+        config = ConfigFile()
+        config.parse(self.__directory)
+        self.assertEqual(sorted(config.keys()), ["app", "cache", "db"])
+        self.assertEqual(config.get("db.port"), 5432)
+        self.assertEqual(config.get("cache.size"), 10)
+
+    def test_convert(self):
+        source = join(self.__directory, "config.json")
+        self.__write(source, json.dumps(self.__data))
+
+        for name in ["config.msgpack", "config.cbor.gz", "out.json"]:
+            output = join(self.__directory, name)
+            self.assertEqual(main([source, output]), 0)
+
+            config = ConfigFile()
+            config.parse(output)
+            self.assertEqual(config.get("limits"), self.__data["limits"])
+            source = output
+
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            self.assertEqual(main([join(self.__directory, "missing.json"),
+                                   join(self.__directory, "out.cbor")]), 1)
+        finally:
+            sys.stderr = stderr
+
+    def __write(self, filename, data):
+        fd = open(filename, 'wb')
+        fd.write(data)
+        fd.close()
@@ -0,0 +1,98 @@
+import gzip
+import json
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import ConfigFile
+from jsonconf import compression
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.__directory = mkdtemp()
+        self.__data = {"one": {"two": 2}, "three": ["x" * 100] * 1000}
+
+    def tearDown(self):
+        rmtree(self.__directory)
+
+    def test_plain(self):
+        filename = join(self.__directory, "config.json")
+        self.__write(filename, json.dumps(self.__data))
+        self.assertEqual(self.__read(filename), json.dumps(self.__data))
+
+    def test_gzip(self):
+        filename = join(self.__directory, "config.json.gz")
+        text = json.dumps(self.__data)
+        fd = gzip.open(filename, 'wb')
+        fd.write(text)
+        fd.close()
+
+        self.assertEqual(self.__read(filename), text)
+
+        # Reads of any size produce the same data
+        fd = compression.openFile(filename)
+        chunks = []
+        chunk = fd.read(1000)
+        while chunk:
+            chunks.append(chunk)
+            chunk = fd.read(1000)
+        fd.close()
+        self.assertEqual("".join(chunks), text)
+
+        # Reading everything returns the decompressed data without a copy
+        fd = compression.openFile(filename)
+        data = fd.read(10)
+        self.assertEqual(data + fd.read(), text)
+        self.assertEqual(fd.read(), "")
+        fd.close()
+
+        config = ConfigFile()
+        config.parse(filename)
+        self.assertEqual(config.get("one.two"), 2)
+
+    def test_gzipMembers(self):
+        filename = join(self.__directory, "config.json.gz")
+        fd = open(filename, 'wb')
+        for text in ['{"one": ', '{"two": 2}}']:
+            member = gzip.GzipFile(fileobj=fd, mode='wb')
+            member.write(text)
+            member.close()
+        fd.close()
+
+        self.assertEqual(self.__read(filename), '{"one": {"two": 2}}')
+
+    def test_fragments(self):
+        self.__write(join(self.__directory, "plain.json"), '{"one": 1}')
+        fd = gzip.open(join(self.__directory, "packed.json.gz"), 'wb')
+        fd.write('{"two": 2}')
+        fd.close()
+
+        config = ConfigFile()
+        config.parse(self.__directory)
+        self.assertEqual(config.get("plain.one"), 1)
+        self.assertEqual(config.get("packed.two"), 2)
+
+    def test_missingModules(self):
+        filename = join(self.__directory, "config.json.xz")
+        self.__write(filename, "\xfd7zXZ\x00")
+        if compression.lzma is None:
+            self.assertRaises(Exception, compression.openFile, filename)
+
+        filename = join(self.__directory, "config.json.zst")
+        self.__write(filename, "\x28\xb5\x2f\xfd")
+        if compression.zstandard is None:
+            self.assertRaises(Exception, compression.openFile, filename)
+
+    def __read(self, filename):
+        fd = compression.openFile(filename)
+        try:
+            return fd.read()
+        finally:
+            fd.close()
+
+    def __write(self, filename, text):
+        fd = open(filename, 'wb')
+        fd.write(text)
+        fd.close()
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from jsonconf import ConfigDecoder
+
+
+class ConfigDecoderTests(TestCase):
+    def test_validJson(self):
+        decoder = ConfigDecoder()
+        data = decoder.loads('{"a": {"b": [1, {"c": null}]}}')
+        self.assertEqual(data, {"a": {"b": [1, {"c": None}]}})
+
+    def test_invalidJson(self):
+        decoder = ConfigDecoder()
+        self.assertRaises(ValueError, decoder.loads, '{"a": ')
+
+    def test_nestedDelimiter(self):
+        decoder = ConfigDecoder()
+        try:
+            decoder.loads('{"a": {"b": {"c.d": 1}}, "e": 2}')
+        except Exception, e:
+            self.assertTrue("a.b.c.d" in str(e))
+        else:
+            self.fail("Nested delimiter was not detected")
+
+    def test_delimiterInList(self):
+        decoder = ConfigDecoder(delimiter='-')
+        try:
+            decoder.loads('{"a": [0, {"b": {"c-d": 1}}]}')
+        except Exception, e:
+            self.assertTrue("a[1]-b-c-d" in str(e))
+        else:
+            self.fail("Delimiter within a list was not detected")
+
+    def test_duplicateKeys(self):
+        decoder = ConfigDecoder()
+        try:
+            decoder.loads('{"a": {"b": 1, "b": 2}}')
+        except Exception, e:
+            self.assertTrue("Duplicate" in str(e))
+            self.assertTrue("a.b" in str(e))
+        else:
+            self.fail("Duplicate key was not detected")
+
+    def test_multipleErrors(self):
+        decoder = ConfigDecoder()
+        try:
+            decoder.loads('{"x.y": 1, "a": {"b.c": 1}, "d": {"e": 1}}')
+        except Exception, e:
+            self.assertTrue("x.y" in str(e))
+            self.assertTrue("a.b.c" in str(e))
+        else:
+            self.fail("Invalid keys were not detected")
+
+        # The decoder can be reused after an error
+        self.assertEqual(decoder.loads('{"a": 1}'), {"a": 1})
+
+    def test_include(self):
+        fragments = {"a": {"x": 1, "y": 2}, "b": {"y": 3}}
+        decoder = ConfigDecoder(include=lambda name: fragments[name])
+
+        data = decoder.loads('{"one": {"$include": ["a", "b"], "x": 0}}')
+        self.assertEqual(data, {"one": {"x": 0, "y": 3}})
+
+        self.assertRaises(Exception, decoder.loads, '{"$include": 5}')
+
+        # Without an include function the key is left unchanged
+        decoder = ConfigDecoder()
+        data = decoder.loads('{"$include": "a"}')
+        self.assertEqual(data, {"$include": "a"})
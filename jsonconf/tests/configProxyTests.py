@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from jsonconf import ConfigFile, ConfigProxy
+
+
+class ConfigProxyTests(TestCase):
+    def setUp(self):
+        self.__config = ConfigFile()
+        self.__config.updateData({
+            "services.payments.db.host": "localhost",
+            "services.payments.db.port": 5432,
+            "services.billing.enabled": False,
+            "class": 1,
+            })
+
+    def test_attributes(self):
+        proxy = self.__config.proxy()
+        self.assertTrue(isinstance(proxy, ConfigProxy))
+        self.assertTrue(self.__config.proxy() is proxy)
+
+        self.assertEqual(proxy.services.payments.db.host, "localhost")
+        self.assertEqual(proxy.services.payments.db.port, 5432)
+        self.assertEqual(proxy.services.billing.enabled, False)
+        self.assertEqual(proxy["class"], 1)
+
+        # Sub proxies are reused, and values are bound to the proxies, so
+        # repeated accesses do not look up the configuration
+        self.assertTrue(proxy.services.payments is proxy.services.payments)
+        stats = self.__config.enableInstrumentation()
+        for _ in range(3):
+            self.assertEqual(proxy.services.payments.db.host, "localhost")
+        self.assertEqual(stats.accesses(), {})
+
+        self.assertRaises(AttributeError, getattr, proxy.services, "missing")
+        self.assertRaises(KeyError, lambda: proxy.services["missing"])
+
+    def test_iteration(self):
+        proxy = self.__config.proxy()
+        self.assertEqual(sorted(proxy), ["class", "services"])
+        self.assertEqual(sorted(proxy.services), ["billing", "payments"])
+        self.assertTrue("db" in proxy.services.payments)
+        self.assertFalse("missing" in proxy.services.payments)
+
+    def test_updates(self):
+        proxy = self.__config.proxy()
+        db = proxy.services.payments.db
+        self.assertEqual(db.host, "localhost")
+
+        self.__config.updateData({"services.payments.db.host": "remote"})
+        self.assertEqual(db.host, "remote")
+        self.assertEqual(proxy.services.payments.db.host, "remote")
+
+        self.__config.updateData({"services.payments": "disabled"})
+        self.assertEqual(proxy.services.payments, "disabled")
+        self.assertRaises(AttributeError, getattr, db, "host")
@@ -0,0 +1,96 @@
+from unittest import TestCase
+
+from jsonconf import ConfigFile, ConfigRegistry
+
+
+class ConfigRegistryTests(TestCase):
+    def setUp(self):
+        self.__base = ConfigFile()
+        self.__base.updateData({
+            "db.host": "localhost",
+            "db.pool_size": 10,
+            "name": "base",
+            })
+
+    def test_tenants(self):
+        registry = ConfigRegistry(self.__base)
+        registry.setTenant("acme", {"db.pool_size": 20})
+        registry.setTenant("globex", {"name": "globex"})
+
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(sorted(registry.tenants()), ["acme", "globex"])
+        self.assertTrue(registry.hasTenant("acme"))
+        self.assertFalse(registry.hasTenant("initech"))
+
+        self.assertEqual(registry.get("acme", "db.pool_size"), 20)
+        self.assertEqual(registry.get("acme", "db"),
+                         {"host": "localhost", "pool_size": 20})
+        self.assertEqual(registry.get("acme", "name"), "base")
+        self.assertEqual(registry.get("globex", "db.pool_size"), 10)
+        self.assertEqual(registry.get("globex", "name"), "globex")
+        self.assertEqual(registry.get("globex", "missing", 5), 5)
+        self.assertTrue(registry.hasKey("acme", "db.host"))
+
+        # The base configuration is not changed
+        self.assertEqual(self.__base.get("db.pool_size"), 10)
+        self.assertEqual(self.__base.get("name"), "base")
+
+        self.assertRaises(Exception, registry.get, "initech", "name")
+        self.assertRaises(Exception, registry.setTenant, "initech",
+                          {"name.first": "x"})
+
+        registry.removeTenant("acme")
+        self.assertFalse(registry.hasTenant("acme"))
+
+    def test_updates(self):
+        registry = ConfigRegistry(self.__base)
+        registry.setTenant("acme", {"db.pool_size": 20})
+        registry.updateTenant("acme", {"db.host": "acme.example.com"})
+
+        self.assertEqual(registry.overrides("acme"), {
+            "db.pool_size": 20,
+            "db.host": "acme.example.com",
+            })
+        self.assertEqual(registry.get("acme", "db.host"), "acme.example.com")
+
+        # Failed updates are not applied
+        self.assertRaises(Exception, registry.updateTenant, "acme",
+                          {"name.first": "x", "db.user": "acme"})
+        self.assertFalse(registry.hasKey("acme", "db.user"))
+
+        # Tenants follow changes to the base configuration
+        self.__base.updateData({"db.user": "admin", "db.pool_size": 5})
+        self.assertEqual(registry.get("acme", "db.user"), "admin")
+        self.assertEqual(registry.get("acme", "db.pool_size"), 20)
+
+    def test_views(self):
+        registry = ConfigRegistry(self.__base, maxViews=2)
+        for index in range(5):
+            registry.setTenant(index, {"db.pool_size": index})
+
+        for index in range(5):
+            self.assertEqual(registry.get(index, "db.pool_size"), index)
+
+        view = registry.view(4)
+        self.assertTrue(registry.view(4) is view)
+        self.assertEqual(view.get("db.host"), "localhost")
+
+        # Changing a tenant only discards its own view
+        registry.setTenant(5, {"db.pool_size": 5})
+        registry.updateTenant(3, {"db.host": "three"})
+        self.assertTrue(registry.view(4) is view)
+        self.assertEqual(registry.get(3, "db.host"), "three")
+
+    def test_interpolation(self):
+        self.__base.updateData({"url": "${db.host}:${db.pool_size}"})
+        self.__base.enableInterpolation()
+
+        registry = ConfigRegistry(self.__base)
+        registry.setTenant("acme", {"db.host": "acme.example.com"})
+
+        self.assertEqual(registry.get("acme", "url"), "acme.example.com:10")
+        self.assertEqual(self.__base.get("url"), "localhost:10")
+
+        # Views are only created when needed, which is when cycles are found
+        registry.setTenant("loop", {"db.host": "${url}"})
+        self.assertRaises(Exception, registry.get, "loop", "url")
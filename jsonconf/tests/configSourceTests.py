@@ -0,0 +1,164 @@
+import json
+import socket
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from unittest import TestCase
+
+from jsonconf import ConfigFile, DataSource, FileSource, HttpSource, \
+    JsonConfig
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Serves the configuration of the test server.'''
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("If-None-Match"))
+        if server.body is None:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    '''Handles each kept alive connection in a separate thread.'''
+    daemon_threads = True
+
+    def process_request(self, request, address):
+        self.connections.append(request)
+        ThreadingMixIn.process_request(self, request, address)
+
+    def close(self):
+        '''Stop serving, and close all kept alive connections.'''
+        self.shutdown()
+        self.server_close()
+        for connection in self.connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class ConfigSourceTests(TestCase):
+    def setUp(self):
+        self.__directory = mkdtemp()
+
+        self.__server = _Server(("127.0.0.1", 0), _Handler)
+        self.__server.requests = []
+        self.__server.connections = []
+        self.__serve({"one": {"two": 2}}, '"v1"')
+        thread = Thread(target=self.__server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        self.__url = "http://127.0.0.1:%d/config.json" % \
+            self.__server.server_address[1]
+
+    def tearDown(self):
+        self.__server.close()
+        rmtree(self.__directory)
+
+    def test_dataSource(self):
+        source = DataSource({"one": 1})
+        config = ConfigFile()
+        config.parse(source)
+        self.assertEqual(config.get("one"), 1)
+        self.assertFalse(config.isModified())
+
+        source.update({"one": 2})
+        self.assertTrue(config.isModified())
+        self.assertEqual(config.reload(), ["one"])
+        self.assertEqual(config.get("one"), 2)
+
+    def test_httpSource(self):
+        source = HttpSource(self.__url)
+        config = ConfigFile()
+        config.parse(source)
+        self.assertEqual(config.get("one.two"), 2)
+
+        # Unchanged configurations are not transferred again
+        self.assertFalse(config.isModified())
+        self.assertEqual(self.__server.requests, [None, '"v1"'])
+
+        self.__serve({"one": {"two": 3}}, '"v2"')
+        self.assertTrue(config.isModified())
+        self.assertEqual(config.reload(), ["one.two"])
+        self.assertEqual(config.get("one.two"), 3)
+        self.assertEqual(self.__server.requests, [None, '"v1"', '"v1"'])
+
+    def test_lastKnownGood(self):
+        cacheFile = join(self.__directory, "cache.json")
+
+        config = ConfigFile()
+        config.parse(HttpSource(self.__url, cacheFile))
+        self.assertEqual(config.get("one.two"), 2)
+
+        # A new source starts from the cached copy, and then revalidates it
+        # with a conditional request
+        requests = len(self.__server.requests)
+        config = ConfigFile()
+        config.parse(HttpSource(self.__url, cacheFile))
+        self.assertEqual(config.get("one.two"), 2)
+        self.assertEqual(len(self.__server.requests), requests)
+
+        self.assertFalse(config.isModified())
+        self.assertEqual(self.__server.requests[requests:], ['"v1"'])
+
+        self.__serve({"one": {"two": 3}}, '"v2"')
+        self.assertTrue(config.isModified())
+        self.assertEqual(config.reload(), ["one.two"])
+
+        # The cached copy is used when the server fails
+        self.__serve(None, None)
+        config = ConfigFile()
+        config.parse(HttpSource(self.__url, cacheFile))
+        self.assertEqual(config.get("one.two"), 3)
+        self.assertFalse(config.isModified())
+        self.assertEqual(config.reload(), [])
+
+        config = ConfigFile()
+        self.assertRaises(Exception, config.parse, HttpSource(self.__url))
+        self.assertRaises(Exception, HttpSource, "ftp://example.com/")
+
+    def test_multipleSources(self):
+        filename = join(self.__directory, "config.json")
+        fd = open(filename, 'w')
+        json.dump({"one": {"two": 1, "three": 3}, "four": 4}, fd)
+        fd.close()
+
+        config = JsonConfig()
+        config.parse([filename, HttpSource(self.__url),
+                      DataSource({"five": 5})],
+                     ["/usr/bin/whatever", "four=40"])
+
+        self.assertEqual(config.get("one"), {"two": 2, "three": 3})
+        self.assertEqual(config.get("four"), "40")
+        self.assertEqual(config.get("five"), 5)
+
+        source = FileSource(filename)
+        self.assertTrue(source.isModified())
+        source.load()
+        self.assertFalse(source.isModified())
+
+    def __serve(self, data, etag):
+        self.__server.body = None if data is None else json.dumps(data)
+        self.__server.etag = etag
@@ -1,3 +1,9 @@
+import json
+from hashlib import sha1
+from os.path import join
+from shutil import rmtree
+from StringIO import StringIO
+from tempfile import mkdtemp
 from unittest import TestCase
 
 from jsonconf import ConfigFile
@@ -146,8 +152,527 @@ class ConfigTests(TestCase):
         self.assertEqual(config.get('key1>key2'), {'key3': False})
         self.assertEqual(config.get('key1>key2>key3'), False)
 
-    def __writeFile(self, lines):
-        fd = open(self.__testFile, 'w')
+    def test_reload(self):
+        lines = [
+            "{",
+            '    "one": 1,',
+            '    "two": {',
+            '        "three": 3,',
+            '        "four": 4',
+            '    }',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+        self.assertEqual(config.isModified(), False)
+
+        lines = [
+            "{",
+            '    "one": 1,',
+            '    "two": {',
+            '        "three": 30',
+            '    },',
+            '    "five": 5',
+            "}",
+            ]
+        self.__writeFile(lines)
+        self.assertEqual(config.isModified(), True)
+
+        changed = config.reload()
+        self.assertEqual(sorted(changed), ["five", "two.four", "two.three"])
+        self.assertEqual(config.get("two.three"), 30)
+        self.assertEqual(config.hasKey("two.four"), False)
+        self.assertEqual(config.isModified(), False)
+
+    def test_reloadInvalid(self):
+        lines = [
+            "{",
+            '    "one": 1',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+
+        self.__writeFile(["{"])
+        self.assertRaises(ValueError, config.reload)
+
+        # The previous configuration remains in place
+        self.assertEqual(config.get("one"), 1)
+
+    def test_fragmentDirectory(self):
+        directory = mkdtemp()
+        try:
+            self.__writeFile(['{"host": "db1", "port": 5432}'],
+                             join(directory, "db.json"))
+            self.__writeFile(['{"level": {"root": 10}}'],
+                             join(directory, "logging.json"))
+            self.__writeFile(['ignored'], join(directory, "notes.txt"))
+
+            config = ConfigFile()
+            config.parse(directory)
+
+            self.assertEqual(sorted(config.keys()), ["db", "logging"])
+            self.assertEqual(config.get("db.port"), 5432)
+            self.assertEqual(config.get("logging.level.root"), 10)
+
+            # Glob patterns select a subset of the fragments
+            config = ConfigFile()
+            config.parse(join(directory, "d*.json"))
+            self.assertEqual(config.keys(), ["db"])
+        finally:
+            rmtree(directory)
+
+    def test_fragmentWorkers(self):
+        directory = mkdtemp()
+        try:
+            for index in range(40):
+                self.__writeFile(['{"index": %d}' % index],
+                                 join(directory, "service%d.json" % index))
+
+            config = ConfigFile()
+            config.parse(directory, workers=4)
+
+            self.assertEqual(len(config.keys()), 40)
+            self.assertEqual(config.get("service7.index"), 7)
+            self.assertEqual(config.get("service39.index"), 39)
+        finally:
+            rmtree(directory)
+
+    def test_invalidFragment(self):
+        directory = mkdtemp()
+        try:
+            self.__writeFile(['{"a.b": 1}'], join(directory, "one.json"))
+
+            config = ConfigFile()
+            self.assertRaises(Exception, config.parse, directory)
+
+            config = ConfigFile()
+            self.assertRaises(Exception, config.parse,
+                              join(directory, "missing*.json"))
+        finally:
+            rmtree(directory)
+
+    def test_interpolation(self):
+        lines = [
+            "{",
+            '    "host": "localhost",',
+            '    "db": {',
+            '        "port": 5432,',
+            '        "url": "postgres://${host}:${db.port}/main",',
+            '        "copy": "${db.url}"',
+            '    }',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+        self.assertEqual(config.get("db.url"),
+                         "postgres://${host}:${db.port}/main")
+
+        config.enableInterpolation()
+        url = "postgres://localhost:5432/main"
+        self.assertEqual(config.get("db.url"), url)
+        self.assertEqual(config.get("db.copy"), url)
+        self.assertEqual(config.get("db")["url"], url)
+
+        config.updateData({"host": "remote", "db.port": 1})
+        self.assertEqual(config.get("db.copy"), "postgres://remote:1/main")
+
+        self.assertRaises(Exception, config.updateData, {"host": "${db.url}"})
+
+    def test_interpolationCycle(self):
+        lines = [
+            "{",
+            '    "a": "${b}",',
+            '    "b": "${a}"',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.enableInterpolation()
+        self.assertRaises(Exception, config.parse, self.__testFile)
+
+    def test_interpolationUnrecorded(self):
+        config = ConfigFile()
+        config.enableInterpolation()
+        stats = config.enableInstrumentation()
+        audit = config.enableStrictMode()
+        config.updateData({"host": "localhost", "url": "http://${host}/"})
+
+        # Only the key read is recorded, not the keys it references
+        self.assertEqual(config.get("url"), "http://localhost/")
+        self.assertEqual(stats.accesses(), {"url": 1})
+        self.assertEqual(audit.readKeys(), ["url"])
+
+    def test_include(self):
+        directory = mkdtemp()
+        try:
+            self.__writeFile(['{"host": "db1", "pool": {"size": 5}}'],
+                             join(directory, "db.json"))
+            self.__writeFile(['{"db": {"$include": "db.json",',
+                              '        "host": "db2"}}'],
+                             join(directory, "one.json"))
+            self.__writeFile(['{"db": {"$include": "db.json"}}'],
+                             join(directory, "two.json"))
+
+            one = ConfigFile()
+            one.parse(join(directory, "one.json"))
+            two = ConfigFile()
+            two.parse(join(directory, "two.json"))
+
+            self.assertEqual(one.get("db.host"), "db2")
+            self.assertEqual(two.get("db.host"), "db1")
+
+            # The included fragment is parsed once and shared
+            self.assertTrue(one.get("db.pool") is two.get("db.pool"))
+
+            # Updates do not change the shared fragment
+            one.updateData({"db.pool.size": 10})
+            self.assertEqual(one.get("db.pool.size"), 10)
+            self.assertEqual(two.get("db.pool.size"), 5)
+
+            # Changes to included fragments are detected
+            self.assertEqual(two.isModified(), False)
+            self.__writeFile(['{"host": "db3", "pool": {"size": 50}}'],
+                             join(directory, "db.json"))
+            self.assertEqual(two.isModified(), True)
+            self.assertEqual(sorted(two.reload()),
+                             ["db.host", "db.pool.size"])
+        finally:
+            rmtree(directory)
+
+    def test_includeCycle(self):
+        directory = mkdtemp()
+        try:
+            self.__writeFile(['{"a": {"$include": "b.json"}}'],
+                             join(directory, "a.json"))
+            self.__writeFile(['{"b": {"$include": "a.json"}}'],
+                             join(directory, "b.json"))
+
+            config = ConfigFile()
+            self.assertRaises(Exception, config.parse,
+                              join(directory, "a.json"))
+        finally:
+            rmtree(directory)
+
+    def test_includeDelimiter(self):
+        directory = mkdtemp()
+        try:
+            self.__writeFile(['{"a.b": 1}'], join(directory, "fragment.json"))
+            self.__writeFile(['{"x": {"$include": "fragment.json"}}'],
+                             join(directory, "config.json"))
+
+            # The fragment is valid with one delimiter, and is parsed again
+            # for another
+            config = ConfigFile('-')
+            config.parse(join(directory, "config.json"))
+            self.assertEqual(config.get("x-a.b"), 1)
+
+            config = ConfigFile()
+            self.assertRaises(Exception, config.parse,
+                              join(directory, "config.json"))
+        finally:
+            rmtree(directory)
+
+    def test_dump(self):
+        lines = [
+            "{",
+            '    "b": {"y": 1.5, "x": [1, 2]},',
+            '    "a": "hello"',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+        config.updateData({"c.d": 1})
+
+        expected = {"a": "hello", "b": {"x": [1, 2], "y": 1.5}, "c": {"d": 1}}
+        self.assertEqual(json.loads(config.dumps()), expected)
+        self.assertEqual(json.loads(config.dumps(indent=4)), expected)
+        self.assertEqual(config.dumps(canonical=True),
+                         '{"a":"hello","b":{"x":[1,2],"y":1.5},"c":{"d":1}}')
+
+        output = StringIO()
+        config.dump(output, canonical=True)
+        self.assertEqual(output.getvalue(), config.dumps(canonical=True))
+
+    def test_dumpLargeSection(self):
+        config = ConfigFile()
+        big = dict(("key%d" % index, {"value": "x" * 20, "list": [index]})
+                   for index in xrange(5000))
+        config.updateData({"big": big, "list": range(5000)})
+
+        # A single large section is written in chunks too
+        writes = []
+
+        class Writer:
+            def write(self, chunk):
+                writes.append(chunk)
+
+        for canonical in [False, True]:
+            writes = []
+            config.dump(Writer(), canonical=canonical)
+            self.assertTrue(len(writes) > 1)
+            self.assertTrue(max(len(chunk) for chunk in writes) < 70000)
+            self.assertEqual(json.loads("".join(writes)),
+                             {"big": big, "list": range(5000)})
+
+    def test_dumpCanonicalHash(self):
+        # The order of keys does not change the canonical form
+        self.__writeFile(['{"a": 1, "b": {"c": 2, "d": 3}}'])
+        one = ConfigFile()
+        one.parse(self.__testFile)
+
+        self.__writeFile(['{"b": {"d": 3, "c": 2}, "a": 1}'])
+        two = ConfigFile()
+        two.parse(self.__testFile)
+
+        self.assertEqual(sha1(one.dumps(canonical=True)).hexdigest(),
+                         sha1(two.dumps(canonical=True)).hexdigest())
+
+    def test_dumpInterpolation(self):
+        self.__writeFile(['{"a": "x", "b": "${a}y"}'])
+
+        config = ConfigFile()
+        config.enableInterpolation()
+        config.parse(self.__testFile)
+
+        self.assertEqual(config.dumps(canonical=True), '{"a":"x","b":"xy"}')
+
+    def test_fingerprint(self):
+        self.__writeFile(['{"a": 1, "b": {"c": [1, {"d": 2}], "e": null}}'])
+        one = ConfigFile()
+        one.parse(self.__testFile)
+
+        self.__writeFile(['{"b": {"e": null, "c": [1, {"d": 2}]}, "a": 1}'])
+        two = ConfigFile()
+        two.parse(self.__testFile)
+
+        self.assertEqual(one.fingerprint(), two.fingerprint())
+        self.assertEqual(one.fingerprint("b"), two.fingerprint("b"))
+        self.assertEqual(one.fingerprint("b.e"), two.fingerprint("b.e"))
+        self.assertEqual(one.fingerprint("missing"), None)
+        self.assertNotEqual(one.fingerprint("a"), one.fingerprint("b"))
+
+        # Updates change the fingerprints of the updated key's ancestors
+        root = one.fingerprint()
+        b = one.fingerprint("b")
+        one.updateData({"b.c": [1, {"d": 3}]})
+        self.assertNotEqual(one.fingerprint(), root)
+        self.assertNotEqual(one.fingerprint("b"), b)
+        self.assertEqual(one.fingerprint("a"), two.fingerprint("a"))
+
+        one.updateData({"b.c": [1, {"d": 2}]})
+        self.assertEqual(one.fingerprint(), root)
+
+        # A string is not the same as a number
+        one.updateData({"a": "1"})
+        self.assertNotEqual(one.fingerprint("a"), two.fingerprint("a"))
+
+    def test_nullKey(self):
+        self.__writeFile(['{"a": null, "b": {"c": null}, "d": "str"}'])
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+
+        self.assertEqual(config.hasKey("a"), True)
+        self.assertEqual(config.hasKey("b.c"), True)
+        self.assertEqual(config.hasKey("b.missing"), False)
+        self.assertEqual(config.hasKey("a.missing"), False)
+        self.assertEqual(config.hasKey("d.missing"), False)
+
+        self.assertEqual(config.getWithPresence("a", 5), (True, None))
+        self.assertEqual(config.getWithPresence("b.c"), (True, None))
+        self.assertEqual(config.getWithPresence("b.d", 5), (False, 5))
+        self.assertEqual(config.get("d.0", 5), 5)
+
+        config.requireKeys(["a", "b.c"])
+        self.assertRaises(Exception, config.requireKeys, ["b.d"])
+
+    def test_convertKeys(self):
+        self.__writeFile(['{"a": {"b": "5", "c": "5"}, "d": "x"}'])
+
+        calls = []
+
+        def convert(value):
+            calls.append(value)
+            return int(value)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+        config.convertKeys({"a.b": convert, "a.c": convert,
+                            "missing": convert})
+
+        # Converted values are stored at their nested location
+        self.assertEqual(config.get("a.b"), 5)
+        self.assertEqual(config.get("a"), {"b": 5, "c": 5})
+        self.assertEqual(config.keys(), ["a", "d"])
+
+        # Equal values are only converted once, including after a reload
+        self.assertEqual(calls, ["5"])
+        config.reload(lambda staged: staged.convertKeys({"a.b": convert}))
+        self.assertEqual(config.get("a.b"), 5)
+        self.assertEqual(calls, ["5"])
+
+        self.assertRaises(Exception, config.convertKeys, {"d": convert})
+
+    def test_convertKeysDelimiter(self):
+        self.__writeFile(['{"a": {"b": "1.5"}}'])
+
+        config = ConfigFile(delimiter='/')
+        config.parse(self.__testFile)
+        config.convertKeys({"a/b": float})
+        config.updateData({"a/c": 2})
+
+        self.assertEqual(config.get("a"), {"b": 1.5, "c": 2})
+
+    def test_typedAccessors(self):
+        lines = [
+            "{",
+            '    "port": "8080",',
+            '    "ratio": "0.5",',
+            '    "debug": "yes",',
+            '    "timeout": "30s",',
+            '    "cache": "512MB",',
+            '    "none": null',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+
+        self.assertEqual(config.getInt("port"), 8080)
+        self.assertEqual(config.getFloat("ratio"), 0.5)
+        self.assertEqual(config.getBool("debug"), True)
+        self.assertEqual(config.getDuration("timeout"), 30.0)
+        self.assertEqual(config.getSize("cache"), 512000000)
+
+        self.assertEqual(config.getInt("missing", 5), 5)
+        self.assertEqual(config.getInt("none", 5), 5)
+        self.assertRaises(Exception, config.getInt, "debug")
+
+        # Typed values are remembered until the configuration changes
+        self.assertEqual(config.getInt("port"), 8080)
+        config.updateData({"port": "9090"})
+        self.assertEqual(config.getInt("port"), 9090)
+        self.assertEqual(config.get("port"), "9090")
+
+    def test_iterItems(self):
+        config = ConfigFile()
+        config.updateData({
+            "services.payments.db.host": "localhost",
+            "services.payments.db.port": 5432,
+            "services.billing.tags": [],
+            "services.billing.empty": {},
+            "port": "${services.payments.db.port}",
+            })
+
+        self.assertEqual(list(config.iterItems(sort=True)), [
+            ("port", "${services.payments.db.port}"),
+            ("services.billing.empty", {}),
+            ("services.billing.tags", []),
+            ("services.payments.db.host", "localhost"),
+            ("services.payments.db.port", 5432),
+            ])
+        self.assertEqual(list(config.iterItems("services", 2, True)), [
+            ("services.billing.empty", {}),
+            ("services.billing.tags", []),
+            ("services.payments.db", {"host": "localhost", "port": 5432}),
+            ])
+        self.assertEqual(list(config.iterItems("services.payments.db.port")),
+                         [("services.payments.db.port", 5432)])
+        self.assertEqual(list(config.iterItems("services", 0)),
+                         [("services", config.get("services"))])
+        self.assertEqual(list(config.iterItems("missing")), [])
+
+        config.enableInterpolation()
+        self.assertEqual(config.flatten(), {
+            "port": 5432,
+            "services.billing.empty": {},
+            "services.billing.tags": [],
+            "services.payments.db.host": "localhost",
+            "services.payments.db.port": 5432,
+            })
+
+        # Flattened configurations can be updated into another
+        other = ConfigFile()
+        other.updateData(config.flatten())
+        self.assertEqual(other.dumps(canonical=True),
+                         config.dumps(canonical=True))
+
+    def test_overrides(self):
+        lines = [
+            "{",
+            '    "one": {',
+            '        "two": 2,',
+            '        "three": {',
+            '            "four": 4',
+            '        }',
+            '    },',
+            '    "five": 5',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = ConfigFile()
+        config.parse(self.__testFile)
+        original = config.get("one")
+        three = config.get("one.three")
+
+        config.updateData({"one.three.six": 6, "five": {"seven": 7}})
+        self.assertEqual(config.overrides(),
+                         {"one.three.six": 6, "five": {"seven": 7}})
+        self.assertEqual(config.get("one.three"), {"four": 4, "six": 6})
+        self.assertEqual(config.get("one.two"), 2)
+        self.assertEqual(config.get("five.seven"), 7)
+        self.assertEqual(sorted(config.keys()), ["five", "one"])
+
+        # The parsed data is not modified
+        self.assertEqual(original, {"two": 2, "three": {"four": 4}})
+        self.assertEqual(three, {"four": 4})
+
+        # Overriding a key replaces the overrides beneath it
+        config.updateData({"one.three": {"eight": 8}})
+        self.assertEqual(config.overrides(),
+                         {"one.three": {"eight": 8}, "five": {"seven": 7}})
+        self.assertEqual(config.get("one.three"), {"eight": 8})
+        self.assertFalse(config.hasKey("one.three.six"))
+
+        config.updateData({"one.three.nine": 9})
+        self.assertEqual(config.get("one.three"), {"eight": 8, "nine": 9})
+        self.assertEqual(config.overrides()["one.three"], {"eight": 8})
+
+        self.assertRaises(Exception, config.updateData, {"one.two.ten": 10})
+        self.assertRaises(Exception, config.updateData,
+                          {"five.seven.ten": 10})
+
+        # Values which were returned, and overlays, are not changed by
+        # later updates
+        merged = config.get("one.three")
+        overlay = config.overlay()
+        config.updateData({"one.three.eleven": 11, "one.two": 12})
+        self.assertEqual(merged, {"eight": 8, "nine": 9})
+        self.assertEqual(overlay.get("one"),
+                         {"two": 2, "three": {"eight": 8, "nine": 9}})
+        self.assertEqual(config.get("one"), {
+                "two": 12, "three": {"eight": 8, "nine": 9, "eleven": 11}})
+
+        # Parsing discards the overrides
+        config.parse(self.__testFile)
+        self.assertEqual(config.overrides(), {})
+        self.assertEqual(config.get("one.three"), {"four": 4})
+
+    def __writeFile(self, lines, filename=None):
+        filename = self.__testFile if filename is None else filename
+        fd = open(filename, 'w')
         for line in lines:
             fd.write("%s\n" % line)
         fd.close()
@@ -0,0 +1,53 @@
+from os import remove
+from tempfile import mkstemp
+from unittest import TestCase
+
+from jsonconf import FragmentCache
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        self.__loads = 0
+        fd, self.__testFile = mkstemp(suffix=".json")
+        self.__writeFile("one")
+
+    def tearDown(self):
+        remove(self.__testFile)
+
+    def test_cached(self):
+        cache = FragmentCache()
+        self.assertEqual(len(cache), 0)
+
+        data, dependencies = cache.get(self.__testFile, self.__load)
+        self.assertEqual(data, {"value": "one", "nested": {}})
+        self.assertEqual(dependencies, [])
+        self.assertEqual(len(cache), 1)
+
+        # The same data is shared by every request for the fragment
+        data2, dependencies = cache.get(self.__testFile, self.__load)
+        self.assertTrue(data2 is data)
+        self.assertEqual(self.__loads, 1)
+
+    def test_modified(self):
+        cache = FragmentCache()
+        cache.get(self.__testFile, self.__load)
+
+        self.__writeFile("three")
+        data, dependencies = cache.get(self.__testFile, self.__load)
+        self.assertEqual(data["value"], "three")
+        self.assertEqual(self.__loads, 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def __load(self, path):
+        self.__loads += 1
+        fd = open(path, 'r')
+        value = fd.read()
+        fd.close()
+        return {"value": value, "nested": {}}, []
+
+    def __writeFile(self, value):
+        fd = open(self.__testFile, 'w')
+        fd.write(value)
+        fd.close()
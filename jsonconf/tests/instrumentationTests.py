@@ -0,0 +1,48 @@
+import json
+from unittest import TestCase
+
+from jsonconf import Instrumentation
+
+
+class InstrumentationTests(TestCase):
+    def test_constructor(self):
+        stats = Instrumentation()
+        self.assertEqual(stats.sampleInterval(), 1)
+        self.assertEqual(stats.accesses(), {})
+        self.assertEqual(stats.misses(), {})
+
+        self.assertRaises(Exception, Instrumentation, 0)
+
+    def test_accesses(self):
+        stats = Instrumentation()
+        stats.recordAccess("one", True)
+        stats.recordAccess("one", True)
+        stats.recordAccess("two", False)
+
+        self.assertEqual(stats.accesses(), {"one": 2, "two": 1})
+        self.assertEqual(stats.misses(), {"two": 1})
+
+        stats.reset()
+        self.assertEqual(stats.accesses(), {})
+
+    def test_sampling(self):
+        stats = Instrumentation(sampleInterval=4)
+        for index in range(10):
+            stats.recordAccess("one", True)
+
+        self.assertEqual(stats.accesses(), {"one": 2})
+
+    def test_export(self):
+        stats = Instrumentation()
+        stats.recordAccess("one", False)
+        stats.recordTime("parse", 0.5)
+        stats.recordTime("parse", 0.25)
+
+        expected = {
+            "sampleInterval": 1,
+            "accesses": {"one": 1},
+            "misses": {"one": 1},
+            "timings": {"parse": {"calls": 2, "seconds": 0.75}},
+            }
+        self.assertEqual(stats.toDict(), expected)
+        self.assertEqual(json.loads(stats.toJson()), expected)
@@ -0,0 +1,125 @@
+from unittest import TestCase
+
+from jsonconf import Interpolator
+
+
+class InterpolatorTests(TestCase):
+    def setUp(self):
+        self.__data = {
+            "host": "localhost",
+            "port": 5432,
+            "db": {
+                "url": "postgres://${host}:${port}/main",
+                "port": "${port}",
+                "hosts": ["${host}", "backup"],
+                },
+            }
+        self.__lookups = []
+
+    def test_scan(self):
+        interpolator = Interpolator()
+        self.assertEqual(interpolator.hasReferences(), False)
+
+        interpolator.scan(self.__data)
+        self.assertEqual(interpolator.hasReferences(), True)
+        self.assertEqual(interpolator.references("db.url"), ["host", "port"])
+        self.assertEqual(interpolator.references("db.hosts"), ["host"])
+        self.assertEqual(interpolator.references("host"), [])
+
+    def test_resolve(self):
+        interpolator = Interpolator()
+        interpolator.scan(self.__data)
+
+        db = self.__data["db"]
+        self.assertEqual(interpolator.resolve("db.url", db["url"],
+                                              self.__lookup),
+                         "postgres://localhost:5432/main")
+        self.assertEqual(interpolator.resolve("db.port", db["port"],
+                                              self.__lookup), 5432)
+        self.assertEqual(interpolator.resolve("db.hosts", db["hosts"],
+                                              self.__lookup),
+                         ["localhost", "backup"])
+        self.assertEqual(interpolator.resolve("db", db, self.__lookup),
+                         {"url": "postgres://localhost:5432/main",
+                          "port": 5432, "hosts": ["localhost", "backup"]})
+
+        # Values without references are returned unchanged
+        self.assertEqual(interpolator.resolve("host", "localhost",
+                                              self.__lookup), "localhost")
+
+    def test_memoized(self):
+        interpolator = Interpolator()
+        interpolator.scan(self.__data)
+
+        url = self.__data["db"]["url"]
+        interpolator.resolve("db.url", url, self.__lookup)
+        interpolator.resolve("db.url", url, self.__lookup)
+        self.assertEqual(self.__lookups, ["host", "port"])
+
+        # Only values depending on the changed key are resolved again
+        interpolator.resolve("db.port", "${port}", self.__lookup)
+        self.__lookups = []
+        self.__data["host"] = "remote"
+        interpolator.update("host", "remote")
+        self.assertEqual(interpolator.resolve("db.url", url, self.__lookup),
+                         "postgres://remote:5432/main")
+        interpolator.resolve("db.port", "${port}", self.__lookup)
+        self.assertEqual(self.__lookups, ["host", "port"])
+
+    def test_invalidate(self):
+        interpolator = Interpolator()
+        interpolator.scan(self.__data)
+        db = self.__data["db"]
+        interpolator.resolve("db", db, self.__lookup)
+        interpolator.resolve("db.port", db["port"], self.__lookup)
+
+        # Updating a key containing a referenced key, or containing
+        # referencing keys, discards the values depending on it
+        for key in ["host", "db", "port"]:
+            self.__lookups = []
+            interpolator.invalidate(key)
+            interpolator.resolve("db", db, self.__lookup)
+            self.assertTrue(len(self.__lookups) > 0, key)
+
+        self.__lookups = []
+        interpolator.invalidate("other")
+        interpolator.resolve("db", db, self.__lookup)
+        interpolator.resolve("db.port", db["port"], self.__lookup)
+        self.assertEqual(self.__lookups, [])
+
+    def test_undefined(self):
+        interpolator = Interpolator()
+        interpolator.scan({"a": "${missing}"})
+        self.assertRaises(Exception, interpolator.resolve, "a", "${missing}",
+                          self.__lookup)
+
+    def test_cycles(self):
+        interpolator = Interpolator()
+        interpolator.scan({"a": "${b}", "b": {"c": "${a}"}})
+        self.assertRaises(Exception, interpolator.checkCycles)
+
+        interpolator = Interpolator()
+        interpolator.scan({"a": "${a}"})
+        self.assertRaises(Exception, interpolator.checkCycles)
+
+        interpolator = Interpolator()
+        interpolator.scan({"a": "${b}", "b": "${c}", "c": 1})
+        interpolator.checkCycles()
+
+        # Cycles created by updates are found from the updated keys
+        interpolator.update("c", {"d": "${a}"})
+        self.assertRaises(Exception, interpolator.checkCycles)
+        interpolator.update("c", {"d": 1})
+        interpolator.checkCycles()
+        interpolator.update("d", "${c.d}")
+        interpolator.checkCycles()
+        self.assertEqual(interpolator.references("d"), ["c.d"])
+
+    def __lookup(self, key):
+        self.__lookups.append(key)
+        value = self.__data
+        for part in key.split("."):
+            value = value[part]
+        if isinstance(value, basestring) and "${" in value:
+            raise Exception("Unexpected nested reference: %s" % key)
+        return value
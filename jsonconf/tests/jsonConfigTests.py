@@ -1,3 +1,5 @@
+import os
+from datetime import datetime
 from unittest import TestCase
 
 from jsonconf import JsonConfig
@@ -169,6 +171,290 @@ class JsonConfigTests(TestCase):
 
         self.assertEqual(config.get("logLevel"), 123)
 
+    def test_reload(self):
+        lines = [
+            "{",
+            '    "one": 5,',
+            '    "two": 2',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        args = ["/usr/bin/whatever", "one=100"]
+
+        config = JsonConfig()
+        config.parse(self.__testFile, args)
+
+        lines = [
+            "{",
+            '    "one": 6,',
+            '    "two": 3',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        # Command line arguments still override the reloaded file
+        self.assertEqual(config.reload(), ["two"])
+        self.assertEqual(config.get("one"), '100')
+        self.assertEqual(config.get("two"), 3)
+
+    def test_changes(self):
+        lines = [
+            "{",
+            '    "one": 5',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = JsonConfig()
+        config.parse(self.__testFile)
+
+        lines = [
+            "{",
+            '    "one": 50',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        changes = config.changes(interval=0.01)
+        self.assertEqual(changes.next(), ["one"])
+        self.assertEqual(config.get("one"), 50)
+
+    def test_instrumentation(self):
+        lines = [
+            "{",
+            '    "one": 5',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        config = JsonConfig()
+        self.assertEqual(config.instrumentation(), None)
+
+        stats = config.enableInstrumentation()
+        config.requireKey("one")
+        config.parse(self.__testFile, ["/usr/bin/whatever"])
+
+        stats.reset()
+        config.get("one")
+        config.get("one")
+        config.get("two", 2)
+        self.assertEqual(stats.accesses(), {"one": 2, "two": 1})
+        self.assertEqual(stats.misses(), {"two": 1})
+
+        config.reload()
+        timings = stats.toDict()["timings"]
+        for operation in ["parse", "updateData", "requireKeys", "convertKeys"]:
+            self.assertEqual(timings[operation]["calls"], 1)
+
+        config.disableInstrumentation()
+        self.assertEqual(config.instrumentation(), None)
+
+    def test_instrumentationDeadKeys(self):
+        lines = [
+            "{",
+            '    "one": "5",',
+            '    "two": "6"',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        # Keys which are only required and converted are never accessed
+        config = JsonConfig()
+        stats = config.enableInstrumentation()
+        config.requireKey("one", int)
+        config.convertKey("two", int)
+        config.parse(self.__testFile, ["/usr/bin/whatever"])
+        config.updateData({"two": "7"})
+
+        self.assertEqual(config.get("one"), 5)
+        self.assertEqual(stats.accesses(), {"one": 1})
+
+    def test_interpolation(self):
+        lines = [
+            "{",
+            '    "host": "localhost",',
+            '    "url": "http://${host}/"',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        args = ["/usr/bin/whatever", "host=example.com"]
+
+        config = JsonConfig()
+        config.enableInterpolation()
+        config.parse(self.__testFile, args)
+
+        self.assertEqual(config.get("url"), "http://example.com/")
+
+    def test_updateDataInterpolation(self):
+        lines = [
+            "{",
+            '    "host": "a",',
+            '    "when": "2020-01-02",',
+            '    "url": "${host}:1",',
+            '    "db": {"host": "${host}", "port": "5"}',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        def parseDate(value):
+            return datetime.strptime(value, "%Y-%m-%d")
+
+        def count(value):
+            return dict(value, conversions=value.get("conversions", 0) + 1)
+
+        # None of the conversions may be applied to converted values
+        config = JsonConfig()
+        config.enableInterpolation()
+        config.convertKey("when", parseDate)
+        config.convertKey("url", lambda value: value + "/")
+        config.convertKey("db", count)
+        config.convertKey("db.port", int)
+        config.parse(self.__testFile, ["/usr/bin/whatever"])
+        self.assertEqual(config.get("url"), "a:1/")
+
+        # Conversions of the keys referencing an updated key are applied
+        # again, to their original values
+        config.updateData({"host": "b"})
+        self.assertEqual(config.get("when"), datetime(2020, 1, 2))
+        self.assertEqual(config.get("url"), "b:1/")
+        self.assertEqual(config.get("db"),
+                         {"host": "b", "port": 5, "conversions": 1})
+
+        config.updateData({"db.port": "6"})
+        self.assertEqual(config.get("db"),
+                         {"host": "b", "port": 6, "conversions": 1})
+
+    def test_convertOverride(self):
+        lines = [
+            "{",
+            '    "one": {',
+            '        "two": 5',
+            '    }',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        args = ["/usr/bin/whatever", "one.two=100"]
+
+        config = JsonConfig()
+        config.convertKey("one.two", int)
+        config.parse(self.__testFile, args)
+
+        self.assertEqual(config.get("one.two"), 100)
+        self.assertEqual(config.get("one"), {"two": 100})
+
+    def test_environment(self):
+        lines = [
+            "{",
+            '    "one": {',
+            '        "two": 5,',
+            '        "three": 6',
+            '    }',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        os.environ["JSONCONF_TEST_one__two"] = "100"
+        os.environ["JSONCONF_TEST_one__three"] = "200"
+        try:
+            args = ["/usr/bin/whatever", "one.three=300"]
+
+            config = JsonConfig(envPrefix="JSONCONF_TEST_")
+            config.parse(self.__testFile, args)
+
+            # The command line takes precedence over the environment
+            self.assertEqual(config.get("one.two"), "100")
+            self.assertEqual(config.get("one.three"), "300")
+
+            config = JsonConfig()
+            config.parse(self.__testFile)
+            self.assertEqual(config.get("one.two"), 5)
+        finally:
+            del os.environ["JSONCONF_TEST_one__two"]
+            del os.environ["JSONCONF_TEST_one__three"]
+
+    def test_shared(self):
+        lines = [
+            "{",
+            '    "one": {',
+            '        "two": 5',
+            '    },',
+            '    "four": 4',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        first = JsonConfig(shared=True)
+        first.convertKey("one.two", int)
+        first.parse(self.__testFile, ["/usr/bin/whatever", "one.two=100"])
+
+        second = JsonConfig(shared=True)
+        second.parse(self.__testFile, ["/usr/bin/whatever", "four=40"])
+
+        third = JsonConfig(shared=True)
+        third.parse(self.__testFile)
+
+        self.assertEqual(first.get("one"), {"two": 100})
+        self.assertEqual(first.get("four"), 4)
+        self.assertEqual(second.get("one"), {"two": 5})
+        self.assertEqual(second.get("four"), "40")
+        self.assertEqual(third.get("one"), {"two": 5})
+        self.assertEqual(third.get("four"), 4)
+
+    def test_updateData(self):
+        lines = [
+            "{",
+            '    "db": {"host": "a", "port": "1"},',
+            '    "cache": {"size": "10", "ttl": "5"}',
+            "}",
+            ]
+        self.__writeFile(lines)
+
+        converted = []
+
+        def convert(value):
+            converted.append(value)
+            return value if type(value) == type(dict()) else int(value)
+
+        config = JsonConfig()
+        config.requireKey("db.host")
+        config.requireKey("db.port", convert)
+        config.convertKey("cache.size", convert)
+        config.convertKey("cache.ttl", convert)
+        config.convertKey("cache", convert)
+        config.parse(self.__testFile, ["/usr/bin/whatever"])
+        self.assertEqual(len(converted), 4)
+
+        # Only the conversions of the updated keys, and the keys containing
+        # or beneath them, are applied again, to the original values. The
+        # conversion of the unchanged ttl is remembered.
+        del converted[:]
+        config.updateData({"cache.size": "20"})
+        self.assertEqual(config.get("cache.size"), 20)
+        self.assertEqual(config.get("cache.ttl"), 5)
+        self.assertEqual(sorted(converted, key=str),
+                         ["20", {"size": "20", "ttl": "5"}])
+
+        del converted[:]
+        config.updateData({"db": {"host": "b", "port": "2"}})
+        self.assertEqual(converted, ["2"])
+        self.assertEqual(config.get("db.port"), 2)
+
+        del converted[:]
+        config.updateData({"other": 1})
+        self.assertEqual(converted, [])
+
+        self.assertRaises(Exception, config.updateData, {"db": {"port": 3}})
+
+        # Updates are applied again when the configuration is reloaded
+        config.updateData({"db": {"host": "c", "port": "3"}})
+        config.reload()
+        self.assertEqual(config.get("db.host"), "c")
+        self.assertEqual(config.get("db.port"), 3)
+        self.assertEqual(config.get("cache.size"), 20)
+
     def __test_overrideFilename(self):
         args = ["/usr/bin/whatever", "--config-file=%s" % self.__testFile]
 
@@ -0,0 +1,108 @@
+import json
+import os
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import ConfigFile, JsonConfig, KeyAudit
+
+
+class KeyAuditTests(TestCase):
+    def test_record(self):
+        audit = KeyAudit()
+        audit.recordRead("a", True)
+        audit.recordRead("b", False)
+        audit.recordUnknown("b", "command line")
+        audit.recordUnknown("c", "command line")
+        self.assertEqual(audit.readKeys(), ["a", "b"])
+        self.assertEqual(audit.unknownKeys(),
+                         [("b", "read"), ("c", "command line")])
+
+        audit.reset()
+        self.assertEqual(audit.readKeys(), [])
+        self.assertEqual(audit.unknownKeys(), [])
+
+    def test_configFile(self):
+        config = ConfigFile()
+        config.updateData({"db.pool_size": "10", "db.host": "a"})
+        self.assertRaises(Exception, config.checkKeys)
+
+        audit = config.enableStrictMode()
+        self.assertTrue(config.keyAudit() is audit)
+        config.get("db.host")
+        config.getInt("db.pool_size")
+        config.getInt("db.pool_size")
+        config.getInt("db.pool_szie", 5)
+        self.assertEqual(audit.readKeys(),
+                         ["db.host", "db.pool_size", "db.pool_szie"])
+
+        try:
+            config.checkKeys()
+            self.fail("Expected an exception")
+        except Exception, e:
+            self.assertEqual(str(e).splitlines(), [
+                "Unknown configuration keys:",
+                "    db.pool_szie (read), did you mean: db.pool_size",
+                ])
+
+        # Keys which exist once they are checked are not reported
+        config.updateData({"db.pool_szie": 1})
+        config.checkKeys()
+
+        config.disableStrictMode()
+        self.assertEqual(config.keyAudit(), None)
+
+    def test_jsonConfig(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            fd = open(filename, 'w')
+            json.dump({"db": {"host": "a", "port": 1}}, fd)
+            fd.close()
+
+            os.environ["KEYAUDIT_db__hots"] = "b"
+            config = JsonConfig(envPrefix="KEYAUDIT_")
+            audit = config.enableStrictMode()
+            config.parse(filename, ["program", "db.prot=2", "db.port=3"])
+            self.assertEqual(config.get("db.port"), "3")
+            self.assertEqual(audit.unknownKeys(),
+                             [("db.hots", "environment"),
+                              ("db.prot", "command line")])
+            self.assertEqual(config.suggestKeys("db.prot"), ["db.port"])
+
+            try:
+                config.checkKeys()
+                self.fail("Expected an exception")
+            except Exception, e:
+                self.assertEqual(str(e).splitlines()[1:], [
+                    "    db.hots (environment), did you mean: db.host",
+                    "    db.prot (command line), did you mean: db.port",
+                    ])
+        finally:
+            del os.environ["KEYAUDIT_db__hots"]
+            rmtree(directory)
+
+    def test_internalKeys(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            fd = open(filename, 'w')
+            json.dump({"db": {"port": "1"}}, fd)
+            fd.close()
+
+            # The configuration file key, and the reads made to convert and
+            # require keys, are not recorded
+            config = JsonConfig()
+            audit = config.enableStrictMode()
+            config.requireKey("db.port", int)
+            config.parse(None, ["program", "--config-file=" + filename])
+            self.assertEqual(audit.readKeys(), [])
+            config.checkKeys()
+
+            config.updateData({"db.port": "2"})
+            self.assertEqual(audit.readKeys(), [])
+            self.assertEqual(config.get("db.port"), 2)
+            self.assertEqual(audit.readKeys(), ["db.port"])
+        finally:
+            rmtree(directory)
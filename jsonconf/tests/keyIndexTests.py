@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from jsonconf import KeyIndex
+from jsonconf.keyIndex import editDistance
+
+
+class KeyIndexTests(TestCase):
+    def setUp(self):
+        self.__data = {
+            "db": {"pool_size": 10, "host": "a", "hosts": ["b"],
+                   "port": 5432},
+            "cache": {"size": 100, "ttl": {"seconds": 5}},
+            "dc": {"port": 1},
+            }
+
+    def test_editDistance(self):
+        cases = [("", "", 0), ("a", "", 1), ("", "abc", 3),
+                 ("size", "szie", 2), ("kitten", "sitting", 3),
+                 ("host", "hosts", 1), (u"caf\xe9", "cafe", 1)]
+        for first, second, distance in cases:
+            self.assertEqual(editDistance(first, second), distance)
+            self.assertEqual(editDistance(second, first), distance)
+
+    def test_nearSubKeys(self):
+        index = KeyIndex(self.__data)
+        self.assertEqual(len(index), 10)
+        self.assertEqual(sorted(index.nearSubKeys("host", 1)),
+                         [(0, "host"), (1, "hosts")])
+        self.assertEqual(KeyIndex({}).nearSubKeys("a", 2), [])
+
+    def test_suggest(self):
+        index = KeyIndex(self.__data)
+        self.assertEqual(index.suggest("db.pool_szie"), ["db.pool_size"])
+        self.assertEqual(index.suggest("db.hots"), ["db.hosts", "db.host"])
+        self.assertEqual(index.suggest("dx.port"), ["db.port", "dc.port"])
+        self.assertEqual(index.suggest("cache.ttl.second"),
+                         ["cache.ttl.seconds"])
+        self.assertEqual(index.suggest("db.hots", limit=1), ["db.hosts"])
+
+        # Suggestions are within the total distance, and do not include
+        # the key itself
+        self.assertEqual(index.suggest("dx.pxry"), [])
+        self.assertEqual(index.suggest("dx.pxry", maxDistance=3),
+                         ["db.port", "dc.port"])
+        self.assertEqual(index.suggest("db.port"), ["dc.port", "db.host"])
+        self.assertEqual(index.suggest("db.port", maxDistance=0), [])
+        self.assertEqual(index.suggest("db.port.x"), [])
+
+    def test_delimiter(self):
+        index = KeyIndex(self.__data, '/')
+        self.assertEqual(index.suggest("cach/size"), ["cache/size"])
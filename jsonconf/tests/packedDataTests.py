@@ -0,0 +1,105 @@
+import json
+import os
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import ConfigFile, JsonConfig, PackedData
+
+
+class PackedDataTests(TestCase):
+    def setUp(self):
+        self.__data = {
+            "db": {"host": u"caf\xe9", "port": 5432, "ratio": 0.1,
+                   "replicas": [{"host": "a"}, None], "options": {}},
+            "a.b": {"c": 1},
+            u"\xe9t\xe9": {"hot": True},
+            "": 2,
+            }
+
+    def test_get(self):
+        packed = PackedData(self.__data)
+        self.assertEqual(packed.get("db"), self.__data["db"])
+        self.assertEqual(packed.get("db.host"), u"caf\xe9")
+        self.assertEqual(packed.get("db.port"), 5432)
+        self.assertEqual(packed.get("db.ratio"), 0.1)
+        self.assertEqual(packed.get("db.replicas"), [{"host": "a"}, None])
+        self.assertEqual(packed.get("db.options"), {})
+        self.assertEqual(packed.get(u"\xe9t\xe9.hot"), True)
+        self.assertEqual(packed.get("\xc3\xa9t\xc3\xa9.hot"), True)
+        self.assertEqual(packed.get(""), 2)
+
+        # Keys containing the delimiter, and keys within lists, are not
+        # indexed
+        self.assertEqual(packed.get("a.b.c", "missing"), "missing")
+        self.assertEqual(packed.get("db.replicas.0"), None)
+        self.assertEqual(packed.get("db.missing", 3), 3)
+        self.assertFalse(packed.hasKey("db.port.x"))
+        self.assertEqual(len(packed), 9)
+
+        self.assertEqual(packed.unpack(), self.__data)
+        self.assertEqual(PackedData({}).get("a"), None)
+        self.assertEqual(PackedData([1]).unpack(), [1])
+
+    def test_invalid(self):
+        self.assertRaises(Exception, PackedData, {"a": set([1])})
+        self.assertRaises(Exception, PackedData, {"a": {1: 2}})
+
+    def test_freeze(self):
+        config = ConfigFile()
+        config.updateData({"db.host": "localhost", "db.url": "${db.host}:1",
+                           "port": "5"})
+        config.enableInterpolation()
+        config.freeze(packed=True)
+
+        self.assertTrue(config.isFrozen())
+        self.assertEqual(config.get("db.url"), "localhost:1")
+        self.assertEqual(config.getInt("port"), 5)
+        self.assertEqual(config.flatten("db"), {"db.host": "localhost",
+                                                "db.url": "localhost:1"})
+        self.assertEqual(sorted(config.keys()), ["db", "port"])
+        self.assertRaises(Exception, config.updateData, {"port": 6})
+        self.assertRaises(Exception, config.convertKeys, {"port": int})
+
+        # Overlays are not frozen
+        overlay = config.overlay({"port": 6})
+        self.assertEqual(overlay.get("port"), 6)
+        self.assertEqual(config.get("port"), "5")
+
+    def test_config(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            fd = open(filename, 'w')
+            json.dump({"db": {"host": "a", "port": 1}}, fd)
+            fd.close()
+
+            config = JsonConfig()
+            config.convertKey("db.port", str)
+            config.parse(filename, ["program", "db.host=b"])
+            config.freeze()
+            self.assertEqual(config.get("db"), {"host": "b", "port": "1"})
+            self.assertRaises(Exception, config.updateData, {"db.port": 2})
+            self.assertRaises(Exception, config.reload)
+            self.assertEqual(config.get("db.port"), "1")
+
+            # Children look up values in the frozen configuration
+            read, write = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read)
+                os.write(write, config.get("db.host"))
+                os._exit(0)
+            os.close(write)
+            self.assertEqual(os.read(read, 10), "b")
+            os.close(read)
+            os.waitpid(pid, 0)
+
+            # Parsing again unfreezes the configuration
+            config.parse(filename, ["program"])
+            self.assertFalse(config.isFrozen())
+            config.updateData({"db.port": 2})
+            self.assertEqual(config.get("db.port"), "2")
+        finally:
+            rmtree(directory)
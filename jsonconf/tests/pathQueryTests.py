@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+from jsonconf import ConfigFile, PathQuery
+
+
+class PathQueryTests(TestCase):
+    def setUp(self):
+        self.__data = {
+            "services": {
+                "payments": {
+                    "db": {"pool_size": 10},
+                    "replicas": [{"host": "a"}, {"host": "b"}],
+                    },
+                "billing": {
+                    "db": {"pool_size": 4},
+                    },
+                },
+            "pool_size": 1,
+            }
+
+    def test_keys(self):
+        self.assertEqual(self.__match("services.billing.db.pool_size"),
+                         [("services.billing.db.pool_size", 4)])
+        self.assertEqual(self.__match("services.missing.db"), [])
+        self.assertEqual(self.__match("pool_size.missing"), [])
+
+    def test_wildcards(self):
+        self.assertEqual(self.__match("services.*.db.pool_size"), [
+            ("services.billing.db.pool_size", 4),
+            ("services.payments.db.pool_size", 10),
+            ])
+        self.assertEqual(self.__match("services.*"), [
+            ("services.billing", self.__data["services"]["billing"]),
+            ("services.payments", self.__data["services"]["payments"]),
+            ])
+
+    def test_globs(self):
+        self.assertEqual(self.__match("**.pool_size"), [
+            ("pool_size", 1),
+            ("services.billing.db.pool_size", 4),
+            ("services.payments.db.pool_size", 10),
+            ])
+        self.assertEqual(self.__match("services.**.host"), [
+            ("services.payments.replicas[0].host", "a"),
+            ("services.payments.replicas[1].host", "b"),
+            ])
+
+        # Values reachable in several ways are only produced once
+        self.assertEqual(self.__match("**.db.**.pool_size"), [
+            ("services.billing.db.pool_size", 4),
+            ("services.payments.db.pool_size", 10),
+            ])
+
+    def test_indices(self):
+        self.assertEqual(self.__match("services.payments.replicas[1].host"),
+                         [("services.payments.replicas[1].host", "b")])
+        self.assertEqual(self.__match("services.payments.replicas[*].host"), [
+            ("services.payments.replicas[0].host", "a"),
+            ("services.payments.replicas[1].host", "b"),
+            ])
+        self.assertEqual(self.__match("services.payments.replicas[2]"), [])
+        self.assertEqual(self.__match("services.payments.db[0]"), [])
+
+    def test_invalid(self):
+        for pattern in ["", "**", "a..b", "a[x]", "**[0]", "a[0"]:
+            self.assertRaises(Exception, PathQuery, pattern)
+
+    def test_delimiter(self):
+        query = PathQuery("services/*/db/pool_size", '/')
+        self.assertEqual([key for key, _ in query.match(self.__data)], [
+            "services/billing/db/pool_size",
+            "services/payments/db/pool_size",
+            ])
+
+    def test_config(self):
+        config = ConfigFile()
+        config.updateData(self.__data)
+
+        pattern = "services.*.db.pool_size"
+        self.assertEqual(list(config.query(pattern)), [
+            ("services.billing.db.pool_size", 4),
+            ("services.payments.db.pool_size", 10),
+            ])
+
+        # Repeated queries reflect updates
+        self.assertEqual(list(config.query(pattern)),
+                         list(config.query(pattern)))
+        config.updateData({"services.billing.db.pool_size": 8})
+        self.assertEqual(list(config.query(pattern)), [
+            ("services.billing.db.pool_size", 8),
+            ("services.payments.db.pool_size", 10),
+            ])
+
+        # Queries resolve references when interpolation is enabled
+        config.updateData({"services.billing.db.pool_size": "${pool_size}"})
+        config.enableInterpolation()
+        self.assertEqual(list(config.query("services.billing.db.*")),
+                         [("services.billing.db.pool_size", 1)])
+
+        # Only the values visited by the query are resolved, and references
+        # to JSON objects are followed
+        config.updateData({"broken": "${missing}",
+                           "alias": "${services.billing}",
+                           "services.copy": {"db": "${services.billing.db}"}})
+        self.assertEqual(list(config.query("alias.db.pool_size")),
+                         [("alias.db.pool_size", 1)])
+        self.assertEqual(list(config.query("services.copy")),
+                         [("services.copy", {"db": {"pool_size": 1}})])
+        self.assertEqual(list(config.query("services.*.db.pool_size")), [
+            ("services.billing.db.pool_size", 1),
+            ("services.copy.db.pool_size", 1),
+            ("services.payments.db.pool_size", 10),
+            ])
+        self.assertRaises(Exception, list, config.query("**.pool_size"))
+
+    def __match(self, pattern):
+        return list(PathQuery(pattern).match(self.__data))
@@ -0,0 +1,170 @@
+import json
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import ConfigFile, JsonConfig, SchemaValidator
+from jsonconf.schemaValidator import compileSchema
+
+
+class SchemaValidatorTests(TestCase):
+    def setUp(self):
+        self.__schema = {
+            "type": "object",
+            "properties": {
+                "db": {
+                    "type": "object",
+                    "properties": {
+                        "host": {"type": "string", "minLength": 1},
+                        "port": {"type": "integer", "minimum": 1,
+                                 "maximum": 65535},
+                        },
+                    "required": ["host", "port"],
+                    "additionalProperties": False,
+                    },
+                "replicas": {
+                    "type": "array",
+                    "items": {"$ref": "#/definitions/replica"},
+                    },
+                },
+            "definitions": {
+                "replica": {
+                    "type": "object",
+                    "properties": {"weight": {"type": "number"}},
+                    },
+                },
+            }
+
+    def test_valid(self):
+        data = {"db": {"host": "localhost", "port": 5432},
+                "replicas": [{"weight": 0.5}, {"weight": 2}]}
+        self.assertEqual(SchemaValidator(self.__schema).validate(data), [])
+
+    def test_errors(self):
+        data = {"db": {"host": "", "port": True, "user": "x"},
+                "replicas": [{"weight": "heavy"}, 3]}
+
+        # Every error is reported with the path of the invalid value
+        self.assertEqual(SchemaValidator(self.__schema).validate(data), [
+            ("db.host", "Value must be at least 1 characters long"),
+            ("db.port", "Expected integer, not boolean"),
+            ("db.user", "Key is not allowed"),
+            ("replicas[0].weight", "Expected number, not string"),
+            ("replicas[1]", "Expected object, not integer"),
+            ])
+
+        self.assertEqual(SchemaValidator(self.__schema).validate(
+                {"db": {"port": 0}}, '/'), [
+            ("db/host", "Required key is missing"),
+            ("db/port", "Value must be at least 1"),
+            ])
+        self.assertEqual(SchemaValidator(self.__schema).validate([]),
+                         [(None, "Expected object, not array")])
+
+    def test_keywords(self):
+        cases = [
+            ({"enum": [1, "a"]}, 1, True),
+            ({"enum": [1, "a"]}, True, False),
+            ({"const": {"a": [1]}}, {"a": [1]}, True),
+            ({"type": "integer"}, 2.0, True),
+            ({"type": ["string", "null"]}, None, True),
+            ({"exclusiveMaximum": 3}, 3, False),
+            ({"multipleOf": 0.5}, 1.5, True),
+            ({"multipleOf": 2}, 3, False),
+            ({"pattern": "^a+$"}, "aaa", True),
+            ({"maxLength": 2}, "abc", False),
+            ({"patternProperties": {"^x": {"type": "integer"}}},
+             {"x1": "no"}, False),
+            ({"propertyNames": {"maxLength": 2}}, {"abc": 1}, False),
+            ({"minProperties": 1}, {}, False),
+            ({"dependencies": {"a": ["b"]}}, {"a": 1}, False),
+            ({"items": [{"type": "string"}], "additionalItems": False},
+             ["a", "b"], False),
+            ({"uniqueItems": True}, [1, True], True),
+            ({"uniqueItems": True}, [{"a": 1}, {"a": 1}], False),
+            ({"contains": {"type": "string"}}, [1, "a"], True),
+            ({"anyOf": [{"type": "string"}, {"minimum": 3}]}, 2, False),
+            ({"oneOf": [{"minimum": 1}, {"maximum": 5}]}, 3, False),
+            ({"not": {"type": "string"}}, 1, True),
+            ({"if": {"type": "string"}, "then": {"minLength": 2},
+              "else": {"minimum": 0}}, -1, False),
+            ({"allOf": [{"minimum": 1}, {"maximum": 2}]}, 3, False),
+            (True, 1, True),
+            (False, 1, False),
+            ]
+        for schema, value, valid in cases:
+            errors = SchemaValidator(schema).validate(value)
+            self.assertEqual(len(errors) == 0, valid, (schema, value, errors))
+
+    def test_recursive(self):
+        schema = {
+            "$ref": "#/definitions/node",
+            "definitions": {
+                "node": {
+                    "type": "object",
+                    "additionalProperties": {"$ref": "#/definitions/node"},
+                    },
+                },
+            }
+        validator = SchemaValidator(schema)
+        self.assertEqual(validator.validate({"a": {"b": {}}}), [])
+        self.assertEqual(validator.validate({"a": {"b": 1}}),
+                         [("a.b", "Expected object, not integer")])
+
+    def test_invalid(self):
+        for schema in [{"type": "decimal"}, {"$ref": "other.json#/a"},
+                       {"$ref": "#/missing"}, {"pattern": "("}, []]:
+            self.assertRaises(Exception, SchemaValidator, schema)
+
+    def test_cache(self):
+        first = compileSchema(json.loads(json.dumps(self.__schema)))
+        self.assertTrue(compileSchema(self.__schema) is first)
+        self.assertFalse(compileSchema({"type": "object"}) is first)
+
+    def test_config(self):
+        config = ConfigFile()
+        config.updateData({"db.host": "localhost", "db.port": "${port}",
+                           "port": 5432})
+        config.enableInterpolation()
+        config.validateSchema(self.__schema)
+
+        config.updateData({"db.port": 70000, "db.user": "x"})
+        try:
+            config.validateSchema(self.__schema)
+            self.fail("Expected an exception")
+        except Exception, e:
+            self.assertEqual(str(e).splitlines()[1:], [
+                "    db.port: Value must be at most 65535",
+                "    db.user: Key is not allowed",
+                ])
+
+    def test_reload(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            self.__write(filename, {"db": {"host": "a", "port": 1}})
+
+            config = JsonConfig()
+            config.parse(filename, ["program"])
+            config.validateSchema(self.__schema)
+
+            # A reloaded configuration which does not match is rejected
+            self.__write(filename, {"db": {"host": "b", "port": -1}})
+            self.assertRaises(Exception, config.reload)
+            self.assertEqual(config.get("db.host"), "a")
+
+            # Command line overrides are validated once converted
+            config.convertKey("db.port", int)
+            self.__write(filename, {"db": {"host": "c", "port": 2}})
+            config.parse(filename, ["program", "db.port=3"])
+            self.assertEqual(config.get("db.port"), 3)
+            self.assertRaises(Exception, config.parse, filename,
+                              ["program", "db.port=0"])
+        finally:
+            rmtree(directory)
+
+    def __write(self, filename, data):
+        fd = open(filename, 'w')
+        json.dump(data, fd)
+        fd.close()
@@ -0,0 +1,149 @@
+import json
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from jsonconf import JsonConfig, Subscriptions
+
+
+class _Executor:
+    '''Runs submitted functions when asked to.'''
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def run(self):
+        for fn, args in self.submitted:
+            fn(*args)
+        self.submitted = []
+
+
+class SubscriptionsTests(TestCase):
+    def setUp(self):
+        self.__calls = []
+
+    def test_notify(self):
+        subscriptions = Subscriptions()
+        for prefix in [None, "db", "db.port", "db.replicas.host", "cache"]:
+            subscriptions.subscribe(prefix, self.__callback(prefix))
+        self.assertEqual(len(subscriptions), 5)
+
+        # Subscribers to the key, the keys containing it, and the keys
+        # beneath it are called once with their related keys
+        subscriptions.notify(["db.port", "db.replicas"])
+        self.assertEqual(sorted(self.__calls), [
+            (None, ["db.port", "db.replicas"]),
+            ("db", ["db.port", "db.replicas"]),
+            ("db.port", ["db.port"]),
+            ("db.replicas.host", ["db.replicas"]),
+            ])
+
+        self.__calls = []
+        subscriptions.notify(["other"])
+        self.assertEqual(self.__calls, [(None, ["other"])])
+
+        self.__calls = []
+        subscriptions.notify([None])
+        self.assertEqual(len(self.__calls), 5)
+
+    def test_unsubscribe(self):
+        subscriptions = Subscriptions('/')
+        first = subscriptions.subscribe("db/port", self.__callback("first"))
+        second = subscriptions.subscribe("db/port", self.__callback("second"))
+
+        subscriptions.unsubscribe(first)
+        subscriptions.unsubscribe(first)
+        self.assertEqual(len(subscriptions), 1)
+        subscriptions.notify(["db"])
+        self.assertEqual(self.__calls, [("second", ["db"])])
+
+        subscriptions.unsubscribe(second)
+        self.__calls = []
+        subscriptions.notify(["db"])
+        self.assertEqual(self.__calls, [])
+
+    def test_errors(self):
+        subscriptions = Subscriptions()
+
+        def fail(keys):
+            raise ValueError("failed")
+
+        subscriptions.subscribe("a", fail)
+        subscriptions.subscribe("a", self.__callback("a"))
+
+        # Every subscriber is called before the error is raised
+        self.assertRaises(Exception, subscriptions.notify, ["a"])
+        self.assertEqual(self.__calls, [("a", ["a"])])
+
+    def test_executor(self):
+        executor = _Executor()
+        subscriptions = Subscriptions(executor=executor)
+        for index in range(1000):
+            subscriptions.subscribe("key%d" % index,
+                                    self.__callback(index))
+
+        subscriptions.notify([None])
+        self.assertEqual(self.__calls, [])
+        self.assertEqual(len(executor.submitted), 4)
+
+        executor.run()
+        self.assertEqual(len(self.__calls), 1000)
+
+    def test_config(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            self.__write(filename, {"db": {"host": "a", "port": 1},
+                                    "cache": {"size": 10}})
+
+            config = JsonConfig()
+            config.parse(filename, ["program"])
+            config.subscribe("db", self.__callback("db"))
+            config.subscribe("cache.size", self.__callback("cache.size"))
+
+            # Updates which do not change a value are not changes
+            config.updateData({"db.port": 1, "cache.size": 20})
+            self.assertEqual(self.__calls, [("cache.size", ["cache.size"])])
+
+            self.__calls = []
+            self.__write(filename, {"db": {"host": "b", "port": 1},
+                                    "cache": {"size": 10}})
+            self.assertEqual(config.reload(), ["db.host"])
+            self.assertEqual(self.__calls, [("db", ["db.host"])])
+        finally:
+            rmtree(directory)
+
+    def test_unrecorded(self):
+        directory = mkdtemp()
+        try:
+            filename = join(directory, "config.json")
+            self.__write(filename, {"a": 1})
+
+            config = JsonConfig()
+            stats = config.enableInstrumentation()
+            audit = config.enableStrictMode()
+            config.parse(filename, ["program"])
+            config.subscribe("a", self.__callback("a"))
+
+            # Finding the changed keys does not read them
+            config.updateData({"a": 2, "newkey": 3})
+            self.assertEqual(self.__calls, [("a", ["a"])])
+            self.assertEqual(stats.accesses(), {})
+            self.assertEqual(audit.readKeys(), [])
+            config.checkKeys()
+        finally:
+            rmtree(directory)
+
+    def __callback(self, name):
+        def callback(keys):
+            self.__calls.append((name, keys))
+        return callback
+
+    def __write(self, filename, data):
+        fd = open(filename, 'w')
+        json.dump(data, fd)
+        fd.close()
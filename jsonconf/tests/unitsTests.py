@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from jsonconf import parseBool, parseDuration, parseFloat, parseInt, \
+    parseSize
+
+
+class UnitsTests(TestCase):
+    def test_parseInt(self):
+        self.assertEqual(parseInt(5), 5)
+        self.assertEqual(parseInt(" 42 "), 42)
+        self.assertEqual(parseInt(3.0), 3)
+        self.assertRaises(ValueError, parseInt, 3.5)
+        self.assertRaises(ValueError, parseInt, "3.5")
+        self.assertRaises(ValueError, parseInt, True)
+        self.assertRaises(ValueError, parseInt, None)
+
+    def test_parseFloat(self):
+        self.assertEqual(parseFloat(5), 5.0)
+        self.assertEqual(parseFloat("2.5"), 2.5)
+        self.assertRaises(ValueError, parseFloat, "abc")
+        self.assertRaises(ValueError, parseFloat, [1])
+
+    def test_parseBool(self):
+        for value in [True, 1, "true", "Yes", "ON", "1"]:
+            self.assertEqual(parseBool(value), True)
+        for value in [False, 0, "false", "No", "off", "0"]:
+            self.assertEqual(parseBool(value), False)
+        self.assertRaises(ValueError, parseBool, "maybe")
+        self.assertRaises(ValueError, parseBool, 2)
+
+    def test_parseDuration(self):
+        self.assertEqual(parseDuration(5), 5.0)
+        self.assertEqual(parseDuration("5"), 5.0)
+        self.assertEqual(parseDuration("30s"), 30.0)
+        self.assertEqual(parseDuration("250ms"), 0.25)
+        self.assertEqual(parseDuration("1h30m"), 5400.0)
+        self.assertEqual(parseDuration("1.5 d"), 129600.0)
+        self.assertRaises(ValueError, parseDuration, "30 parsecs")
+        self.assertRaises(ValueError, parseDuration, "")
+        self.assertRaises(ValueError, parseDuration, "s")
+
+    def test_parseSize(self):
+        self.assertEqual(parseSize(100), 100)
+        self.assertEqual(parseSize("100"), 100)
+        self.assertEqual(parseSize("512MB"), 512000000)
+        self.assertEqual(parseSize("4KiB"), 4096)
+        self.assertEqual(parseSize("1.5 kb"), 1500)
+        self.assertEqual(parseSize("123456789012345678TiB"),
+                         123456789012345678 * 1024 ** 4)
+        self.assertRaises(ValueError, parseSize, "12 parsecs")
+        self.assertRaises(ValueError, parseSize, "MB")
@@ -0,0 +1,161 @@
+'''Functions for converting configuration values, which are often specified
+as strings on the command line, into typed values.
+
+'''
+import re
+
+
+# Map boolean strings to their values
+_Booleans = {
+    "true": True, "yes": True, "on": True, "1": True,
+    "false": False, "no": False, "off": False, "0": False,
+    }
+
+# Map duration units to their number of seconds
+_DurationUnits = {
+    "us": 1e-6,
+    "ms": 1e-3,
+    "s": 1.0,
+    "m": 60.0,
+    "h": 3600.0,
+    "d": 86400.0,
+    "w": 604800.0,
+    }
+
+# Map size units to their number of bytes
+_SizeUnits = {
+    "b": 1,
+    "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+    }
+
+_DurationPart = re.compile(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]+)\s*")
+_Size = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]*)\s*$")
+
+
+def parseInt(value):
+    '''Convert a value to an integer.
+
+    :param value: The value, an integer, integral float, or string
+    :rtype: int
+
+    :raises ValueError: If the value is not an integer
+
+    '''
+    if isinstance(value, bool):
+        raise ValueError("Not an integer: %r" % value)
+    elif isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("Not an integer: %r" % value)
+        return int(value)
+    elif isinstance(value, basestring):
+        return int(value.strip(), 10)
+    elif isinstance(value, (int, long)):
+        return value
+    raise ValueError("Not an integer: %r" % value)
+
+
+def parseFloat(value):
+    '''Convert a value to a float.
+
+    :param value: The value, a number or string
+    :rtype: float
+
+    :raises ValueError: If the value is not a number
+
+    '''
+    if isinstance(value, bool) or \
+            not isinstance(value, (int, long, float, basestring)):
+        raise ValueError("Not a number: %r" % value)
+    return float(value)
+
+
+def parseBool(value):
+    '''Convert a value to a boolean.
+
+    Strings are case insensitive, and may be any of: true, false, yes, no,
+    on, off, 1, or 0.
+
+    :param value: The value, a boolean, 0, 1, or string
+    :rtype: bool
+
+    :raises ValueError: If the value is not a boolean
+
+    '''
+    if isinstance(value, bool):
+        return value
+    elif isinstance(value, (int, long)) and value in (0, 1):
+        return value == 1
+    elif isinstance(value, basestring):
+        result = _Booleans.get(value.strip().lower())
+        if result is not None:
+            return result
+    raise ValueError("Not a boolean: %r" % value)
+
+
+def parseDuration(value):
+    '''Convert a value to a number of seconds.
+
+    Numbers, and strings without units, are a number of seconds. Other
+    strings are a sequence of numbers followed by units, for example:
+    "30s", "250ms", or "1h30m". The units are: us, ms, s, m, h, d, and w.
+
+    :param value: The value, a number or string
+    :rtype: float
+
+    :raises ValueError: If the value is not a duration
+
+    '''
+    if isinstance(value, basestring):
+        text = value.strip().lower()
+        try:
+            return float(text)
+        except ValueError:
+            pass
+
+        seconds = 0.0
+        position = 0
+        while position < len(text):
+            match = _DurationPart.match(text, position)
+            if match is None or match.group(2) not in _DurationUnits:
+                raise ValueError("Not a duration: %r" % value)
+            seconds += float(match.group(1)) * _DurationUnits[match.group(2)]
+            position = match.end()
+
+        if position == 0:
+            raise ValueError("Not a duration: %r" % value)
+        return seconds
+
+    return parseFloat(value)
+
+
+def parseSize(value):
+    '''Convert a value to a number of bytes.
+
+    Numbers are a number of bytes. Strings are a number followed by an
+    optional, case insensitive, unit, for example: "512MB", or "4KiB". The
+    units are: B, KB, MB, GB, TB (powers of 1000), and KiB, MiB, GiB, TiB
+    (powers of 1024).
+
+    :param value: The value, a number or string
+    :rtype: int
+
+    :raises ValueError: If the value is not a size
+
+    '''
+    if isinstance(value, basestring):
+        match = _Size.match(value.lower())
+        if match is None:
+            raise ValueError("Not a size: %r" % value)
+
+        number, unit = match.groups()
+        unit = _SizeUnits.get(unit or "b")
+        if unit is None:
+            raise ValueError("Not a size: %r" % value)
+
+        # Avoid losing the precision of large integers
+        if "." in number:
+            return int(float(number) * unit)
+        return int(number) * unit
+
+    return parseInt(value)
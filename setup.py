@@ -12,4 +12,13 @@ setup(name='jsonconf',
       url='',
       packages=['jsonconf'],
       test_suite="jsonconf.tests",
+      extras_require={
+          "xz": ["backports.lzma"],
+          "zstd": ["zstandard"],
+          "msgpack": ["msgpack"],
+          "cbor": ["cbor2"],
+          },
+      entry_points={
+          "console_scripts": ["jsonconf-convert=jsonconf.convert:main"],
+          },
       )